@@ -1,5 +1,9 @@
 from django.contrib import admin
 from .models import Category, Brand, Tag, Product, ProductImage, Review
+from .aggregates import apply_review_delta
+from .cache import bump_generation
+from .featured import FeaturedCollection
+from tasks.queue import enqueue
 
 # --------------------------------------
 # Inline for Product Images
@@ -16,30 +20,73 @@ class ProductImageInline(admin.TabularInline):
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     # Columns displayed in the product list view
-    list_display = ("title", "price", "stock", "featured", "is_approved", "created_at")
+    list_display = ("title", "price", "final_price", "stock", "rating_avg", "review_count", "featured", "is_approved", "created_at")
     # Filters available in the sidebar
     list_filter = ("featured", "is_approved", "category", "brand")
     # Searchable fields
     search_fields = ("title", "description")
+    # Final price and review summary are maintained automatically
+    readonly_fields = ("final_price", "rating_avg", "review_count", "rating_1_count", "rating_2_count",
+                       "rating_3_count", "rating_4_count", "rating_5_count")
     # Include inline for managing related ProductImage instances
     inlines = [ProductImageInline]
     # Custom admin actions
-    actions = ['approve_products', 'feature_products']
+    actions = ['approve_products', 'feature_products', 'unfeature_products']
+
+    # update() bypasses save signals, so actions refresh the caches themselves
+    def _after_bulk_change(self):
+        bump_generation()
+        FeaturedCollection().schedule_rebuild()
 
     # Action to approve multiple products at once
     def approve_products(self, request, queryset):
         queryset.update(is_approved=True)
+        self._after_bulk_change()
     approve_products.short_description = "Approve selected products"
 
     # Action to mark multiple products as featured
     def feature_products(self, request, queryset):
         queryset.update(featured=True)
+        self._after_bulk_change()
     feature_products.short_description = "Mark selected products as featured"
 
+    # Action to remove products from the featured collection
+    def unfeature_products(self, request, queryset):
+        queryset.update(featured=False)
+        self._after_bulk_change()
+    unfeature_products.short_description = "Remove selected products from featured"
+
 # --------------------------------------
 # Register other models with default admin interface
 # --------------------------------------
 admin.site.register(Category)  # Category model
 admin.site.register(Brand)     # Brand model
 admin.site.register(Tag)       # Tag model
-admin.site.register(Review)    # Review model
\ No newline at end of file
+
+# --------------------------------------
+# Review Admin
+# Keeps product review summaries in sync with admin edits
+# --------------------------------------
+@admin.register(Review)
+class ReviewAdmin(admin.ModelAdmin):
+    list_display = ("product", "user", "rating", "created_at")
+    list_select_related = ("product", "user")
+
+    def save_model(self, request, obj, form, change):
+        old_rating = form.initial.get("rating") if change else None
+        old_product = form.initial.get("product") if change else None
+        super().save_model(request, obj, form, change)
+        if change and old_product != obj.product_id:
+            # Review moved to another product: rebuild both summaries in the background
+            enqueue("catalog.recompute_review_aggregates", product_ids=[old_product, obj.product_id])
+        else:
+            apply_review_delta(obj.product_id, added=obj.rating, removed=old_rating)
+
+    def delete_model(self, request, obj):
+        apply_review_delta(obj.product_id, removed=obj.rating)
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        product_ids = set(queryset.values_list("product_id", flat=True))
+        super().delete_queryset(request, queryset)
+        enqueue("catalog.recompute_review_aggregates", product_ids=sorted(product_ids))
\ No newline at end of file
@@ -0,0 +1,106 @@
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast, Round
+
+from .cache import bump_generation
+from .models import Product, Review
+
+# Histogram column for each star rating
+STAR_FIELDS = {star: f"rating_{star}_count" for star in range(1, 6)}
+
+
+def _star(rating):
+    """
+    Clamp a rating into the 1..5 range used by the histogram.
+    """
+    return min(max(int(rating), 1), 5)
+
+
+def _star_filter(star):
+    """
+    Q object matching reviews counted under `star` (same clamping as _star).
+    """
+    if star == 1:
+        return Q(rating__lte=1)
+    if star == 5:
+        return Q(rating__gte=5)
+    return Q(rating=star)
+
+
+def _average_expression():
+    """
+    SQL expression computing the average rating from the histogram columns.
+    """
+    weighted = sum(F(field) * star for star, field in STAR_FIELDS.items())
+    return Case(
+        When(review_count=0, then=Value(0.0)),
+        default=Round(Cast(weighted, FloatField()) / F("review_count"), 2),
+        output_field=FloatField(),
+    )
+
+
+def apply_review_delta(product_id, added=None, removed=None):
+    """
+    Incrementally update a product's review summary.
+
+    Args:
+        product_id (int): Product whose summary changes.
+        added (int, optional): Rating of a review that was created (or the new rating on update).
+        removed (int, optional): Rating of a review that was deleted (or the old rating on update).
+
+    Counters are adjusted with F() expressions so concurrent reviews never
+    overwrite each other; the average is then derived from the histogram.
+    """
+    deltas = {}
+    count_delta = 0
+    for rating, step in ((added, 1), (removed, -1)):
+        if rating is None:
+            continue
+        field = STAR_FIELDS[_star(rating)]
+        deltas[field] = deltas.get(field, 0) + step
+        count_delta += step
+
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not updates:
+        return  # e.g. a review edited without changing its rating
+    if count_delta:
+        updates["review_count"] = F("review_count") + count_delta
+
+    with transaction.atomic():
+        products = Product.objects.filter(pk=product_id)
+        products.update(**updates)
+        products.update(rating_avg=_average_expression())
+        bump_generation()  # update() sends no save signals
+
+
+def recompute_review_aggregates(product_ids=None):
+    """
+    Rebuild review summaries from the Review table with one grouped query.
+
+    Args:
+        product_ids (iterable, optional): Restrict the rebuild to these products.
+    """
+    reviews = Review.objects.all()
+    products = Product.objects.all()
+    if product_ids is not None:
+        reviews = reviews.filter(product_id__in=product_ids)
+        products = products.filter(pk__in=product_ids)
+
+    stats = {
+        row.pop("product_id"): row
+        for row in reviews.values("product_id").annotate(
+            review_count=Count("id"),
+            **{field: Count("id", filter=_star_filter(star)) for star, field in STAR_FIELDS.items()},
+        )
+    }
+    empty = {"review_count": 0, **{field: 0 for field in STAR_FIELDS.values()}}
+
+    with transaction.atomic():
+        batch = []
+        for product in products.only("id"):
+            for field, value in stats.get(product.pk, empty).items():
+                setattr(product, field, value)
+            batch.append(product)
+        Product.objects.bulk_update(batch, ["review_count", *STAR_FIELDS.values()], batch_size=500)
+        products.update(rating_avg=_average_expression())
+        bump_generation()
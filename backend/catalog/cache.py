@@ -0,0 +1,157 @@
+import hashlib
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+GENERATION_KEY = "catalog:generation"
+
+
+def get_catalog_cache():
+    """
+    Cache used for catalog responses (CATALOG_CACHE_ALIAS, "catalog" by default).
+    """
+    return caches[getattr(settings, "CATALOG_CACHE_ALIAS", "catalog")]
+
+
+# -------------------------------
+# Generation numbers
+# -------------------------------
+# Every cached catalog entry embeds the current generation in its key.
+# Writes bump the generation, which orphans all older entries at once
+# (they simply expire) instead of tracking and deleting individual keys.
+def current_generation():
+    cache = get_catalog_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, timeout=None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation
+
+
+def bump_generation():
+    """
+    Invalidate every cached catalog response.
+    Deferred until the surrounding transaction commits, so readers never
+    cache pre-commit data under the new generation.
+    """
+    def bump():
+        cache = get_catalog_cache()
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:  # key missing or evicted
+            cache.set(GENERATION_KEY, 1, timeout=None)
+    transaction.on_commit(bump)
+
+
+# -------------------------------
+# Product stamps
+# -------------------------------
+# Some writes change a few products without saving them (checkout takes
+# stock with one UPDATE). Bumping the generation for those would empty the
+# whole catalog cache on every sale, so they stamp the products instead:
+# cached entries remember which products they render and when they were
+# built, and are ignored once any of those products was stamped later.
+PRODUCT_STAMP_KEY = "catalog:product:{}:changed"
+
+
+def touch_products(product_ids):
+    """
+    Invalidate cached entries rendering these products, once the
+    surrounding transaction commits.
+    """
+    product_ids = list(product_ids)
+    if not product_ids:
+        return
+
+    def touch():
+        now = time.time()
+        get_catalog_cache().set_many({PRODUCT_STAMP_KEY.format(pk): now for pk in product_ids}, timeout=None)
+    transaction.on_commit(touch)
+
+
+def cache_entry(value, product_ids, built_at):
+    """
+    Wrap a cached value with the products it renders and when it was built
+    (taken before any database read).
+    """
+    return {"value": value, "products": list(product_ids), "built_at": built_at}
+
+
+def entry_value(entry):
+    """
+    Value of a cache_entry(), or None when it is missing or one of its
+    products changed after it was built.
+    """
+    if entry is None:
+        return None
+    if entry["products"]:
+        keys = [PRODUCT_STAMP_KEY.format(pk) for pk in entry["products"]]
+        stamps = get_catalog_cache().get_many(keys).values()
+        if any(stamp >= entry["built_at"] for stamp in stamps):
+            return None
+    return entry["value"]
+
+
+# -------------------------------
+# Response caching
+# -------------------------------
+def response_cache_key(request, generation):
+    """
+    Key a response by generation, API version, host, path and sorted query params.
+    """
+    params = urlencode(sorted((k, v) for k, values in request.query_params.lists() for v in values))
+    version = request.version or getattr(settings, "CATALOG_API_VERSION", "v1")
+    raw = f"{request.scheme}://{request.get_host()}{request.path}?{params}"
+    return f"catalog:response:{generation}:{version}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def cache_public_response(view_method):
+    """
+    Cache the data of successful anonymous GET responses.
+
+    Authenticated requests bypass the cache (they may see unapproved or
+    user-specific data). Hits are served without touching the database.
+    Views list the products a response renders in `served_product_ids`, so
+    touch_products() can drop it without a generation bump.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if request.method != "GET" or request.user.is_authenticated:
+            return view_method(self, request, *args, **kwargs)
+
+        cache = get_catalog_cache()
+        key = response_cache_key(request, current_generation())
+        data = entry_value(cache.get(key))
+        if data is not None:
+            response = Response(data)
+            response["X-Catalog-Cache"] = "hit"
+            return response
+
+        built_at = time.time()
+        self.served_product_ids = []
+        response = view_method(self, request, *args, **kwargs)
+        if response.status_code == 200:
+            entry = cache_entry(response.data, self.served_product_ids, built_at)
+            cache.set(key, entry, timeout=getattr(settings, "CATALOG_CACHE_TIMEOUT", 300))
+            response["X-Catalog-Cache"] = "miss"
+        return response
+    return wrapper
+
+
+class CachedCatalogMixin:
+    """
+    ViewSet mixin caching anonymous list/retrieve responses.
+    """
+
+    @cache_public_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_public_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
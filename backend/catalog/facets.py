@@ -0,0 +1,92 @@
+import hashlib
+from decimal import Decimal
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .cache import current_generation, get_catalog_cache
+from .models import Brand, Category, Tag
+
+# Query params that change pagination or sorting but not the matching set
+NON_FILTER_PARAMS = {"page", "page_size", "cursor", "ordering", "with_total", "format"}
+
+
+def price_bucket_bounds():
+    """
+    Turn CATALOG_PRICE_BUCKETS edges into (min, max) pairs; the last bucket is open-ended.
+    """
+    edges = [Decimal(str(edge)) for edge in getattr(settings, "CATALOG_PRICE_BUCKETS", [0, 50, 100, 250, 500, 1000])]
+    return list(zip(edges, edges[1:] + [None]))
+
+
+def _group_counts(model, relation, product_ids):
+    """
+    One GROUP BY query: how many matching products fall under each `model` row.
+    """
+    rows = (
+        model.objects.filter(**{f"{relation}__in": product_ids})
+        .values("slug", "name")
+        .annotate(count=Count(relation, distinct=True))
+        .order_by("-count", "name")
+    )
+    return list(rows)
+
+
+def compute_facets(queryset):
+    """
+    Facet counts for an already-filtered product queryset.
+
+    Runs one grouped query per dimension (category, brand, tag) plus a single
+    conditional aggregate for the total and every price bucket (by final price).
+    """
+    base = queryset.order_by().prefetch_related(None)
+    product_ids = base.values("pk")
+
+    buckets = price_bucket_bounds()
+    aggregates = {"total": Count("pk")}
+    for index, (low, high) in enumerate(buckets):
+        in_bucket = Q(final_price__gte=low) if high is None else Q(final_price__gte=low, final_price__lt=high)
+        aggregates[f"bucket_{index}"] = Count("pk", filter=in_bucket)
+    totals = base.aggregate(**aggregates)
+
+    return {
+        "total": totals["total"],
+        "categories": _group_counts(Category, "product", product_ids),
+        "brands": _group_counts(Brand, "product", product_ids),
+        "tags": _group_counts(Tag, "products", product_ids),
+        "price_ranges": [
+            {"min": float(low), "max": None if high is None else float(high), "count": totals[f"bucket_{index}"]}
+            for index, (low, high) in enumerate(buckets)
+        ],
+    }
+
+
+def facets_cache_key(request):
+    """
+    Cache key for a filter signature: catalog generation + filter/search params.
+    """
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        if key not in NON_FILTER_PARAMS
+        for value in values
+    )
+    digest = hashlib.md5(urlencode(params).encode()).hexdigest()
+    return f"catalog:facets:{current_generation()}:{digest}"
+
+
+def get_facets(request, build_queryset):
+    """
+    Return cached facets for the request's filters, computing them on a miss.
+
+    `build_queryset` is only called on a miss, so cache hits skip filter
+    validation and search index lookups as well.
+    """
+    cache = get_catalog_cache()
+    key = facets_cache_key(request)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(build_queryset())
+        cache.set(key, facets, timeout=getattr(settings, "CATALOG_CACHE_TIMEOUT", 300))
+    return facets
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .cache import cache_entry, current_generation, entry_value, get_catalog_cache
+from .fieldsets import selected_fields
+from .models import Product
+from .queries import PRODUCT_RELATIONS, with_product_relations
+
+COLLECTION_KEY = "catalog:featured:ids"
+
+
+# -------------------------------
+# Featured collection
+# -------------------------------
+# The homepage's featured list is materialized in the catalog cache in two
+# layers:
+#   1. the ordered ids of every approved, featured product, rebuilt whenever
+#      membership can change (admin actions, featured/is_approved edits);
+#   2. pre-rendered JSON pages, keyed by catalog generation, collection
+#      digest and request URL, and dropped when one of their products is
+#      stamped (catalog.cache.touch_products).
+# A warm request is a single cache read returned as-is, with no
+# serialization and no queries.
+class FeaturedCollection:
+    """
+    Materialized, paginated list of featured products.
+    """
+    page_size = getattr(settings, "CATALOG_FEATURED_PAGE_SIZE", 12)
+    max_page_size = 100
+    page_query_param = "page"
+    page_size_query_param = "page_size"
+
+    def __init__(self):
+        self.cache = get_catalog_cache()
+
+    # Membership -----------------------------------------------------------
+
+    def queryset(self):
+        """
+        Products that belong to the collection, in display order.
+        """
+        return Product.objects.filter(featured=True, is_approved=True).order_by("-created_at", "-id")
+
+    def rebuild(self):
+        """
+        Recompute the collection's ids and store them (without expiry).
+        Returns the stored {"digest", "ids"} entry.
+        """
+        ids = list(self.queryset().values_list("pk", flat=True))
+        entry = {"digest": hashlib.md5(json.dumps(ids).encode()).hexdigest()[:12], "ids": ids}
+        self.cache.set(COLLECTION_KEY, entry, timeout=None)
+        return entry
+
+    def schedule_rebuild(self):
+        """
+        Rebuild once the current transaction commits.
+        """
+        transaction.on_commit(self.rebuild)
+
+    def collection(self):
+        entry = self.cache.get(COLLECTION_KEY)
+        if entry is None:
+            entry = self.rebuild()
+        return entry
+
+    # Pages ----------------------------------------------------------------
+
+    def get_page_number(self, request):
+        try:
+            number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            raise NotFound("Invalid page.")
+        if number < 1:
+            raise NotFound("Invalid page.")
+        return number
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def page_cache_key(self, request, digest):
+        """
+        Key a rendered page by generation, collection digest and the full URL
+        (host, page, page_size and ?fields=/?omit=/?expand= all change the body).
+        """
+        params = urlencode(sorted((k, v) for k, values in request.query_params.lists() for v in values))
+        raw = f"{request.scheme}://{request.get_host()}{request.path}?{params}"
+        version = request.version or getattr(settings, "CATALOG_API_VERSION", "v1")
+        return (
+            f"catalog:featured:page:{current_generation()}:{version}:{digest}:"
+            f"{hashlib.md5(raw.encode()).hexdigest()}"
+        )
+
+    def page_ids(self, ids, number, size):
+        return ids[(number - 1) * size:number * size]
+
+    def render_page(self, request, ids, number, size, serializer_class, context):
+        """
+        Serialize one page of the collection to JSON bytes.
+        """
+        window = self.page_ids(ids, number, size)
+        if not window and number > 1:
+            raise NotFound("Invalid page.")
+        relations = selected_fields(request, (), PRODUCT_RELATIONS)
+        products = with_product_relations(Product.objects.filter(pk__in=window), fields=relations)
+        by_id = {product.pk: product for product in products}
+        ordered = [by_id[pk] for pk in window if pk in by_id]
+
+        url = request.build_absolute_uri()
+        previous_link = None
+        if number > 1:
+            previous_link = replace_query_param(url, self.page_query_param, number - 1)
+            if number == 2:
+                previous_link = remove_query_param(url, self.page_query_param)
+        next_link = None
+        if number * size < len(ids):
+            next_link = replace_query_param(url, self.page_query_param, number + 1)
+
+        body = {
+            "count": len(ids),
+            "next": next_link,
+            "previous": previous_link,
+            "results": serializer_class(ordered, many=True, context=context).data,
+        }
+        return JSONRenderer().render(body)
+
+    def response(self, request, serializer_class, context):
+        """
+        HttpResponse with the requested page, rendered on a cache miss only.
+        """
+        number = self.get_page_number(request)
+        size = self.get_page_size(request)
+        entry = self.collection()
+        key = self.page_cache_key(request, entry["digest"])
+        content = entry_value(self.cache.get(key))
+        status = "hit"
+        if content is None:
+            built_at = time.time()
+            content = self.render_page(request, entry["ids"], number, size, serializer_class, context)
+            page = cache_entry(content, self.page_ids(entry["ids"], number, size), built_at)
+            self.cache.set(key, page, timeout=getattr(settings, "CATALOG_CACHE_TIMEOUT", 300))
+            status = "miss"
+        response = HttpResponse(content, content_type="application/json")
+        response["X-Catalog-Cache"] = status
+        return response
@@ -0,0 +1,134 @@
+"""
+Sparse fieldsets and expansion for API serializers.
+
+Clients shape responses with three query parameters, using dots to reach
+into nested objects:
+
+    ?fields=id,title,images            only these fields
+    ?fields=id,quantity,product.title  ...also inside nested serializers
+    ?omit=description,product.images   everything except these
+    ?expand=seller,items.product       swap a compact field for a nested object
+
+Views use `selected_fields()` to skip prefetching relations that will not
+be rendered, so trimmed responses are cheaper to build as well as to send.
+"""
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDSET_PARAMS = ("fields", "omit", "expand")
+
+
+def parse_fieldset(value):
+    """
+    Turn "id,product.title,product.images" into a nested dict tree:
+    {"id": {}, "product": {"title": {}, "images": {}}}
+    """
+    tree = {}
+    for item in (value or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        node = tree
+        for part in item.split("."):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def request_fieldsets(request):
+    """
+    Parsed fields/omit/expand trees for a request (cached on the request).
+    """
+    cached = getattr(request, "_fieldsets", None)
+    if cached is None:
+        params = getattr(request, "query_params", request.GET)
+        cached = {name: parse_fieldset(params.get(name)) for name in FIELDSET_PARAMS}
+        request._fieldsets = cached
+    return cached
+
+
+def _node(tree, path):
+    """
+    Walk `tree` along `path`; None when the path is not mentioned.
+    """
+    for part in path:
+        if part not in tree:
+            return None
+        tree = tree[part]
+    return tree
+
+
+def selected_fields(request, path, names):
+    """
+    Filter `names` down to those the request wants rendered at `path`.
+
+    Args:
+        request: The current request. None, or a write request, selects everything.
+        path (tuple): Location of the serializer, e.g. () or ("product",).
+        names (iterable): Candidate field names.
+    """
+    names = list(names)
+    if request is None or request.method not in SAFE_METHODS:
+        return names
+    fieldsets = request_fieldsets(request)
+
+    # A parent excluded by ?fields= or ?omit= takes its children with it
+    for depth in range(len(path)):
+        parent, name = path[:depth], path[depth]
+        include = _node(fieldsets["fields"], parent)
+        if include and name not in include:
+            return []
+        omitted = _node(fieldsets["omit"], parent)
+        if omitted and name in omitted and not omitted[name]:
+            return []
+
+    include = _node(fieldsets["fields"], path)
+    if include:
+        names = [name for name in names if name in include]
+    omitted = _node(fieldsets["omit"], path) or {}
+    return [name for name in names if name not in omitted or omitted[name]]
+
+
+def expanded_fields(request, path):
+    """
+    Names the request asked to expand at `path`.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return set()
+    return set(_node(request_fieldsets(request)["expand"], path) or {})
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin honouring ?fields=, ?omit= and ?expand= on read requests.
+
+    Expandable fields are declared on Meta as a mapping of field name to a
+    zero-argument factory returning the expanded field, e.g.
+
+        expandable_fields = {"seller": lambda: SellerSerializer(read_only=True)}
+    """
+
+    def field_path(self):
+        """
+        Dotted location of this serializer inside the root serializer, as a tuple.
+        """
+        path, node = [], self
+        while node.parent is not None:
+            if node.field_name:
+                path.append(node.field_name)
+            node = node.parent
+        return tuple(reversed(path))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        if request is None:
+            return fields
+
+        # Writes are never shaped: selected_fields/expanded_fields ignore them
+        path = self.field_path()
+        expandable = getattr(self.Meta, "expandable_fields", {})
+        for name in expanded_fields(request, path):
+            if name in expandable:
+                fields[name] = expandable[name]()
+
+        keep = set(selected_fields(request, path, fields))
+        return {name: field for name, field in fields.items() if name in keep}
@@ -0,0 +1,137 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .cache import bump_generation
+from .imaging import render_variants, supported_formats
+from .models import ProductImage
+from tasks.queue import enqueue
+
+logger = logging.getLogger(__name__)
+
+_process_pool = None
+
+
+# -------------------------------
+# Configuration
+# -------------------------------
+def variant_sizes():
+    """
+    Variant name -> longest edge (CATALOG_IMAGE_VARIANTS).
+    """
+    return getattr(settings, "CATALOG_IMAGE_VARIANTS", {"thumb": 300, "card": 600, "large": 1200})
+
+
+def variant_formats():
+    """
+    Output formats (CATALOG_IMAGE_FORMATS) this Pillow build can encode.
+    """
+    return supported_formats(getattr(settings, "CATALOG_IMAGE_FORMATS", ["webp", "avif"]))
+
+
+def variant_path(image, name, fmt):
+    """
+    Storage path of one derivative, e.g. products/variants/42/thumb.webp.
+    """
+    return f"products/variants/{image.pk}/{name}.{fmt}"
+
+
+def get_process_pool():
+    """
+    Shared process pool for CPU-bound encoding, in the task worker or the
+    backfill command. Uses the spawn start method so encoders never inherit
+    the parent's threads or DB connections.
+    """
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=getattr(settings, "CATALOG_IMAGE_WORKERS", 2),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_pool
+
+
+def _reset_process_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+    _process_pool = None
+
+
+# -------------------------------
+# Pipeline
+# -------------------------------
+def generate_variants(images):
+    """
+    Render and store every variant for the given ProductImage instances.
+
+    Encoding runs in the process pool; files are written through the default
+    storage and the `variants` map is saved with one bulk_update.
+    Returns the number of images processed successfully.
+    """
+    sizes, formats = variant_sizes(), variant_formats()
+    quality = getattr(settings, "CATALOG_IMAGE_QUALITY", 80)
+    pool = get_process_pool()
+
+    futures = []
+    for image in images:
+        try:
+            with image.image.open("rb") as source:
+                futures.append((image, pool.submit(render_variants, source.read(), sizes, formats, quality)))
+        except (OSError, ValueError) as exc:
+            logger.warning("Cannot read ProductImage %s: %s", image.pk, exc)
+
+    done = []
+    for image, future in futures:
+        try:
+            rendered = future.result()
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool next time
+            _reset_process_pool()
+            logger.warning("Image worker pool crashed while rendering ProductImage %s", image.pk)
+            continue
+        except Exception as exc:  # corrupt or unsupported upload
+            logger.warning("Cannot render variants for ProductImage %s: %s", image.pk, exc)
+            continue
+        variants = {}
+        for name, variant in rendered.items():
+            files = {}
+            for fmt, content in variant["files"].items():
+                path = variant_path(image, name, fmt)
+                if default_storage.exists(path):
+                    default_storage.delete(path)
+                files[fmt] = default_storage.save(path, ContentFile(content))
+            variants[name] = {"width": variant["width"], "height": variant["height"], "files": files}
+        image.variants = variants
+        done.append(image)
+
+    ProductImage.objects.bulk_update(done, ["variants"])
+    if done:
+        bump_generation()  # bulk_update() sends no save signals; srcsets changed
+    return len(done)
+
+
+def schedule_variants(image_ids):
+    """
+    Queue variant generation for these images (catalog.generate_image_variants).
+
+    The task row commits with the upload and the task worker does the
+    rendering, so nothing CPU-bound runs in the web process.
+    """
+    image_ids = list(image_ids)
+    if image_ids:
+        enqueue("catalog.generate_image_variants", image_ids=image_ids)
+
+
+def delete_variants(image):
+    """
+    Remove the derivative files of a ProductImage.
+    """
+    for variant in (image.variants or {}).values():
+        for path in variant.get("files", {}).values():
+            default_storage.delete(path)
@@ -0,0 +1,53 @@
+"""
+Pure Pillow helpers for rendering product image variants.
+
+Nothing here imports Django, so these functions can run inside spawned
+worker processes (see catalog.images) without configuring the app registry.
+"""
+from io import BytesIO
+
+from PIL import Image, ImageOps, features
+
+# Pillow save() format name for each output extension
+PIL_FORMATS = {"webp": "WEBP", "avif": "AVIF", "jpg": "JPEG"}
+
+
+def supported_formats(formats):
+    """
+    Keep only the output formats this Pillow build can encode.
+    """
+    return [fmt for fmt in formats if fmt == "jpg" or features.check(fmt)]
+
+
+def render_variants(source, sizes, formats, quality=80):
+    """
+    Render resized copies of one image.
+
+    Args:
+        source (bytes): Original image file contents.
+        sizes (dict): Variant name -> longest edge in pixels, e.g. {"thumb": 300}.
+        formats (list): Output extensions, e.g. ["webp", "avif"].
+        quality (int): Encoder quality for lossy formats.
+
+    Returns:
+        dict: {name: {"width": w, "height": h, "files": {fmt: bytes}}}
+
+    Images are never upscaled; EXIF orientation is applied first.
+    """
+    with Image.open(BytesIO(source)) as original:
+        original = ImageOps.exif_transpose(original)
+        has_alpha = original.mode in ("RGBA", "LA") or "transparency" in original.info
+        original = original.convert("RGBA" if has_alpha else "RGB")
+
+        rendered = {}
+        for name, edge in sizes.items():
+            image = original.copy()
+            image.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+            files = {}
+            for fmt in formats:
+                frame = image.convert("RGB") if fmt == "jpg" else image
+                buffer = BytesIO()
+                frame.save(buffer, PIL_FORMATS[fmt], quality=quality)
+                files[fmt] = buffer.getvalue()
+            rendered[name] = {"width": image.width, "height": image.height, "files": files}
+        return rendered
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from catalog.images import generate_variants
+from catalog.models import ProductImage
+
+
+class Command(BaseCommand):
+    """
+    Backfill resized WebP/AVIF variants for existing product images.
+
+    Usage:
+        python manage.py generate_image_variants --batch-size 50
+        python manage.py generate_image_variants --force   # re-render everything
+    """
+    help = "Generate thumbnail and WebP/AVIF variants for product images in bulk."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50, help="Images rendered per batch.")
+        parser.add_argument("--force", action="store_true", help="Re-render images that already have variants.")
+
+    def handle(self, *args, **options):
+        images = ProductImage.objects.order_by("pk")
+        if not options["force"]:
+            images = images.filter(variants={})
+
+        batch_size = options["batch_size"]
+        processed = total = 0
+        last_pk = 0
+        while True:
+            # Page by primary key so rows updated in earlier batches are not re-read
+            batch = list(images.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            total += len(batch)
+            processed += generate_variants(batch)
+            self.stdout.write(f"Processed {processed}/{total} images...")
+
+        self.stdout.write(self.style.SUCCESS(f"Generated variants for {processed} of {total} images."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from catalog.search import get_search_backend
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the product search index from scratch.
+
+    Usage:
+        python manage.py reindex_products --batch-size 1000
+    """
+    help = "Rebuild the product full-text search index in bulk batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Products indexed per batch.")
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        total = backend.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} products with {type(backend).__name__}."))
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:11
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_review_summary(apps, schema_editor):
+    """
+    Populate the review summary columns from existing reviews.
+    """
+    Product = apps.get_model("catalog", "Product")
+    Review = apps.get_model("catalog", "Review")
+    star_filters = {
+        "rating_1_count": Q(rating__lte=1),
+        "rating_2_count": Q(rating=2),
+        "rating_3_count": Q(rating=3),
+        "rating_4_count": Q(rating=4),
+        "rating_5_count": Q(rating__gte=5),
+    }
+    rows = Review.objects.values("product_id").annotate(
+        review_count=Count("id"),
+        **{field: Count("id", filter=q) for field, q in star_filters.items()},
+    )
+    for row in rows:
+        product_id = row.pop("product_id")
+        weighted = sum(row[f"rating_{star}_count"] * star for star in range(1, 6))
+        row["rating_avg"] = round(weighted / row["review_count"], 2)
+        Product.objects.filter(pk=product_id).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0003_product_is_approved_product_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_avg',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-rating_avg', '-review_count'], name='product_rating_idx'),
+        ),
+        migrations.RunPython(backfill_review_summary, migrations.RunPython.noop),
+    ]
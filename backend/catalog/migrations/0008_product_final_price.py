@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:18
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+
+
+def backfill_final_price(apps, schema_editor):
+    """
+    Compute final_price for existing products (same rule as catalog.models.compute_final_price).
+    """
+    Product = apps.get_model("catalog", "Product")
+    batch = []
+    for product in Product.objects.only("id", "price", "discount_percent").iterator(chunk_size=1000):
+        discount = min(product.discount_percent or 0, 100)
+        product.final_price = (product.price * (100 - discount) / 100).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        batch.append(product)
+        if len(batch) >= 1000:
+            Product.objects.bulk_update(batch, ["final_price"])
+            batch = []
+    Product.objects.bulk_update(batch, ["final_price"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0007_productimage_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='final_price',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.RunPython(backfill_final_price, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,18 @@
+from decimal import Decimal, ROUND_HALF_UP
+
 from django.db import models
 from django.contrib.auth.models import User
 
+
+def compute_final_price(price, discount_percent):
+    """
+    Price after discount, in Decimal, rounded half-up to cents.
+    Discounts above 100% are treated as 100% (free) rather than negative.
+    """
+    discount = min(discount_percent or 0, 100)
+    return (Decimal(price) * (100 - discount) / 100).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
 # -------------------------------
 # Category model
 # -------------------------------
@@ -45,21 +57,60 @@ class Product(models.Model):
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
     brand = models.ForeignKey(Brand, on_delete=models.SET_NULL, null=True, blank=True)
     discount_percent = models.PositiveIntegerField(default=0)  # Discount percentage
+    # Price customers pay, derived from price/discount_percent on save(); stored so
+    # price sorts and range filters run (indexed) in SQL. QuerySet.update() skips
+    # save(), so bulk price/discount changes must set final_price themselves.
+    final_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, db_index=True, editable=False)
     featured = models.BooleanField(default=False)  # Flag for featured products
     is_approved = models.BooleanField(default=True)  # Admin approval flag
     created_at = models.DateTimeField(auto_now_add=True)  # Automatically set on creation
     updated_at = models.DateTimeField(auto_now=True)      # Automatically set on update
     tags = models.ManyToManyField(Tag, blank=True, related_name="products")  # Many-to-many relationship
 
+    # Denormalized review summary, maintained by catalog.aggregates
+    rating_avg = models.FloatField(default=0)               # Average star rating (0 when unrated)
+    review_count = models.PositiveIntegerField(default=0)   # Number of reviews
+    rating_1_count = models.PositiveIntegerField(default=0)  # Per-star histogram
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Supports ordering=-rating_avg without sorting the whole table
+            models.Index(fields=["-rating_avg", "-review_count"], name="product_rating_idx"),
+            # Keyset pagination order (see catalog.pagination)
+            models.Index(fields=["-created_at", "-id"], name="product_created_idx"),
+        ]
+
     def __str__(self):
         return self.title  # Human-readable representation
 
+    def save(self, *args, **kwargs):
+        # Keep the stored final price in step with price and discount
+        self.final_price = compute_final_price(self.price, self.discount_percent)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"price", "discount_percent"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "final_price"}
+        super().save(*args, **kwargs)
+
+    @property
+    def rating_histogram(self):
+        """
+        Review counts per star, e.g. {"1": 0, ..., "5": 12}.
+        """
+        return {str(star): getattr(self, f"rating_{star}_count") for star in range(1, 6)}
+
 # -------------------------------
 # ProductImage model
 # -------------------------------
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="products/")  # Stores images under media/products/
+    # Resized WebP/AVIF derivatives, filled in by catalog.images:
+    # {"thumb": {"width": 300, "height": 225, "files": {"webp": "products/variants/..."}}}
+    variants = models.JSONField(default=dict, blank=True, editable=False)
 
 # -------------------------------
 # Review model
@@ -74,6 +125,10 @@ class Review(models.Model):
     class Meta:
         # Ensures a user can review a product only once
         unique_together = ("product", "user")
+        indexes = [
+            # Keyset pagination of a product's reviews
+            models.Index(fields=["product", "-created_at", "-id"], name="review_product_created_idx"),
+        ]
 
     def __str__(self):
         return f"Review({self.product_id}, {self.user_id})"  # Debug-friendly string
@@ -89,6 +144,10 @@ class Wishlist(models.Model):
     class Meta:
         # Ensures a user cannot add the same product multiple times
         unique_together = ("user", "product")
+        indexes = [
+            # Keyset pagination of a user's wishlist
+            models.Index(fields=["user", "-created_at", "-id"], name="wishlist_user_created_idx"),
+        ]
 
     def __str__(self):
         return f"Wishlist({self.user.username}, {self.product.title})"  # Debug-friendly string
\ No newline at end of file
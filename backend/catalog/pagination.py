@@ -0,0 +1,150 @@
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# -------------------------------
+# Keyset (cursor) pagination
+# -------------------------------
+class KeysetPagination(BasePagination):
+    """
+    Constant-cost pagination over ("-created_at", "-id").
+
+    Each page is fetched with a WHERE clause on the last row seen instead of
+    OFFSET, and no COUNT(*) is run, so page 1000 costs the same as page 1.
+    Cursors are opaque base64 tokens passed back via `?cursor=`.
+
+    Compatibility:
+        - Requests with `?page=` (or a queryset ordered differently, e.g. by
+          `?ordering=` or search relevance) fall back to PageNumberPagination.
+        - `count` is omitted unless the viewset sets `pagination_include_total`
+          or the client passes `?with_total=1`; it is then a cached, possibly
+          slightly stale, total.
+    """
+    page_size = settings.REST_FRAMEWORK.get("PAGE_SIZE", 12)
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    total_query_param = "with_total"
+    ordering = ("-created_at", "-id")
+    fallback_class = PageNumberPagination
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.fallback = None
+        if "page" in request.query_params or tuple(queryset.query.order_by) != self.ordering:
+            self.fallback = self.fallback_class()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.base_url = remove_query_param(request.build_absolute_uri(), "page")
+        self.total = self.get_total(queryset, request, view)
+        size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        if cursor is None:
+            rows = list(queryset[:size + 1])
+            self.has_next, self.has_previous = len(rows) > size, False
+            rows = rows[:size]
+        elif cursor["reverse"]:
+            # Walk backwards from the cursor, then restore display order
+            after = Q(created_at__gt=cursor["created_at"]) | Q(created_at=cursor["created_at"], id__gt=cursor["id"])
+            rows = list(queryset.filter(after).order_by("created_at", "id")[:size + 1])
+            self.has_next, self.has_previous = True, len(rows) > size
+            rows = rows[:size][::-1]
+        else:
+            before = Q(created_at__lt=cursor["created_at"]) | Q(created_at=cursor["created_at"], id__lt=cursor["id"])
+            rows = list(queryset.filter(before)[:size + 1])
+            self.has_next, self.has_previous = len(rows) > size, True
+            rows = rows[:size]
+
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_total(self, queryset, request, view):
+        """
+        Approximate total, cached per query (SQL and parameters) for
+        KEYSET_TOTAL_CACHE_SECONDS in the KEYSET_TOTAL_CACHE_ALIAS cache.
+        """
+        wanted = getattr(view, "pagination_include_total", False) or request.query_params.get(self.total_query_param) in ("1", "true")
+        if not wanted:
+            return None
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:  # e.g. .none(), or a filter that can never match
+            return 0
+        key = "keyset-total:" + hashlib.md5(repr((sql, params)).encode()).hexdigest()
+        timeout = getattr(settings, "KEYSET_TOTAL_CACHE_SECONDS", 60)
+        cache = caches[getattr(settings, "KEYSET_TOTAL_CACHE_ALIAS", "default")]
+        return cache.get_or_set(key, queryset.count, timeout)
+
+    # Cursor encoding ------------------------------------------------------
+
+    def encode_cursor(self, obj, reverse):
+        payload = json.dumps([obj.created_at.isoformat(), obj.pk, int(reverse)], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            created_at, pk, reverse = json.loads(raw)
+            created_at = parse_datetime(created_at)
+            if created_at is None:
+                raise ValueError
+            return {"created_at": created_at, "id": int(pk), "reverse": bool(reverse)}
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.page[-1], False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.page[0], True))
+
+    # Responses ------------------------------------------------------------
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        body = {"next": self.get_next_link(), "previous": self.get_previous_link(), "results": data}
+        if self.total is not None:
+            body = {"count": self.total, **body}
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {"type": "integer", "description": "Approximate total (only with with_total)."},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -0,0 +1,107 @@
+import logging
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------
+# Product relation plan
+# -------------------------------
+# Maps each relation rendered by ProductSerializer to the way it is loaded:
+# - "select": joined into the main query (forward FK / one-to-one)
+# - "prefetch": loaded in one extra query for the whole page
+# Each entry is a callable so the lookups can be re-rooted under a prefix
+# (e.g. "product__" when products are nested inside cart items).
+PRODUCT_RELATIONS = {
+    "seller": ("select", lambda prefix: f"{prefix}seller"),
+    "category": ("select", lambda prefix: f"{prefix}category"),
+    "brand": ("select", lambda prefix: f"{prefix}brand"),
+    "tags": ("prefetch", lambda prefix: f"{prefix}tags"),
+    "images": ("prefetch", lambda prefix: f"{prefix}images"),
+}
+
+
+def with_product_relations(queryset, fields=None, prefix=""):
+    """
+    Attach select_related / prefetch_related lookups for product relations.
+
+    Args:
+        queryset: A queryset of Product (or of a model pointing at Product).
+        fields: Optional iterable of relation names to load. Defaults to all.
+        prefix: Lookup prefix when products are reached through a relation.
+
+    Every relation costs either nothing (joined) or exactly one query,
+    independent of how many products are on the page.
+    """
+    names = PRODUCT_RELATIONS.keys() if fields is None else [f for f in fields if f in PRODUCT_RELATIONS]
+    selects, prefetches = [], []
+    for name in names:
+        kind, lookup = PRODUCT_RELATIONS[name]
+        (selects if kind == "select" else prefetches).append(lookup(prefix))
+    if selects:
+        queryset = queryset.select_related(*selects)
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+    return queryset
+
+
+# -------------------------------
+# Query budgets
+# -------------------------------
+@contextmanager
+def count_queries():
+    """
+    Count SQL statements executed on the default connection inside the block.
+    Works with DEBUG off, unlike connection.queries.
+    """
+    counter = {"count": 0}
+
+    def wrapper(execute, sql, params, many, context):
+        counter["count"] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield counter
+
+
+class QueryBudgetMixin:
+    """
+    ViewSet mixin that enforces a per-action ceiling on SQL queries.
+
+    Set `query_budgets = {"list": 5, ...}` on the viewset. Queries are counted
+    from after authentication/permission checks until the response is
+    finalized, so the budget covers the view's own work only. Actions without
+    a budget are not measured. Over-budget actions log a warning, or raise an
+    AssertionError when QUERY_BUDGET_STRICT is enabled (useful in CI).
+    """
+    query_budgets = {}
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._query_budget = self.query_budgets.get(self.action)
+        if self._query_budget is not None and getattr(settings, "QUERY_BUDGET_ENABLED", settings.DEBUG):
+            self._query_counter_cm = count_queries()
+            self._query_counter = self._query_counter_cm.__enter__()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        cm = getattr(self, "_query_counter_cm", None)
+        if cm is None:
+            return response
+        cm.__exit__(None, None, None)
+        self._query_counter_cm = None
+
+        count, budget = self._query_counter["count"], self._query_budget
+        response["X-Query-Count"] = str(count)
+        if count > budget:
+            message = (
+                f"{type(self).__name__}.{self.action} ran {count} queries "
+                f"(budget {budget}) for {request.get_full_path()}"
+            )
+            if getattr(settings, "QUERY_BUDGET_STRICT", False):
+                raise AssertionError(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,221 @@
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Expression, F, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Product
+
+# Words longer than this are truncated; more terms than this are ignored
+MAX_TERM_LENGTH = 64
+MAX_TERMS = 10
+
+
+def tokenize(query):
+    """
+    Split a user query into lowercase word terms, dropping any search syntax.
+    """
+    return [term[:MAX_TERM_LENGTH] for term in re.findall(r"\w+", query.lower())][:MAX_TERMS]
+
+
+# -------------------------------
+# Backend interface
+# -------------------------------
+class SearchBackend:
+    """
+    Pluggable product search backend.
+
+    Subclasses keep their index in sync through index_products/remove_products
+    (called from catalog.signals) and answer queries via filter_queryset,
+    which must return the matching products ordered by relevance.
+    """
+
+    def index_products(self, products):
+        """
+        Add or replace index entries for the given Product instances.
+        """
+        raise NotImplementedError
+
+    def remove_products(self, product_ids):
+        """
+        Drop index entries for the given product ids.
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        """
+        Remove every entry from the index.
+        """
+        raise NotImplementedError
+
+    def filter_queryset(self, queryset, query):
+        """
+        Restrict `queryset` to products matching `query`, best matches first.
+        """
+        raise NotImplementedError
+
+    def rebuild(self, batch_size=500):
+        """
+        Rebuild the whole index from the Product table in bulk batches.
+        Returns the number of products indexed.
+        """
+        total = 0
+        with transaction.atomic():
+            self.clear()
+            batch = []
+            products = Product.objects.only("id", "title", "description").order_by("pk")
+            for product in products.iterator(chunk_size=batch_size):
+                batch.append(product)
+                if len(batch) >= batch_size:
+                    self.index_products(batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                self.index_products(batch)
+                total += len(batch)
+        return total
+
+
+# -------------------------------
+# SQLite FTS5 backend (default)
+# -------------------------------
+class SQLiteFTS5Backend(SearchBackend):
+    """
+    Full-text index stored in an SQLite FTS5 virtual table.
+
+    The table (created by migration catalog.0005) uses the product id as its
+    rowid, so matches map straight back to Product primary keys. Every match
+    is kept and ranked in SQL with bm25, weighting title hits above
+    description hits, so counts and pagination see the full result set.
+    """
+    table = "catalog_product_fts"
+    title_weight = 10.0
+    description_weight = 1.0
+
+    def index_products(self, products):
+        rows = [(p.pk, p.title, p.description) for p in products]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(row[0],) for row in rows])
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, title, description) VALUES (%s, %s, %s)", rows
+            )
+
+    def remove_products(self, product_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(pk,) for pk in product_ids])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+
+    def match_expression(self, query):
+        """
+        Build an FTS5 MATCH expression: every term must match, as a prefix.
+        """
+        return " ".join(f'"{term}"*' for term in tokenize(query))
+
+    def filter_queryset(self, queryset, query):
+        match = self.match_expression(query)
+        if not match:
+            return queryset.none()
+        matches = RawSQL(f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", [match])
+        queryset = queryset.filter(pk__in=matches)
+        # bm25 is lower for better matches
+        return queryset.annotate(search_rank=FTS5Rank(self, match)).order_by("search_rank", "-id")
+
+
+class FTS5Rank(Expression):
+    """
+    bm25 score of each product row for an FTS5 match expression: a
+    correlated lookup on the index by rowid, so it stays valid when the
+    product query is nested (e.g. as a facets or count subquery).
+    """
+    output_field = FloatField()
+
+    def __init__(self, backend, match, pk=None):
+        super().__init__()
+        self.backend, self.match = backend, match
+        self.pk = pk if pk is not None else F("pk")
+
+    def get_source_expressions(self):
+        return [self.pk]
+
+    def set_source_expressions(self, exprs):
+        (self.pk,) = exprs
+
+    def as_sql(self, compiler, connection):
+        pk_sql, pk_params = compiler.compile(self.pk)
+        table = self.backend.table
+        sql = f"(SELECT bm25({table}, %s, %s) FROM {table} WHERE {table} MATCH %s AND {table}.rowid = {pk_sql})"
+        return sql, [self.backend.title_weight, self.backend.description_weight, self.match, *pk_params]
+
+
+# -------------------------------
+# Plain database backend (fallback)
+# -------------------------------
+class DatabaseSearchBackend(SearchBackend):
+    """
+    Index-free fallback using icontains lookups, for databases without FTS5.
+    It does not rank: matches keep the queryset's ordering.
+    """
+    fields = ("title", "description")
+
+    def index_products(self, products):
+        pass
+
+    def remove_products(self, product_ids):
+        pass
+
+    def clear(self):
+        pass
+
+    def rebuild(self, batch_size=500):
+        return 0
+
+    def filter_queryset(self, queryset, query):
+        terms = tokenize(query)
+        if not terms:
+            return queryset.none()
+        for term in terms:
+            matches = Q()
+            for field in self.fields:
+                matches |= Q(**{f"{field}__icontains": term})
+            queryset = queryset.filter(matches)
+        return queryset
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    """
+    Return the configured search backend instance (CATALOG_SEARCH_BACKEND).
+    Without one, the backend follows the database: FTS5 on SQLite (where
+    migration catalog.0005 creates the index), the plain backend elsewhere.
+    """
+    path = getattr(settings, "CATALOG_SEARCH_BACKEND", None)
+    if not path:
+        path = "catalog.search.SQLiteFTS5Backend" if connection.vendor == "sqlite" else "catalog.search.DatabaseSearchBackend"
+    return import_string(path)()
+
+
+# -------------------------------
+# DRF filter backend
+# -------------------------------
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Drop-in replacement for SearchFilter that queries the search index.
+    Uses the same `?search=` parameter; the FTS5 backend ranks results by relevance
+    unless the client also asks for an explicit `?ordering=`.
+    """
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "").strip()
+        if not query:
+            return queryset
+        return get_search_backend().filter_queryset(queryset, query)
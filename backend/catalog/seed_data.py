@@ -2,6 +2,7 @@ import random
 from faker import Faker
 from django.contrib.auth.models import User
 from catalog.models import Product, Review
+from catalog.aggregates import recompute_review_aggregates
 
 faker = Faker()  # Faker instance for generating fake data
 
@@ -46,4 +47,7 @@ def seed_reviews(n_per_product=3):
                 comment=faker.sentence(nb_words=12),  # Generate a fake comment
             )
 
+    # Reviews were inserted directly, so rebuild the denormalized summaries once
+    recompute_review_aggregates()
+
     print("✅ Fake reviews created successfully.")
\ No newline at end of file
@@ -1,13 +1,15 @@
 from rest_framework import serializers
 from .models import Category, Brand, Tag, Product, ProductImage, Review, Wishlist
+from .fieldsets import SparseFieldsetMixin
 from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
 
 # -------------------------------
 # Category Serializer
 # -------------------------------
 # Simple serializer for Category model.
 # Exposes: id, name, slug
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ["id", "name", "slug"]
@@ -18,7 +20,7 @@ class CategorySerializer(serializers.ModelSerializer):
 # -------------------------------
 # Simple serializer for Brand model.
 # Exposes: id, name, slug
-class BrandSerializer(serializers.ModelSerializer):
+class BrandSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Brand
         fields = ["id", "name", "slug"]
@@ -29,7 +31,7 @@ class BrandSerializer(serializers.ModelSerializer):
 # -------------------------------
 # Simple serializer for Tag model.
 # Exposes: id, name, slug
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ["id", "name", "slug"]
@@ -40,25 +42,42 @@ class TagSerializer(serializers.ModelSerializer):
 # -------------------------------
 # Handles ProductImage model.
 # Converts the image field to an absolute URL for frontend consumption.
-class ProductImageSerializer(serializers.ModelSerializer):
+# `srcset` maps each resized variant to its per-format URLs, e.g.
+# {"thumb": {"width": 300, "height": 225, "webp": "...", "avif": "..."}};
+# it is empty until the variants have been generated.
+class ProductImageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     image = serializers.SerializerMethodField()  # custom method to return absolute URL
+    srcset = serializers.SerializerMethodField()  # resized WebP/AVIF variants
 
     class Meta:
         model = ProductImage
-        fields = ["id", "image"]
+        fields = ["id", "image", "srcset"]
 
-    def get_image(self, obj):
+    def _absolute(self, url):
         request = self.context.get("request")  # access request context for building full URL
         if request:
-            return request.build_absolute_uri(obj.image.url)
-        return obj.image.url
+            return request.build_absolute_uri(url)
+        return url
+
+    def get_image(self, obj):
+        return self._absolute(obj.image.url)
+
+    def get_srcset(self, obj):
+        return {
+            name: {
+                "width": variant["width"],
+                "height": variant["height"],
+                **{fmt: self._absolute(default_storage.url(path)) for fmt, path in variant["files"].items()},
+            }
+            for name, variant in (obj.variants or {}).items()
+        }
 
 
 # -------------------------------
 # User Serializer
 # -------------------------------
 # Exposes basic user info along with the avatar from related Profile.
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     avatar = serializers.ImageField(source='profile.avatar', read_only=True)  # fetch avatar from related profile
 
     class Meta:
@@ -66,27 +85,45 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'avatar']
 
 
+# -------------------------------
+# Seller Serializer
+# -------------------------------
+# Compact public view of a product's seller, used by ?expand=seller.
+class SellerSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ["id", "username"]
+
+
 # -------------------------------
 # Review Serializer
 # -------------------------------
 # Nested serializer to include the user who submitted the review.
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)  # read-only nested user info
 
     class Meta:
         model = Review
         fields = ["id", "user", "rating", "comment", "created_at"]
 
+    # Ratings feed the per-star histogram, so keep them in range
+    def validate_rating(self, value):
+        if not 1 <= value <= 5:
+            raise serializers.ValidationError("Rating must be between 1 and 5.")
+        return value
+
 
 # -------------------------------
 # Product Serializer
 # -------------------------------
-# Handles Product model with nested images and reviews.
-# Computes final price based on discount_percent.
-class ProductSerializer(serializers.ModelSerializer):
+# Handles Product model with nested images and a review summary.
+# Full reviews are served (paginated) by /products/<pk>/reviews/.
+# Supports ?fields=/?omit=; ?expand=seller returns {id, username} instead of the name.
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     images = ProductImageSerializer(many=True, read_only=True)  # nested images
-    reviews = ReviewSerializer(many=True, read_only=True)        # nested reviews
-    final_price = serializers.SerializerMethodField()           # custom field to compute price after discount
+    rating_histogram = serializers.ReadOnlyField()              # per-star review counts
+    # Stored price after discount (see Product.save); rendered as a JSON number
+    final_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True, coerce_to_string=False)
 
     # Allow assigning category, brand, and tags by slug
     category = serializers.SlugRelatedField(
@@ -115,15 +152,11 @@ class ProductSerializer(serializers.ModelSerializer):
         fields = [
             "id", "seller", "title", "description", "price", "stock",
             "category", "brand", "discount_percent", "featured",
-            "created_at", "tags", "images", "reviews", "final_price"
+            "created_at", "tags", "images", "rating_avg", "review_count",
+            "rating_histogram", "final_price"
         ]
-        read_only_fields = ["seller"]  # prevent changing seller via API
-
-    # Compute final price after discount
-    def get_final_price(self, obj):
-        if obj.discount_percent:
-            return round(float(obj.price) * (100 - obj.discount_percent) / 100, 2)
-        return float(obj.price)
+        read_only_fields = ["seller", "rating_avg", "review_count"]  # seller and review summary are server-managed
+        expandable_fields = {"seller": lambda: SellerSerializer(read_only=True)}
 
 
 # -------------------------------
@@ -131,7 +164,7 @@ class ProductSerializer(serializers.ModelSerializer):
 # -------------------------------
 # Serializes Wishlist model and nests the ProductSerializer.
 # Allows creating a wishlist item via product_id.
-class WishlistSerializer(serializers.ModelSerializer):
+class WishlistSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)  # nested product info
     product_id = serializers.PrimaryKeyRelatedField(
         queryset=Product.objects.all(), source="product", write_only=True  # used for creation only
@@ -0,0 +1,98 @@
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .cache import bump_generation
+from .featured import FeaturedCollection
+from .images import delete_variants, schedule_variants
+from .models import Brand, Category, Product, ProductImage, Review, Tag
+from .search import get_search_backend
+
+
+# -------------------------------
+# Search index sync
+# -------------------------------
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    """
+    Add or refresh the product's search index entry after every save.
+    """
+    get_search_backend().index_products([instance])
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    """
+    Remove a deleted product from the search index.
+    """
+    get_search_backend().remove_products([instance.pk])
+
+
+# -------------------------------
+# Image variants
+# -------------------------------
+@receiver(post_save, sender=ProductImage)
+def process_product_image(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Queue thumbnail/WebP/AVIF generation for new or replaced uploads.
+    """
+    if created or (update_fields and "image" in update_fields):
+        schedule_variants([instance.pk])
+
+
+@receiver(post_delete, sender=ProductImage)
+def remove_product_image_variants(sender, instance, **kwargs):
+    """
+    Delete derivative files along with the image row.
+    """
+    delete_variants(instance)
+
+
+# -------------------------------
+# Featured collection membership
+# -------------------------------
+FEATURED_FLAGS = ("featured", "is_approved")
+
+
+@receiver(post_init, sender=Product)
+def remember_featured_flags(sender, instance, **kwargs):
+    """
+    Note the loaded featured/is_approved values so saves can tell if they changed.
+    """
+    if all(flag in instance.__dict__ for flag in FEATURED_FLAGS):
+        instance._featured_flags = (instance.featured, instance.is_approved)
+
+
+@receiver(post_save, sender=Product)
+def refresh_featured_collection(sender, instance, created, **kwargs):
+    """
+    Rebuild the featured collection when a save adds or removes a member.
+    """
+    flags = (instance.featured, instance.is_approved)
+    previous = (False, False) if created else getattr(instance, "_featured_flags", None)
+    if flags != previous:
+        FeaturedCollection().schedule_rebuild()
+    instance._featured_flags = flags
+
+
+@receiver(post_delete, sender=Product)
+def remove_from_featured_collection(sender, instance, **kwargs):
+    if instance.featured:
+        FeaturedCollection().schedule_rebuild()
+
+
+# -------------------------------
+# Response cache invalidation
+# -------------------------------
+# Any write to a model rendered by the public catalog endpoints starts a
+# new cache generation (see catalog.cache).
+CACHED_MODELS = (Product, ProductImage, Review, Category, Brand, Tag)
+
+
+def invalidate_catalog_cache(sender, **kwargs):
+    bump_generation()
+
+
+for model in CACHED_MODELS:
+    post_save.connect(invalidate_catalog_cache, sender=model, dispatch_uid=f"catalog-cache-save-{model.__name__}")
+    post_delete.connect(invalidate_catalog_cache, sender=model, dispatch_uid=f"catalog-cache-delete-{model.__name__}")
+m2m_changed.connect(invalidate_catalog_cache, sender=Product.tags.through, dispatch_uid="catalog-cache-tags")
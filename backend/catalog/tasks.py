@@ -0,0 +1,26 @@
+from tasks.queue import task
+from .aggregates import recompute_review_aggregates
+from .images import generate_variants
+from .models import ProductImage
+
+
+# -------------------------------
+# Aggregate maintenance
+# -------------------------------
+@task("catalog.recompute_review_aggregates")
+def recompute_reviews(product_ids):
+    """
+    Rebuild the review summary columns of the given products.
+    """
+    recompute_review_aggregates(product_ids)
+
+
+# -------------------------------
+# Image variants
+# -------------------------------
+@task("catalog.generate_image_variants")
+def generate_image_variants(image_ids):
+    """
+    Render the resized variants of new or replaced uploads (see catalog.images).
+    """
+    generate_variants(list(ProductImage.objects.filter(pk__in=image_ids)))
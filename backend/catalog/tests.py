@@ -0,0 +1,568 @@
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from users.models import Profile
+from .aggregates import apply_review_delta, recompute_review_aggregates
+from .images import generate_variants
+from .imaging import render_variants
+from .models import Brand, Category, Product, ProductImage, Review, Tag
+from .search import get_search_backend
+from .views import ProductViewSet
+
+
+# In-memory caches, emptied before every test, so no response or
+# generation number leaks in from a development server's file caches
+TEST_CACHES = {
+    alias: {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": f"test-{alias}"}
+    for alias in ("default", "catalog", "email", "throttle")
+}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CatalogTestCase(TestCase):
+    """
+    A seller, a few buyers and `product_count` products with tags and reviews.
+    """
+    product_count = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user("seller", "seller@example.com", "pw")
+        Profile.objects.create(user=cls.seller, is_seller=True)
+        cls.buyers = [User.objects.create_user(f"buyer{i}", f"buyer{i}@example.com", "pw") for i in range(3)]
+        for buyer in cls.buyers:
+            Profile.objects.create(user=buyer)
+        cls.chairs = Category.objects.create(name="Chairs", slug="chairs")
+        cls.sofas = Category.objects.create(name="Sofas", slug="sofas")
+        cls.brand = Brand.objects.create(name="Oakline", slug="oakline")
+        cls.modern = Tag.objects.create(name="Modern", slug="modern")
+        cls.products = [cls.make_product(i) for i in range(cls.product_count)]
+
+    @classmethod
+    def make_product(cls, i, **fields):
+        fields = {
+            "seller": cls.seller,
+            "title": f"Oak chair {i}" if i % 2 else f"Leather sofa {i}",
+            "description": "Solid oak" if i % 2 else "Soft leather",
+            "price": Decimal("100.00") + i,
+            "stock": 10,
+            "category": cls.chairs if i % 2 else cls.sofas,
+            "brand": cls.brand,
+            **fields,
+        }
+        product = Product.objects.create(**fields)
+        product.tags.set([cls.modern])
+        for buyer in cls.buyers[: i % 3]:
+            Review.objects.create(product=product, user=buyer, rating=(i % 5) + 1, comment="Nice")
+        return product
+
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+        self.client = APIClient()
+
+
+# -------------------------------
+# Query planning
+# -------------------------------
+@override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_STRICT=True)
+class ProductQueryBudgetTests(CatalogTestCase):
+    def test_list_query_count_does_not_grow_with_the_page(self):
+        response = self.client.get("/api/catalog/products/")
+        self.assertEqual(response.status_code, 200)
+        few = int(response["X-Query-Count"])
+
+        for i in range(self.product_count, self.product_count + 6):
+            self.make_product(i)
+        caches["catalog"].clear()  # measure a cold request again (page and total)
+        response = self.client.get("/api/catalog/products/")
+        self.assertEqual(int(response["X-Query-Count"]), few)
+        self.assertLessEqual(few, ProductViewSet.query_budgets["list"])
+
+    def test_retrieve_stays_within_budget(self):
+        ProductImage.objects.create(product=self.products[0], image="products/sofa.jpg")
+        response = self.client.get(f"/api/catalog/products/{self.products[0].pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(int(response["X-Query-Count"]), ProductViewSet.query_budgets["retrieve"])
+
+    def test_strict_mode_fails_over_budget_actions(self):
+        budgets = {**ProductViewSet.query_budgets, "list": 1}
+        with mock.patch.object(ProductViewSet, "query_budgets", budgets):
+            with self.assertRaises(AssertionError):
+                self.client.get("/api/catalog/products/")
+
+
+# -------------------------------
+# Review summaries
+# -------------------------------
+class ReviewSummaryTests(CatalogTestCase):
+    def summary(self, product):
+        product.refresh_from_db()
+        return product.review_count, product.rating_avg, product.rating_histogram
+
+    def reviews_url(self, product, pk=None):
+        url = f"/api/catalog/products/{product.pk}/reviews/"
+        return f"{url}{pk}/" if pk else url
+
+    def test_review_writes_keep_the_summary_in_sync(self):
+        product = self.products[0]  # no reviews yet
+        self.client.force_authenticate(self.buyers[0])
+        review = self.client.post(self.reviews_url(product), {"rating": 5, "comment": "Great"}).data
+        self.client.force_authenticate(self.buyers[1])
+        self.client.post(self.reviews_url(product), {"rating": 2, "comment": "Meh"})
+        self.assertEqual(self.summary(product), (2, 3.5, {"1": 0, "2": 1, "3": 0, "4": 0, "5": 1}))
+
+        self.client.force_authenticate(self.buyers[0])
+        self.client.patch(self.reviews_url(product, review["id"]), {"rating": 4})
+        self.assertEqual(self.summary(product), (2, 3.0, {"1": 0, "2": 1, "3": 0, "4": 1, "5": 0}))
+
+        self.client.delete(self.reviews_url(product, review["id"]))
+        self.assertEqual(self.summary(product), (1, 2.0, {"1": 0, "2": 1, "3": 0, "4": 0, "5": 0}))
+
+    def test_only_the_author_can_edit_a_review(self):
+        product = self.products[2]
+        review = product.reviews.first()
+        self.client.force_authenticate(self.buyers[2])
+        response = self.client.patch(self.reviews_url(product, review.pk), {"rating": 1})
+        self.assertEqual(response.status_code, 403)
+
+    def test_rating_out_of_range_is_rejected(self):
+        self.client.force_authenticate(self.buyers[0])
+        response = self.client.post(self.reviews_url(self.products[0]), {"rating": 6, "comment": "!"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_recompute_matches_the_review_rows(self):
+        recompute_review_aggregates()
+        product = self.products[2]  # reviewed 3 stars by two buyers
+        self.assertEqual(self.summary(product)[:2], (2, 3.0))
+
+    def test_products_carry_the_summary_not_the_reviews(self):
+        recompute_review_aggregates()
+        data = self.client.get(f"/api/catalog/products/{self.products[2].pk}/").data
+        self.assertNotIn("reviews", data)
+        self.assertEqual((data["review_count"], data["rating_avg"]), (2, 3.0))
+        reviews = self.client.get(self.reviews_url(self.products[2])).data
+        self.assertEqual(len(reviews["results"]), 2)
+
+
+# -------------------------------
+# Search
+# -------------------------------
+class ProductSearchTests(CatalogTestCase):
+    def search(self, query, **params):
+        response = self.client.get("/api/catalog/products/", {"search": query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def titles(self, data):
+        return [product["title"] for product in data["results"]]
+
+    def test_matches_are_ranked_title_first(self):
+        described = self.make_product(10, title="Armchair", description="An oak frame")
+        titled = self.make_product(11, title="Oak bench", description="Long seat")
+        data = self.search("oak")
+        self.assertEqual(data["count"], 3)  # Oak chair 1, Armchair, Oak bench
+        self.assertEqual(data["results"][-1]["id"], described.pk)
+        self.assertIn(titled.title, self.titles(data)[:2])
+
+    def test_terms_match_as_prefixes_and_all_must_match(self):
+        self.assertEqual(self.titles(self.search("leath sof")), ["Leather sofa 2", "Leather sofa 0"])
+        self.assertEqual(self.search("leather oak")["count"], 0)
+
+    def test_no_match_is_an_empty_result(self):
+        data = self.search("zzzqqq")
+        self.assertEqual((data["count"], data["results"]), (0, []))
+
+    def test_every_match_is_counted(self):
+        for i in range(20, 40):
+            self.make_product(i, title=f"Walnut table {i}")
+        data = self.search("walnut", page=2)
+        self.assertEqual(data["count"], 20)
+        self.assertEqual(len(data["results"]), 8)
+
+    def test_index_follows_saves_and_deletes(self):
+        product = self.products[1]
+        product.title = "Rattan stool"
+        product.save()
+        self.assertEqual(self.titles(self.search("rattan")), ["Rattan stool"])
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+        self.assertEqual(self.search("rattan")["count"], 0)
+
+    def test_explicit_ordering_overrides_relevance(self):
+        data = self.search("leather", ordering="price")
+        self.assertEqual(self.titles(data), ["Leather sofa 0", "Leather sofa 2"])
+
+    def test_database_backend_fallback(self):
+        get_search_backend.cache_clear()
+        self.addCleanup(get_search_backend.cache_clear)
+        with self.settings(CATALOG_SEARCH_BACKEND="catalog.search.DatabaseSearchBackend"):
+            self.assertEqual(self.titles(self.search("oak")), ["Oak chair 1"])
+
+
+# -------------------------------
+# Keyset pagination
+# -------------------------------
+class KeysetPaginationTests(CatalogTestCase):
+    product_count = 7
+
+    def walk(self, url, **params):
+        """
+        Follow `next` links from the first page; return the pages' ids.
+        """
+        pages = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append([row["id"] for row in response.data["results"]])
+            if not response.data["next"]:
+                return pages, response
+            response = self.client.get(response.data["next"])
+
+    def test_cursor_pages_cover_every_product_once(self):
+        pages, _ = self.walk("/api/catalog/products/", page_size=3)
+        newest_first = [product.pk for product in reversed(self.products)]
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), newest_first)
+
+    def test_previous_link_returns_the_page_before(self):
+        first = self.client.get("/api/catalog/products/", {"page_size": 3}).data
+        second = self.client.get(first["next"]).data
+        self.assertEqual(second["count"], 7)
+        back = self.client.get(second["previous"]).data
+        self.assertEqual([row["id"] for row in back["results"]], [row["id"] for row in first["results"]])
+
+    def test_page_parameter_falls_back_to_page_numbers(self):
+        data = self.client.get("/api/catalog/products/", {"page": 1}).data
+        self.assertEqual(data["count"], 7)
+        self.assertEqual(len(data["results"]), 7)
+        self.assertIsNone(data["next"])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get("/api/catalog/products/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_empty_search_has_a_zero_total(self):
+        response = self.client.get("/api/catalog/products/", {"search": "zzzqqq"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["count"], response.data["results"]), (0, []))
+
+    def test_reviews_are_paged_by_cursor(self):
+        product = self.products[5]  # two reviews
+        data = self.client.get(f"/api/catalog/products/{product.pk}/reviews/", {"page_size": 1}).data
+        self.assertEqual(len(data["results"]), 1)
+        self.assertNotIn("count", data)
+        self.assertEqual(len(self.client.get(data["next"]).data["results"]), 1)
+
+
+# -------------------------------
+# Response cache
+# -------------------------------
+class CatalogCacheTests(CatalogTestCase):
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_anonymous_reads_are_served_from_the_cache(self):
+        url = f"/api/catalog/products/{self.products[0].pk}/"
+        self.assertEqual(self.get(url)["X-Catalog-Cache"], "miss")
+        with self.assertNumQueries(0):
+            response = self.get(url)
+        self.assertEqual(response["X-Catalog-Cache"], "hit")
+        self.assertEqual(response.data["title"], "Leather sofa 0")
+
+    def test_query_parameter_order_does_not_matter(self):
+        self.get("/api/catalog/products/", category="chairs", ordering="price")
+        response = self.get("/api/catalog/products/", ordering="price", category="chairs")
+        self.assertEqual(response["X-Catalog-Cache"], "hit")
+
+    def test_authenticated_requests_bypass_the_cache(self):
+        self.get("/api/catalog/categories/")
+        self.client.force_authenticate(self.buyers[0])
+        self.assertFalse(self.get("/api/catalog/categories/").has_header("X-Catalog-Cache"))
+
+    def test_saves_start_a_new_generation(self):
+        url = f"/api/catalog/products/{self.products[0].pk}/"
+        self.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.filter(pk=self.products[0].pk).first().save()
+        self.assertEqual(self.get(url)["X-Catalog-Cache"], "miss")
+
+    def test_review_summary_updates_invalidate(self):
+        product = self.products[0]
+        url = f"/api/catalog/products/{product.pk}/"
+        self.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_review_delta(product.pk, added=4)  # update() only, no save signal
+        response = self.get(url)
+        self.assertEqual((response["X-Catalog-Cache"], response.data["review_count"]), ("miss", 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recompute_review_aggregates([product.pk])
+        self.assertEqual(self.get(url).data["review_count"], 0)
+
+
+# -------------------------------
+# Facets
+# -------------------------------
+@override_settings(CATALOG_PRICE_BUCKETS=[0, 101, 200])
+class FacetTests(CatalogTestCase):
+    product_count = 4  # sofas 0, 2 (100, 102); chairs 1, 3 (101, 103)
+
+    def facets(self, **params):
+        response = self.client.get("/api/catalog/products/facets/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def counts(self, rows):
+        return {row["slug"]: row["count"] for row in rows}
+
+    def test_counts_every_dimension(self):
+        data = self.facets()
+        self.assertEqual(data["total"], 4)
+        self.assertEqual(self.counts(data["categories"]), {"chairs": 2, "sofas": 2})
+        self.assertEqual(self.counts(data["brands"]), {"oakline": 4})
+        self.assertEqual(self.counts(data["tags"]), {"modern": 4})
+        self.assertEqual([row["count"] for row in data["price_ranges"]], [1, 3, 0])
+        self.assertIsNone(data["price_ranges"][-1]["max"])
+
+    def test_counts_follow_filters_and_search(self):
+        data = self.facets(category="chairs")
+        self.assertEqual((data["total"], self.counts(data["categories"])), (2, {"chairs": 2}))
+        data = self.facets(search="leather")
+        self.assertEqual((data["total"], self.counts(data["categories"])), (2, {"sofas": 2}))
+        self.assertEqual(self.facets(search="zzzqqq")["total"], 0)
+
+    def test_repeated_filters_are_served_from_the_cache(self):
+        self.facets(category="sofas", ordering="price")
+        with self.assertNumQueries(0):
+            data = self.facets(category="sofas", page=2)  # paging/sorting do not change facets
+        self.assertEqual(data["total"], 2)
+
+    @override_settings(QUERY_BUDGET_ENABLED=True)
+    def test_stays_within_budget(self):
+        response = self.client.get("/api/catalog/products/facets/", {"brand": self.brand.pk, "search": "oak"})
+        self.assertLessEqual(int(response["X-Query-Count"]), ProductViewSet.query_budgets["facets"])
+
+
+# -------------------------------
+# Sparse fieldsets
+# -------------------------------
+class FieldsetTests(CatalogTestCase):
+    def product(self, **params):
+        response = self.client.get(f"/api/catalog/products/{self.products[1].pk}/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_fields_and_omit_trim_the_response(self):
+        self.assertEqual(set(self.product(fields="id,title")), {"id", "title"})
+        data = self.product(omit="description,images")
+        self.assertNotIn("description", data)
+        self.assertNotIn("images", data)
+        self.assertIn("title", data)
+
+    def test_expand_replaces_the_seller_name(self):
+        self.assertEqual(self.product(fields="seller")["seller"], "seller")
+        self.assertEqual(
+            self.product(fields="seller", expand="seller")["seller"],
+            {"id": self.seller.pk, "username": "seller"},
+        )
+
+    def test_nested_fields_on_wishlist_rows(self):
+        self.client.force_authenticate(self.buyers[0])
+        self.client.post("/api/catalog/wishlist/", {"product_id": self.products[1].pk})
+        response = self.client.get("/api/catalog/wishlist/", {"fields": "id,product.id,product.title"})
+        self.assertEqual(response.data["results"][0]["product"], {"id": self.products[1].pk, "title": "Oak chair 1"})
+
+    def test_trimmed_lists_skip_unrendered_relations(self):
+        with self.assertNumQueries(2):  # count + products, no seller/category joins or tag/image prefetches
+            response = self.client.get("/api/catalog/products/", {"fields": "id,title"})
+        self.assertEqual(response.data["results"][0], {"id": self.products[-1].pk, "title": "Leather sofa 2"})
+
+    def test_writes_are_not_shaped(self):
+        self.client.force_authenticate(self.seller)
+        response = self.client.patch(
+            f"/api/catalog/products/{self.products[1].pk}/?fields=id", {"stock": 3}, format="multipart",
+        )
+        self.assertEqual((response.status_code, response.data["stock"]), (200, 3))
+
+
+# -------------------------------
+# Final price
+# -------------------------------
+class FinalPriceTests(CatalogTestCase):
+    def test_saves_keep_the_discounted_price(self):
+        product = self.make_product(5, price=Decimal("19.99"), discount_percent=15)
+        self.assertEqual(product.final_price, Decimal("16.99"))
+        product.discount_percent = 150  # capped at free, never negative
+        product.save(update_fields=["discount_percent"])
+        product.refresh_from_db()
+        self.assertEqual(product.final_price, Decimal("0.00"))
+
+    def test_sort_and_filter_by_final_price(self):
+        self.make_product(5, price=Decimal("200.00"), discount_percent=50)  # 100.00
+        response = self.client.get("/api/catalog/products/", {"ordering": "final_price", "max_price": "101"})
+        prices = [row["final_price"] for row in response.data["results"]]
+        self.assertEqual(prices, [100.0, 100.0, 101.0])
+        response = self.client.get("/api/catalog/products/", {"min_price": "101.50"})
+        self.assertEqual([row["title"] for row in response.data["results"]], ["Leather sofa 2"])
+
+
+class FinalPriceMigrationTests(TransactionTestCase):
+    """
+    0008_product_final_price fills final_price for products that predate it.
+    """
+    before = [("catalog", "0007_productimage_variants")]
+    after = [("catalog", "0008_product_final_price")]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        self.apps = executor.loader.project_state(self.before).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_backfills_discounted_price(self):
+        seller = self.apps.get_model("auth", "User").objects.create(username="seller")
+        OldProduct = self.apps.get_model("catalog", "Product")
+        discounted = OldProduct.objects.create(seller=seller, title="Sofa", description="", price=Decimal("100.00"), discount_percent=10)
+        rounded = OldProduct.objects.create(seller=seller, title="Lamp", description="", price=Decimal("19.99"), discount_percent=15)
+        full = OldProduct.objects.create(seller=seller, title="Chair", description="", price=Decimal("45.50"))
+
+        MigrationExecutor(connection).migrate(self.after)
+
+        prices = dict(Product.objects.values_list("pk", "final_price"))
+        self.assertEqual(prices[discounted.pk], Decimal("90.00"))
+        self.assertEqual(prices[rounded.pk], Decimal("16.99"))
+        self.assertEqual(prices[full.pk], Decimal("45.50"))
+
+
+# -------------------------------
+# Featured collection
+# -------------------------------
+class FeaturedTests(CatalogTestCase):
+    product_count = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Product.objects.filter(pk__in=[p.pk for p in cls.products[:3]]).update(featured=True)
+        Product.objects.filter(pk=cls.products[2].pk).update(is_approved=False)
+
+    def featured(self, **params):
+        response = self.client.get("/api/catalog/products/featured/", params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def titles(self, response):
+        return [row["title"] for row in response.json()["results"]]
+
+    def test_lists_approved_featured_products_newest_first(self):
+        self.assertEqual(self.titles(self.featured()), ["Oak chair 1", "Leather sofa 0"])
+
+    def test_pages_follow_page_size(self):
+        data = self.featured(page_size=1, page=2).json()
+        self.assertEqual((data["count"], len(data["results"]), data["next"]), (2, 1, None))
+        self.assertIsNotNone(data["previous"])
+        self.assertEqual(self.client.get("/api/catalog/products/featured/", {"page": 9}).status_code, 404)
+
+    def test_warm_pages_run_no_queries_even_when_logged_in(self):
+        self.featured()
+        self.client.force_authenticate(self.buyers[0])
+        with self.assertNumQueries(0):
+            response = self.featured()
+        self.assertEqual(response["X-Catalog-Cache"], "hit")
+
+    def test_membership_changes_rebuild_the_collection(self):
+        self.featured()
+        product = self.products[3]
+        with self.captureOnCommitCallbacks(execute=True):
+            product.featured = True
+            product.save()
+        self.assertEqual(self.titles(self.featured()), ["Oak chair 3", "Oak chair 1", "Leather sofa 0"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products[1].delete()
+        self.assertEqual(self.titles(self.featured()), ["Oak chair 3", "Leather sofa 0"])
+
+
+# -------------------------------
+# Image variants
+# -------------------------------
+def png_bytes(size=(800, 400)):
+    buffer = BytesIO()
+    Image.new("RGB", size, "tan").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@override_settings(
+    CATALOG_IMAGE_VARIANTS={"thumb": 100, "large": 1200},
+    CATALOG_IMAGE_FORMATS=["webp"],
+    TASKS_EAGER=True,
+)
+class ImageVariantTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        # Render on a thread instead of spawning worker processes
+        pool = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(pool.shutdown)
+        patcher = mock.patch("catalog.images.get_process_pool", return_value=pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def upload(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return ProductImage.objects.create(
+                product=self.products[0], image=SimpleUploadedFile("sofa.png", png_bytes()),
+            )
+
+    def test_render_scales_down_but_never_up(self):
+        rendered = render_variants(png_bytes(), {"thumb": 100, "large": 1200}, ["webp"])
+        self.assertEqual((rendered["thumb"]["width"], rendered["thumb"]["height"]), (100, 50))
+        self.assertEqual((rendered["large"]["width"], rendered["large"]["height"]), (800, 400))
+        self.assertEqual(Image.open(BytesIO(rendered["thumb"]["files"]["webp"])).format, "WEBP")
+
+    def test_uploads_get_variants_after_commit(self):
+        image = self.upload()
+        image.refresh_from_db()
+        self.assertEqual(image.variants["thumb"]["files"], {"webp": f"products/variants/{image.pk}/thumb.webp"})
+
+        response = self.client.get(f"/api/catalog/products/{self.products[0].pk}/")
+        srcset = response.data["images"][0]["srcset"]
+        self.assertEqual(srcset["thumb"]["width"], 100)
+        self.assertTrue(srcset["thumb"]["webp"].endswith(f"/media/products/variants/{image.pk}/thumb.webp"))
+
+    def test_new_variants_invalidate_cached_responses(self):
+        image = self.upload()
+        url = f"/api/catalog/products/{self.products[0].pk}/"
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(generate_variants([image]), 1)  # bulk_update(), no save signal
+        self.assertEqual(self.client.get(url)["X-Catalog-Cache"], "miss")
+
+    def test_unreadable_uploads_are_skipped(self):
+        image = ProductImage.objects.create(product=self.products[1], image="products/missing.png")
+        self.assertEqual(generate_variants([image]), 0)
+        image.refresh_from_db()
+        self.assertEqual(image.variants, {})
@@ -42,4 +42,9 @@ urlpatterns = [
         ReviewViewSet.as_view({"get": "list", "post": "create"}),  # Map GET to list, POST to create
         name="review-list-create"
     ),
+    path(
+        "products/<int:product_pk>/reviews/<int:pk>/",  # Single review (author can edit/delete)
+        ReviewViewSet.as_view({"get": "retrieve", "put": "update", "patch": "partial_update", "delete": "destroy"}),
+        name="review-detail"
+    ),
 ]
\ No newline at end of file
@@ -5,11 +5,21 @@ from rest_framework import filters as drf_filters
 from django_filters.rest_framework import DjangoFilterBackend
 from django_filters import rest_framework as django_filters
 from rest_framework.parsers import MultiPartParser, FormParser
+from django.db import transaction
 from .models import Category, Brand, Tag, Product, ProductImage, Review, Wishlist
 from .serializers import (
     CategorySerializer, BrandSerializer, TagSerializer,
     ProductSerializer, ProductImageSerializer, ReviewSerializer, WishlistSerializer
 )
+from .queries import PRODUCT_RELATIONS, QueryBudgetMixin, with_product_relations
+from .fieldsets import selected_fields
+from .aggregates import apply_review_delta
+from .search import FullTextSearchFilter
+from .pagination import KeysetPagination
+from .cache import CachedCatalogMixin
+from .featured import FeaturedCollection
+from .facets import get_facets
+from users.authentication import is_seller
 
 
 # -------------------------------
@@ -27,13 +37,24 @@ class IsSellerOrReadOnly(permissions.BasePermission):
         return obj.seller == request.user or request.user.is_staff
 
 
+class IsReviewAuthorOrReadOnly(permissions.BasePermission):
+    """
+    Allows only the author of a review (or admin) to edit or delete it.
+    """
+    def has_object_permission(self, request, view, obj):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        return obj.user == request.user or request.user.is_staff
+
+
 # -------------------------------
 # Categories
 # -------------------------------
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(CachedCatalogMixin, viewsets.ModelViewSet):
     """
     Provides full CRUD for product categories.
     Anyone can view categories; no authentication required.
+    Anonymous reads are served from the catalog cache.
     """
     queryset = Category.objects.all().order_by("name")
     serializer_class = CategorySerializer
@@ -43,7 +64,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
 # -------------------------------
 # Brands
 # -------------------------------
-class BrandViewSet(viewsets.ModelViewSet):
+class BrandViewSet(CachedCatalogMixin, viewsets.ModelViewSet):
     """
     Provides full CRUD for brands.
     Publicly accessible.
@@ -56,7 +77,7 @@ class BrandViewSet(viewsets.ModelViewSet):
 # -------------------------------
 # Tags
 # -------------------------------
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(CachedCatalogMixin, viewsets.ModelViewSet):
     """
     CRUD operations for product tags.
     Publicly accessible.
@@ -72,30 +93,58 @@ class TagViewSet(viewsets.ModelViewSet):
 class ProductFilter(django_filters.FilterSet):
     """
     Enable filtering products by category slug.
-    Additional filters: brand, tags.
+    Additional filters: brand, tags, and min_price/max_price on the
+    discounted (final) price.
     """
     category = django_filters.CharFilter(field_name="category__slug")
+    min_price = django_filters.NumberFilter(field_name="final_price", lookup_expr="gte")
+    max_price = django_filters.NumberFilter(field_name="final_price", lookup_expr="lte")
 
     class Meta:
         model = Product
-        fields = ["category", "brand", "tags"]
+        fields = ["category", "brand", "tags", "min_price", "max_price"]
 
 
 # -------------------------------
 # Products
 # -------------------------------
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(CachedCatalogMixin, QueryBudgetMixin, viewsets.ModelViewSet):
     """
     Provides CRUD for products with filtering, search, and custom seller views.
     Only authenticated users can modify; read-only for others.
+    Anonymous list/retrieve responses and every featured page are served
+    from the catalog cache.
     """
-    queryset = Product.objects.all().order_by("-created_at")
+    queryset = Product.objects.all().order_by("-created_at", "-id")
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsSellerOrReadOnly]
+    # Cursor pages by default; ?page= keeps working through the fallback.
+    # The storefront shows a product total, so include a cached count.
+    pagination_class = KeysetPagination
+    pagination_include_total = True
     parser_classes = [MultiPartParser, FormParser]  # Handle file uploads
-    filter_backends = [DjangoFilterBackend, drf_filters.SearchFilter]
-    search_fields = ["title", "description"]
+    # ?search= is answered by the full-text index (see catalog.search), ranked by relevance
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, drf_filters.OrderingFilter]
     filterset_class = ProductFilter
+    # Review summary and final price are stored on Product, so these sorts run in SQL
+    ordering_fields = ["created_at", "price", "final_price", "rating_avg", "review_count"]
+    # Upper bound on SQL queries per action, independent of page size:
+    # count + products (joined seller/category/brand; ?search= matches and ranks in the same query) + tags + images
+    query_budgets = {
+        "list": 4,
+        "retrieve": 3,
+        "featured": 4,  # on a miss: + collection ids; hits run none
+        "seller_products": 4,  # + profile lookup for tokens without claims
+        "facets": 5,  # [brand/tag filter validation] + categories + brands + tags + totals
+    }
+
+    def get_queryset(self):
+        """
+        Load every relation rendered by ProductSerializer in a fixed number of queries.
+        Relations trimmed away by ?fields=/?omit= are not loaded at all.
+        """
+        relations = selected_fields(self.request, (), PRODUCT_RELATIONS)
+        return with_product_relations(super().get_queryset(), fields=relations)
 
     def get_serializer_context(self):
         """
@@ -103,6 +152,16 @@ class ProductViewSet(viewsets.ModelViewSet):
         """
         return {"request": self.request}
 
+    def get_serializer(self, *args, **kwargs):
+        """
+        Note which products a response renders, so its cached copy is dropped
+        when one of them changes (catalog.cache.touch_products).
+        """
+        if args and args[0] is not None:
+            instances = args[0] if kwargs.get("many") else [args[0]]
+            self.served_product_ids = [product.pk for product in instances]
+        return super().get_serializer(*args, **kwargs)
+
     def perform_create(self, serializer):
         """
         Automatically set the seller as the logged-in user.
@@ -125,23 +184,31 @@ class ProductViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"])
     def featured(self, request):
         """
-        Custom endpoint to retrieve all featured products.
+        Custom endpoint to retrieve approved featured products, paginated
+        with ?page= / ?page_size=. Pages are served as pre-rendered JSON
+        from the materialized collection (see catalog.featured).
         """
-        featured_products = Product.objects.filter(featured=True).order_by("-created_at")
-        serializer = self.get_serializer(featured_products, many=True)
-        return Response(serializer.data)
+        return FeaturedCollection().response(request, self.get_serializer_class(), self.get_serializer_context())
+
+    @action(detail=False, methods=["get"])
+    def facets(self, request):
+        """
+        Facet counts (category, brand, tag, price range) for the current
+        filter and search parameters, e.g. /products/facets/?category=chairs&search=oak.
+        Cached per filter signature until the catalog changes.
+        """
+        return Response(get_facets(request, lambda: self.filter_queryset(self.get_queryset())))
 
     @action(detail=False, methods=["get"], url_path="seller")
     def seller_products(self, request):
         """
         Custom endpoint to get all products created by the logged-in seller.
-        Checks if the user has a seller profile.
+        Checks if the user has a seller profile (the token's is_seller claim).
         """
         user = request.user
-        profile = getattr(user, "profile", None)
-        if profile is None or not profile.is_seller:
+        if not is_seller(user):
             return Response({"detail": "You are not a seller"}, status=403)
-        products = Product.objects.filter(seller=user).order_by("-created_at")
+        products = self.get_queryset().filter(seller=user)
         serializer = self.get_serializer(products, many=True)
         return Response(serializer.data)
 
@@ -152,23 +219,47 @@ class ProductViewSet(viewsets.ModelViewSet):
 class ReviewViewSet(viewsets.ModelViewSet):
     """
     CRUD for reviews of a specific product.
-    Only authenticated users can create reviews.
+    Only authenticated users can create reviews; only authors can change them.
+    Every write keeps the product's denormalized review summary in sync.
     """
     serializer_class = ReviewSerializer
-    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsReviewAuthorOrReadOnly]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         """
         Retrieve reviews only for the product specified in the URL (nested routing).
         Orders reviews by newest first.
         """
-        return Review.objects.filter(product_id=self.kwargs["product_pk"]).order_by("-created_at")
+        queryset = Review.objects.filter(product_id=self.kwargs["product_pk"]).order_by("-created_at", "-id")
+        if selected_fields(self.request, (), ["user"]):
+            queryset = queryset.select_related("user__profile")
+        return queryset
 
     def perform_create(self, serializer):
         """
         Automatically assign the review to the logged-in user and associated product.
         """
-        serializer.save(user=self.request.user, product_id=self.kwargs["product_pk"])
+        with transaction.atomic():
+            review = serializer.save(user=self.request.user, product_id=self.kwargs["product_pk"])
+            apply_review_delta(review.product_id, added=review.rating)
+
+    def perform_update(self, serializer):
+        """
+        Save the edited review and move its rating between histogram buckets.
+        """
+        old_rating = serializer.instance.rating
+        with transaction.atomic():
+            review = serializer.save()
+            apply_review_delta(review.product_id, added=review.rating, removed=old_rating)
+
+    def perform_destroy(self, instance):
+        """
+        Delete the review and remove it from the product summary.
+        """
+        with transaction.atomic():
+            apply_review_delta(instance.product_id, removed=instance.rating)
+            instance.delete()
 
 
 # -------------------------------
@@ -199,12 +290,18 @@ class WishlistViewSet(viewsets.ModelViewSet):
     """
     serializer_class = WishlistSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         """
         Returns wishlist items of the logged-in user, ordered by creation date.
+        The nested product and only its requested relations are loaded up front.
         """
-        return Wishlist.objects.filter(user=self.request.user).order_by("-created_at")
+        queryset = Wishlist.objects.filter(user=self.request.user).order_by("-created_at", "-id")
+        if selected_fields(self.request, (), ["product"]):
+            relations = selected_fields(self.request, ("product",), PRODUCT_RELATIONS)
+            queryset = with_product_relations(queryset.select_related("product"), fields=relations, prefix="product__")
+        return queryset
 
     def perform_create(self, serializer):
         """
@@ -36,6 +36,7 @@ INSTALLED_APPS = [
     "catalog",                    # Products, categories, tags
     "orders",                     # Orders and cart management
     "pages",                      # Public pages: home, about, contact
+    "tasks",                      # Database-backed background task queue
 ]
 
 # -----------------------------------
@@ -83,6 +84,9 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Take SQLite's write lock when a transaction starts and wait for it
+        # instead of failing with "database is locked" under concurrent checkouts
+        "OPTIONS": {"transaction_mode": "IMMEDIATE", "timeout": 20},
     }
 }
 
@@ -129,6 +133,28 @@ SOCIAL_AUTH_ASSOCIATE_BY_EMAIL = False
 # -----------------------------------
 # Password validation
 # -----------------------------------
+# Password hashing (users.hashers). PASSWORD_HASHER picks the hasher for new
+# passwords: "scrypt" (default) or "pbkdf2", both in the standard library.
+# The other still verifies older hashes, which are upgraded on the user's
+# next login, as are hashes made with a different cost below.
+# Compare costs with `manage.py benchmark_hashers`.
+PASSWORD_HASHER = os.environ.get("PASSWORD_HASHER", "scrypt")
+PASSWORD_HASHING = {
+    "PBKDF2_ITERATIONS": int(os.environ.get("PBKDF2_ITERATIONS", 1_000_000)),
+    "SCRYPT_WORK_FACTOR": int(os.environ.get("SCRYPT_WORK_FACTOR", 2 ** 14)),  # 16 MiB per hash with r=8
+    "SCRYPT_BLOCK_SIZE": 8,
+    "SCRYPT_PARALLELISM": 1,
+}
+_PASSWORD_HASHERS = {
+    "scrypt": "users.hashers.TunedScryptPasswordHasher",
+    "pbkdf2": "users.hashers.TunedPBKDF2PasswordHasher",
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+] + [
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -161,17 +187,104 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# -----------------------------------
+# Caches
+# -----------------------------------
+# "catalog" holds public catalog responses (catalog.cache). It defaults to a
+# file backend so every gunicorn worker on the host shares one generation
+# counter; point CATALOG_CACHE_BACKEND at LocMemCache for single-process dev.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "catalog": {
+        "BACKEND": os.environ.get("CATALOG_CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": os.environ.get("CATALOG_CACHE_LOCATION", str(BASE_DIR / "cache" / "catalog")),
+        "TIMEOUT": 300,
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+    # Auth rate-limit buckets (users.throttling); must be shared by all workers
+    "throttle": {
+        "BACKEND": os.environ.get("THROTTLE_CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": os.environ.get("THROTTLE_CACHE_LOCATION", str(BASE_DIR / "cache" / "throttle")),
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    },
+    # Email dedupe keys (users.email_utils); must be shared by web and task workers
+    "email": {
+        "BACKEND": os.environ.get("EMAIL_CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": os.environ.get("EMAIL_CACHE_LOCATION", str(BASE_DIR / "cache" / "email")),
+    },
+}
+CATALOG_CACHE_ALIAS = "catalog"
+THROTTLE_CACHE_ALIAS = "throttle"  # Auth rate-limit buckets; must be shared by all workers
+CATALOG_CACHE_TIMEOUT = 300   # Seconds a cached catalog response lives
+CATALOG_API_VERSION = "v1"    # Part of every cache key; bump to drop all entries on deploy
+CATALOG_PRICE_BUCKETS = [0, 50, 100, 250, 500, 1000]  # Facet price-range edges (last bucket is open)
+CATALOG_FEATURED_PAGE_SIZE = 12  # Products per page of /products/featured/ (catalog.featured)
+
 # -----------------------------------
 # Django REST Framework settings
 # -----------------------------------
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # JWT whose signed claims stand in for the user row (users.authentication)
+        "users.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 12,
+    # Token buckets for the auth endpoints (users.throttling): "N/period" allows
+    # bursts of N, refilled evenly over the period
+    "DEFAULT_THROTTLE_RATES": {
+        "login_ip": "20/min",
+        "login_account": "5/min",
+        "register_ip": "10/hour",
+        "activation_ip": "10/hour",
+        "activation_account": "3/hour",
+        "validate_password_ip": "60/min",
+        "auth_global": "600/min",  # all clients together: caps password hashing CPU
+    },
+    # Reverse proxies in front of the app. With 0, clients are identified by
+    # REMOTE_ADDR and X-Forwarded-For (client-supplied) is ignored; behind N
+    # trusted proxies, the Nth address from the right of X-Forwarded-For is used.
+    "NUM_PROXIES": int(os.environ.get("NUM_PROXIES", 0)),
 }
 
+# Background task queue (tasks.queue), run by `manage.py run_tasks`.
+# TASKS_EAGER runs handlers in-process after commit instead (no worker needed).
+TASKS_EAGER = os.environ.get("TASKS_EAGER", "False") == "True"
+TASKS_RETRY_BASE_SECONDS = 10     # Retry n waits base * 2**(n-1) seconds...
+TASKS_RETRY_MAX_SECONDS = 3600    # ...capped at this
+
+# Cart stock reservations (orders.inventory): seconds a cart line holds its stock
+CART_RESERVATION_TTL = 15 * 60
+# Guest carts untouched for this many days are deleted by `manage.py sweep_carts`
+CART_GUEST_TTL_DAYS = 30
+# Seller sales endpoints (orders.rollups): default and maximum date range in days
+SALES_DEFAULT_DAYS = 30
+SALES_MAX_DAYS = 366
+# Order exports (orders.exports): rows fetched per cursor round trip
+ORDERS_EXPORT_CHUNK_SIZE = 2000
+
+# Keyset pagination (catalog.pagination): how long approximate totals are cached, and where
+KEYSET_TOTAL_CACHE_SECONDS = 60
+KEYSET_TOTAL_CACHE_ALIAS = "catalog"  # shared by all workers, like the responses
+
+# Product image derivatives (catalog.images): name -> longest edge in px.
+# Rendered by the task worker (in a process pool) after upload, or by `manage.py generate_image_variants`.
+CATALOG_IMAGE_VARIANTS = {"thumb": 300, "card": 600, "large": 1200}
+CATALOG_IMAGE_FORMATS = ["webp", "avif"]   # Formats Pillow cannot encode are skipped
+CATALOG_IMAGE_QUALITY = 80
+CATALOG_IMAGE_WORKERS = 2
+
+# Product search backend (catalog.search). Empty picks one for the database:
+# SQLiteFTS5Backend on SQLite, DatabaseSearchBackend elsewhere.
+CATALOG_SEARCH_BACKEND = os.environ.get("CATALOG_SEARCH_BACKEND", "")
+
+# Per-action SQL query budgets (see catalog.queries.QueryBudgetMixin).
+# Measured whenever enabled; STRICT turns over-budget responses into errors.
+QUERY_BUDGET_ENABLED = os.environ.get("QUERY_BUDGET_ENABLED", str(DEBUG)) == "True"
+QUERY_BUDGET_STRICT = os.environ.get("QUERY_BUDGET_STRICT") == "True"
+
 # -----------------------------------
 # Simple JWT settings
 # -----------------------------------
@@ -179,7 +292,13 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "AUTH_HEADER_TYPES": ("Bearer",),
+    # Tokens carry username, is_staff, is_active and is_seller claims
+    "TOKEN_OBTAIN_SERIALIZER": "users.authentication.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.authentication.ClaimsTokenRefreshSerializer",
 }
+# Per-process cache of full user rows (users.authentication.cached_user)
+AUTH_USER_CACHE_SECONDS = 60
+AUTH_USER_CACHE_SIZE = 1024
 
 # -----------------------------------
 # CORS Settings (for frontend on localhost:5173)
@@ -196,13 +315,19 @@ CSRF_TRUSTED_ORIGINS = [
 # -----------------------------------
 # Email settings (for development)
 # -----------------------------------
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# EMAIL_BACKEND=django.core.mail.backends.console.EmailBackend (or .filebased,
+# writing to EMAIL_FILE_PATH) replaces SMTP for local testing.
+EMAIL_BACKEND = os.environ.get("EMAIL_BACKEND", 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_FILE_PATH = BASE_DIR / "sent_emails"
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.environ.get("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+# Dispatch layer (users.email_utils): one connection per batch, deduplication
+EMAIL_DEDUPE_SECONDS = 3600     # Window for send_messages(dedupe_key=...)
+EMAIL_DEDUPE_CACHE_ALIAS = "email"  # Shared by web and task workers, so retries see earlier sends
 
 # -----------------------------------
 # Djoser Settings (User management)
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Count, Sum
 from .models import Order, OrderItem
 
 # -----------------------------------
@@ -7,8 +8,14 @@ from .models import Order, OrderItem
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
     # Fields to display in the admin list view
-    list_display = ('order', 'product', 'quantity', 'price')
-    # You could also add filters or search if needed
+    list_display = ('order', 'product', 'seller', 'quantity', 'price', 'created_at')
+    # Order (with its user), product and seller are joined into the page query
+    list_select_related = ('order__user', 'product', 'seller')
+    # Plain id inputs instead of <select>s listing every order and product
+    raw_id_fields = ('order', 'product')
+    # Skip the unfiltered COUNT(*) over the whole table
+    show_full_result_count = False
+    ordering = ('-id',)
 
 # -----------------------------------
 # Admin configuration for Order
@@ -21,13 +28,20 @@ class OrderAdmin(admin.ModelAdmin):
     list_filter = ('status', 'created_at')
     # Search orders by username of the user
     search_fields = ('user__username',)
+    # Users are joined into the page query; the user field is a plain id input
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    # Skip the unfiltered COUNT(*) over the whole table
+    show_full_result_count = False
+    ordering = ('-id',)
 
-    # Override changelist view to add extra context (total sales)
+    # Override changelist view to add the totals of the filtered orders
+    # (rendered by templates/admin/orders/order/change_list.html)
     def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
-        # Calculate the sum of all order totals currently displayed
-        queryset = self.get_queryset(request)
-        total_sales = sum(o.total for o in queryset)
-        extra_context['total_sales'] = total_sales
-        # Pass the extra context to the default changelist view
-        return super().changelist_view(request, extra_context=extra_context)
\ No newline at end of file
+        response = super().changelist_view(request, extra_context=extra_context)
+        changelist = getattr(response, 'context_data', {}).get('cl')
+        if changelist is not None:
+            # One aggregate query over the filtered (not just the displayed) orders
+            totals = changelist.queryset.aggregate(total_sales=Sum('total'), order_count=Count('id'))
+            response.context_data.update(totals)
+        return response
@@ -0,0 +1,153 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from .inventory import release_expired, reserve_many
+from .models import Cart, CartItem, StockReservation
+
+
+def touch_cart(cart_id):
+    """
+    Mark a cart as active now; guest carts untouched for longer than
+    CART_GUEST_TTL_DAYS are swept.
+    """
+    Cart.objects.filter(pk=cart_id).update(updated_at=timezone.now())
+
+
+# -------------------------------
+# Login merge
+# -------------------------------
+def merge_guest_cart(user, session_key):
+    """
+    Fold every guest cart for `session_key` into the user's cart.
+
+    Two UPDATEs per table, whatever the cart sizes: lines (and stock holds)
+    for products the user's cart already has add the guest quantities to
+    it; for the other products the first guest line takes the summed
+    quantity and moves over. The emptied guest carts are then deleted.
+    Returns the user's cart.
+    """
+    with transaction.atomic():
+        cart, _ = Cart.objects.get_or_create(user=user)
+        if not session_key:
+            return cart
+        guest_carts = Cart.objects.filter(session_key=session_key, user__isnull=True).exclude(pk=cart.pk)
+        guest_ids = list(guest_carts.values_list("pk", flat=True))
+        if not guest_ids:
+            return cart
+
+        for model in (CartItem, StockReservation):
+            guest_rows = model.objects.filter(cart_id__in=guest_ids)
+            same_product = guest_rows.filter(product=OuterRef("product"))
+            guest_total = Subquery(
+                same_product.values("product").annotate(total=Sum("quantity")).values("total")[:1]
+            )
+            model.objects.filter(cart=cart, product__in=guest_rows.values("product")).update(
+                quantity=F("quantity") + guest_total
+            )
+            (
+                guest_rows.exclude(product__in=model.objects.filter(cart=cart).values("product"))
+                .filter(pk=Subquery(same_product.order_by("pk").values("pk")[:1]))
+                .update(cart=cart, quantity=guest_total)
+            )
+        Cart.objects.filter(pk__in=guest_ids).delete()
+        touch_cart(cart.pk)
+    return cart
+
+
+def add_to_cart(cart_id, product_id, quantity):
+    """
+    Add `quantity` units of a product to a cart: an F() increment of the
+    existing line, or a new line. If a concurrent request inserts the line
+    first, the unique (cart, product) constraint rejects ours and the
+    increment is applied to theirs instead. Returns the line.
+    """
+    lines = CartItem.objects.filter(cart_id=cart_id, product_id=product_id)
+    with transaction.atomic():
+        if not lines.update(quantity=F("quantity") + quantity):
+            try:
+                with transaction.atomic():
+                    return CartItem.objects.create(cart_id=cart_id, product_id=product_id, quantity=quantity)
+            except IntegrityError:
+                lines.update(quantity=F("quantity") + quantity)
+        return lines.get()
+
+
+# -------------------------------
+# Batch edits
+# -------------------------------
+def apply_cart_operations(cart_id, operations):
+    """
+    Apply a list of cart edits in one transaction with a fixed number of queries.
+
+    Each operation is a dict with `op` ("add", "set" or "remove"),
+    `product_id` and, except for remove, `quantity`. Operations are folded in
+    order into one target quantity per product; the lines are then written
+    with one bulk_create, one bulk_update and one DELETE, and the cart's
+    stock holds are resized to match (raises InsufficientStock).
+    """
+    product_ids = {operation["product_id"] for operation in operations}
+    with transaction.atomic():
+        lines = {item.product_id: item for item in CartItem.objects.filter(cart_id=cart_id, product_id__in=product_ids)}
+
+        targets = {pk: lines[pk].quantity if pk in lines else 0 for pk in product_ids}
+        for operation in operations:
+            pk = operation["product_id"]
+            if operation["op"] == "add":
+                targets[pk] += operation["quantity"]
+            elif operation["op"] == "set":
+                targets[pk] = operation["quantity"]
+            else:
+                targets[pk] = 0
+
+        to_create, to_update, to_delete = [], [], []
+        for pk, quantity in targets.items():
+            line = lines.get(pk)
+            if quantity == 0:
+                if line is not None:
+                    to_delete.append(line.pk)
+            elif line is None:
+                to_create.append(CartItem(cart_id=cart_id, product_id=pk, quantity=quantity))
+            else:
+                line.quantity = quantity
+                to_update.append(line)
+
+        reserve_many(cart_id, targets)
+        # A line created concurrently since the read takes this batch's target quantity
+        CartItem.objects.bulk_create(
+            to_create, update_conflicts=True, unique_fields=["cart", "product"], update_fields=["quantity"]
+        )
+        CartItem.objects.bulk_update(to_update, ["quantity"])
+        CartItem.objects.filter(pk__in=to_delete).delete()
+        touch_cart(cart_id)
+
+
+# -------------------------------
+# Expiry sweep
+# -------------------------------
+def sweep_guest_carts(ttl=None, chunk_size=500):
+    """
+    Delete guest carts (with their lines and holds) untouched for `ttl`,
+    `chunk_size` carts per transaction so the sweep never holds long locks.
+    Expired stock reservations are dropped as well.
+
+    Returns (carts_deleted, reservations_deleted).
+    """
+    if ttl is None:
+        ttl = timedelta(days=getattr(settings, "CART_GUEST_TTL_DAYS", 30))
+    cutoff = timezone.now() - ttl
+    abandoned = Cart.objects.filter(user__isnull=True, updated_at__lt=cutoff).order_by("pk")
+
+    carts_deleted = 0
+    while True:
+        ids = list(abandoned.values_list("pk", flat=True)[:chunk_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            # Lines and holds cascade in one DELETE each
+            Cart.objects.filter(pk__in=ids).delete()
+        carts_deleted += len(ids)
+    return carts_deleted, release_expired()
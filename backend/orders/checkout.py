@@ -0,0 +1,90 @@
+from collections import Counter
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from catalog.models import Product
+from tasks.queue import enqueue
+from .inventory import decrement_stock, held_quantities, release
+from .models import Cart, CartItem, Order, OrderItem
+
+
+class CheckoutError(Exception):
+    """
+    Raised when an order cannot be placed; the message is safe to show to clients.
+    """
+
+
+# -------------------------------
+# Checkout
+# -------------------------------
+# The transaction only does database work, in a fixed number of statements:
+#   1. lock every ordered product in one SELECT ... FOR UPDATE, by ascending
+#      pk, so concurrent checkouts always acquire row locks in the same order
+#      and cannot deadlock on each other;
+#   2. take the quantities out of stock with one conditional UPDATE, leaving
+#      room for other carts' unexpired reservations (orders.inventory);
+#   3. insert the order with its final total (one INSERT, no second save);
+#   4. insert all lines with one bulk_create;
+#   5. empty the buyer's cart and drop its reservations.
+# Refreshing the sellers' sales rollups and emailing the buyer are queued as
+# tasks (tasks.queue) in the same transaction and run by the worker after
+# commit; the order itself never depends on the worker running.
+def place_order(*, user, session_key, lines, email=None, **order_fields):
+    """
+    Create an order for `lines` at current final prices.
+
+    Args:
+        user: Buyer, or None for guest checkout.
+        session_key (str): Guest cart key; its cart is cleared for guests.
+        lines (iterable): (product_id, quantity) pairs; repeated products are merged.
+        email (str): Confirmation recipient when there is no user.
+        **order_fields: shipping_address, payment_method.
+
+    Returns the saved Order. Raises CheckoutError, or InsufficientStock when
+    stock cannot cover the order.
+    """
+    quantities = Counter()
+    for product_id, quantity in lines:
+        quantities[product_id] += quantity
+    if not quantities:
+        raise CheckoutError("An order needs at least one item.")
+
+    if user:
+        carts = Cart.objects.filter(user=user)
+    elif session_key:
+        carts = Cart.objects.filter(session_key=session_key)
+    else:
+        carts = Cart.objects.none()
+
+    with transaction.atomic():
+        products = list(Product.objects.select_for_update().filter(pk__in=quantities).order_by("pk"))
+        if len(products) != len(quantities):
+            raise CheckoutError("Some products in this order are no longer available.")
+        decrement_stock(quantities, held=held_quantities(list(quantities), exclude_carts=carts))
+
+        total = sum((product.final_price * quantities[product.pk] for product in products), Decimal("0.00"))
+        order = Order.objects.create(user=user, session_key=session_key, total=total, **order_fields)
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order, product=product, price=product.final_price, quantity=quantities[product.pk],
+                seller_id=product.seller_id, created_at=order.created_at,
+            )
+            for product in products
+        ])
+
+        CartItem.objects.filter(cart__in=carts).delete()
+        release(carts)
+
+        # Side effects are queued in this transaction and run by the task
+        # worker after commit (see orders.tasks)
+        enqueue(
+            "orders.refresh_sales_rollups",
+            seller_ids=sorted({product.seller_id for product in products}),
+            day=timezone.localdate(order.created_at).isoformat(),
+        )
+        email_to = user.email if user else email
+        if email_to:
+            enqueue("orders.send_order_confirmation", order_id=order.pk, email=email_to)
+    return order
@@ -0,0 +1,83 @@
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import OrderItem
+
+# Output columns, one row per order line, and the field each is read from
+EXPORT_COLUMNS = {
+    "order_id": "order_id",
+    "created_at": "created_at",
+    "status": "order__status",
+    "payment_method": "order__payment_method",
+    "order_total": "order__total",
+    "item_id": "id",
+    "product_id": "product_id",
+    "product_title": "product__title",
+    "seller_id": "seller_id",
+    "quantity": "quantity",
+    "price": "price",
+}
+# Appended to every row: price x quantity, in Decimal
+COMPUTED_COLUMNS = ["line_total"]
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def export_lines(queryset=None, chunk_size=None):
+    """
+    Yield order lines as tuples (EXPORT_COLUMNS, then COMPUTED_COLUMNS), oldest first.
+
+    `queryset` is an OrderItem queryset narrowing the export (a buyer's or
+    seller's lines, a date range). Rows come from a server-side cursor in
+    chunks of `chunk_size` (ORDERS_EXPORT_CHUNK_SIZE), so memory stays flat
+    however many lines there are.
+    """
+    if queryset is None:
+        queryset = OrderItem.objects.all()
+    if chunk_size is None:
+        chunk_size = getattr(settings, "ORDERS_EXPORT_CHUNK_SIZE", 2000)
+    rows = queryset.order_by("created_at", "id").values_list(*EXPORT_COLUMNS.values())
+    for row in rows.iterator(chunk_size=chunk_size):
+        quantity, price = row[-2:]
+        yield row + (price * quantity,)
+
+
+# -------------------------------
+# Encoders
+# -------------------------------
+class _Echo:
+    """
+    File-like object whose write() returns the data, so csv.writer can
+    format one row at a time into a generator.
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_stream(lines):
+    """
+    CSV text chunks: a header row, then one row per line.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow([*EXPORT_COLUMNS, *COMPUTED_COLUMNS])
+    for line in lines:
+        yield writer.writerow(value.isoformat() if hasattr(value, "isoformat") else value for value in line)
+
+
+def ndjson_stream(lines):
+    """
+    Newline-delimited JSON: one object per line.
+    """
+    columns = [*EXPORT_COLUMNS, *COMPUTED_COLUMNS]
+    for line in lines:
+        yield json.dumps(dict(zip(columns, line)), cls=DjangoJSONEncoder) + "\n"
+
+
+ENCODERS = {"csv": csv_stream, "ndjson": ndjson_stream}
@@ -0,0 +1,139 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.utils import timezone
+
+from catalog.cache import touch_products
+from catalog.models import Product
+from .models import StockReservation
+
+
+class InsufficientStock(Exception):
+    """
+    Raised when products cannot cover the requested quantities.
+    `product_ids` lists the products that fell short.
+    """
+
+    def __init__(self, product_ids):
+        self.product_ids = list(product_ids)
+        super().__init__(f"Not enough stock for product(s): {', '.join(map(str, self.product_ids))}.")
+
+
+def reservation_ttl():
+    """
+    How long a cart line holds its stock (CART_RESERVATION_TTL seconds).
+    """
+    return timedelta(seconds=getattr(settings, "CART_RESERVATION_TTL", 15 * 60))
+
+
+# -------------------------------
+# Reservations
+# -------------------------------
+# A reservation holds stock for a cart line until it expires. Holds are soft:
+# they narrow what other carts may reserve or buy, while the hard guarantee
+# (stock never below zero) comes from the conditional decrement at checkout.
+def held_quantities(product_ids, exclude_carts=None):
+    """
+    Units held by unexpired reservations per product, in one grouped query.
+    `exclude_carts` (a Cart queryset or pk list) leaves the buyer's own holds out.
+    """
+    reservations = StockReservation.objects.filter(product_id__in=product_ids, expires_at__gt=timezone.now())
+    if exclude_carts is not None:
+        reservations = reservations.exclude(cart__in=exclude_carts)
+    rows = reservations.values("product_id").annotate(total=Sum("quantity")).values_list("product_id", "total")
+    return dict(rows)
+
+
+def reserve(cart_id, product_id, quantity):
+    """
+    Hold `quantity` units (the line's new total) of a product for a cart,
+    refreshing the expiry. Raises InsufficientStock when other carts' holds
+    leave too little.
+    """
+    with transaction.atomic():
+        # Lock the product row so concurrent holds on it are serialized
+        stock = Product.objects.select_for_update().filter(pk=product_id).values_list("stock", flat=True).first()
+        held = held_quantities([product_id], exclude_carts=[cart_id]).get(product_id, 0)
+        if stock is None or stock - held < quantity:
+            raise InsufficientStock([product_id])
+        StockReservation.objects.update_or_create(
+            cart_id=cart_id, product_id=product_id,
+            defaults={"quantity": quantity, "expires_at": timezone.now() + reservation_ttl()},
+        )
+
+
+def reserve_many(cart_id, quantities):
+    """
+    Set a cart's holds for several products at once ({product_id: units};
+    0 releases the hold), locking the products in pk order. Runs a fixed
+    number of queries however many products change. Raises InsufficientStock
+    naming every product other carts' holds leave too little of.
+    """
+    with transaction.atomic():
+        stock = dict(
+            Product.objects.select_for_update().filter(pk__in=quantities).order_by("pk").values_list("pk", "stock")
+        )
+        held = held_quantities(list(quantities), exclude_carts=[cart_id])
+        short = [pk for pk, units in quantities.items() if units and stock.get(pk, 0) - held.get(pk, 0) < units]
+        if short:
+            raise InsufficientStock(sorted(short))
+        StockReservation.objects.filter(cart_id=cart_id, product_id__in=quantities).delete()
+        expires_at = timezone.now() + reservation_ttl()
+        StockReservation.objects.bulk_create([
+            StockReservation(cart_id=cart_id, product_id=pk, quantity=units, expires_at=expires_at)
+            for pk, units in quantities.items() if units
+        ])
+
+
+def release(carts, product_ids=None):
+    """
+    Drop the holds of `carts` (a Cart queryset or pk list), optionally for some products only.
+    """
+    reservations = StockReservation.objects.filter(cart__in=carts)
+    if product_ids is not None:
+        reservations = reservations.filter(product_id__in=product_ids)
+    reservations.delete()
+
+
+def release_expired():
+    """
+    Delete expired holds; returns how many were removed.
+    """
+    deleted, _ = StockReservation.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+# -------------------------------
+# Stock decrement
+# -------------------------------
+def decrement_stock(quantities, held=None):
+    """
+    Take `quantities` ({product_id: units}) out of stock in one UPDATE.
+
+    Each row is only updated while `stock >= units + held` still holds at
+    write time (`held` maps product ids to units reserved by other carts), so
+    concurrent buyers can never drive stock negative. If any product falls
+    short nothing is changed and InsufficientStock names the short products.
+    After commit, cached catalog responses showing these products are
+    dropped; the rest of the catalog cache stays warm.
+    """
+    held = held or {}
+    required = {pk: units + held.get(pk, 0) for pk, units in quantities.items()}
+
+    def per_product(values):
+        return Case(*[When(pk=pk, then=Value(value)) for pk, value in values.items()], output_field=IntegerField())
+
+    try:
+        with transaction.atomic():
+            updated = (
+                Product.objects.filter(pk__in=quantities, stock__gte=per_product(required))
+                .update(stock=F("stock") - per_product(quantities))
+            )
+            if updated != len(quantities):
+                raise InsufficientStock([])  # roll back the rows that did fit
+            touch_products(quantities)  # update() sends no save signals
+    except InsufficientStock:
+        stock = dict(Product.objects.filter(pk__in=quantities).values_list("pk", "stock"))
+        raise InsufficientStock(sorted(pk for pk in quantities if stock.get(pk, 0) < required[pk]))
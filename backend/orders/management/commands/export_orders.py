@@ -0,0 +1,50 @@
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.exports import ENCODERS, export_lines
+from orders.models import OrderItem
+from orders.rollups import day_bounds
+
+
+class Command(BaseCommand):
+    """
+    Export order lines as CSV or NDJSON, streamed from a server-side cursor.
+
+    Rows are written as they are read (orders.exports), so exporting
+    millions of lines needs no more memory than exporting ten.
+
+    Usage:
+        python manage.py export_orders --format csv --output orders.csv
+        python manage.py export_orders --format ndjson --seller 4 --since 2026-01-01
+    """
+    help = "Stream order lines to a CSV or NDJSON file (or stdout)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(ENCODERS), default="csv", help="Output format.")
+        parser.add_argument("--output", help="File to write (default: stdout).")
+        parser.add_argument("--user", type=int, help="Only orders placed by this user id.")
+        parser.add_argument("--seller", type=int, help="Only lines sold by this user id.")
+        parser.add_argument("--since", help="Only orders from this date on (YYYY-MM-DD).")
+        parser.add_argument("--chunk-size", type=int, default=None, help="Rows fetched per round trip.")
+
+    def handle(self, *args, **options):
+        lines = OrderItem.objects.all()
+        if options["user"] is not None:
+            lines = lines.filter(order__user_id=options["user"])
+        if options["seller"] is not None:
+            lines = lines.filter(seller_id=options["seller"])
+        if options["since"]:
+            try:
+                lines = lines.filter(created_at__gte=day_bounds(date.fromisoformat(options["since"]))[0])
+            except ValueError:
+                raise CommandError("--since must be a date in YYYY-MM-DD format.")
+
+        chunks = ENCODERS[options["format"]](export_lines(lines, chunk_size=options["chunk_size"]))
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as out:
+                out.writelines(chunks)
+            self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}."))
+        else:
+            sys.stdout.writelines(chunks)
@@ -0,0 +1,84 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from catalog.models import Product
+from orders.inventory import InsufficientStock, decrement_stock
+
+
+class Command(BaseCommand):
+    """
+    Hammer a single SKU from many threads and check it never oversells.
+
+    Creates a throwaway product with --stock units, lets --threads workers
+    each try to buy --quantity units --attempts times through the checkout
+    decrement (orders.inventory.decrement_stock), then verifies the final
+    stock and reports throughput. The product is removed afterwards.
+
+    Usage:
+        python manage.py inventory_benchmark --threads 16 --attempts 50 --stock 100
+    """
+    help = "Concurrency benchmark for the conditional stock decrement."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16, help="Concurrent buyers.")
+        parser.add_argument("--attempts", type=int, default=50, help="Purchases attempted per thread.")
+        parser.add_argument("--stock", type=int, default=100, help="Initial stock of the SKU.")
+        parser.add_argument("--quantity", type=int, default=1, help="Units per purchase.")
+
+    def handle(self, *args, **options):
+        threads, attempts = options["threads"], options["attempts"]
+        initial, quantity = options["stock"], options["quantity"]
+
+        seller = User.objects.create(username=f"bench-{uuid.uuid4().hex[:12]}", is_active=False)
+        product = Product.objects.create(seller=seller, title="Inventory benchmark SKU", price=1, stock=initial)
+        counts = {"sold": 0, "rejected": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def buyer():
+            sold = rejected = errors = 0
+            try:
+                for _ in range(attempts):
+                    try:
+                        decrement_stock({product.pk: quantity})
+                        sold += 1
+                    except InsufficientStock:
+                        rejected += 1
+                    except OperationalError:
+                        errors += 1  # lock wait timed out
+            finally:
+                connection.close()  # each thread has its own connection
+            with lock:
+                counts["sold"] += sold
+                counts["rejected"] += rejected
+                counts["errors"] += errors
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                for _ in range(threads):
+                    pool.submit(buyer)
+            elapsed = time.perf_counter() - started
+
+            final = Product.objects.values_list("stock", flat=True).get(pk=product.pk)
+        finally:
+            product.delete()
+            seller.delete()
+
+        total = threads * attempts
+        self.stdout.write(
+            f"{total} attempts from {threads} threads in {elapsed:.2f}s "
+            f"({total / elapsed:.0f} attempts/s, {counts['sold'] / elapsed:.0f} sales/s)"
+        )
+        self.stdout.write(
+            f"sold={counts['sold']} rejected={counts['rejected']} errors={counts['errors']} "
+            f"stock {initial} -> {final}"
+        )
+        if final < 0 or final != initial - counts["sold"] * quantity:
+            raise CommandError("Stock is inconsistent: the decrement oversold or lost updates.")
+        self.stdout.write(self.style.SUCCESS("Stock never went negative and matches the units sold."))
@@ -0,0 +1,39 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.rollups import rebuild_sales_rollups
+
+
+class Command(BaseCommand):
+    """
+    Recompute the daily sales rollups from order history.
+
+    Run once after deploying the rollup tables to backfill past orders, or
+    whenever the rollups need repairing; new orders keep them current through
+    the orders.refresh_sales_rollups task.
+
+    Usage:
+        python manage.py rebuild_sales_rollups
+        python manage.py rebuild_sales_rollups --since 2026-01-01 --seller 4 --seller 7
+    """
+    help = "Rebuild per-seller and per-product daily sales rollups."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Only rebuild days from this date on (YYYY-MM-DD).")
+        parser.add_argument("--seller", type=int, action="append", dest="sellers", help="Limit to a seller id (repeatable).")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per INSERT.")
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since = date.fromisoformat(options["since"])
+            except ValueError:
+                raise CommandError("--since must be a date in YYYY-MM-DD format.")
+        sellers, products = rebuild_sales_rollups(
+            since=since, seller_ids=options["sellers"], batch_size=options["batch_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {sellers} seller-day and {products} product-day rollup rows."
+        ))
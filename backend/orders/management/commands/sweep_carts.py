@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from orders.carts import sweep_guest_carts
+
+
+class Command(BaseCommand):
+    """
+    Delete abandoned guest carts and expired stock reservations.
+
+    Meant to run periodically (e.g. daily from cron).
+
+    Usage:
+        python manage.py sweep_carts --ttl-days 30 --chunk-size 500
+    """
+    help = "Delete guest carts untouched for longer than the TTL, in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ttl-days", type=int, default=getattr(settings, "CART_GUEST_TTL_DAYS", 30),
+            help="Delete guest carts not updated for this many days.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=500, help="Carts deleted per transaction.")
+
+    def handle(self, *args, **options):
+        carts, reservations = sweep_guest_carts(
+            ttl=timedelta(days=options["ttl_days"]), chunk_size=options["chunk_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {carts} abandoned guest carts and {reservations} expired reservations."
+        ))
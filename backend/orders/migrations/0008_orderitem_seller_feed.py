@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:32
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_seller_and_date(apps, schema_editor):
+    """
+    Fill the denormalized columns of existing lines from their product and order.
+    """
+    OrderItem = apps.get_model("orders", "OrderItem")
+    Order = apps.get_model("orders", "Order")
+    Product = apps.get_model("catalog", "Product")
+    OrderItem.objects.update(
+        seller_id=Subquery(Product.objects.filter(pk=OuterRef("product_id")).values("seller_id")[:1]),
+        created_at=Subquery(Order.objects.filter(pk=OuterRef("order_id")).values("created_at")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0008_product_final_price'),
+        ('orders', '0007_cartitem_unique_product'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='seller',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sold_items', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(copy_seller_and_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['seller', '-created_at', '-id'], name='orderitem_seller_created_idx'),
+        ),
+    ]
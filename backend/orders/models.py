@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 from catalog.models import Product
 
 # -----------------------------------
@@ -13,6 +14,14 @@ class Cart(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)  # Record when the cart was created
     updated_at = models.DateTimeField(auto_now=True)      # Record when the cart was last updated
 
+    class Meta:
+        indexes = [
+            # Guest cart lookups by session key
+            models.Index(fields=["session_key"], name="cart_session_key_idx"),
+            # Sweeping abandoned carts (see orders.carts.sweep_guest_carts)
+            models.Index(fields=["updated_at"], name="cart_updated_at_idx"),
+        ]
+
     def __str__(self):
         return f"Cart(user={self.user}, session={self.session_key})"
 
@@ -28,10 +37,40 @@ class CartItem(models.Model):
     # Quantity of this product
     quantity = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        constraints = [
+            # One line per product; adding it again raises the quantity (orders.carts.add_to_cart)
+            models.UniqueConstraint(fields=["cart", "product"], name="cartitem_cart_product_uniq"),
+        ]
+
     def __str__(self):
         return f"{self.quantity} x {self.product.title}"
 
 
+# -----------------------------------
+# StockReservation model
+# -----------------------------------
+# Short-lived hold on stock for a cart line (see orders.inventory).
+# Expired rows are ignored when checking availability and swept later.
+class StockReservation(models.Model):
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name="reservations")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="reservations")
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()  # Hold is released after this moment
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["cart", "product"], name="reservation_cart_product_uniq"),
+        ]
+        indexes = [
+            # Sum of active holds per product
+            models.Index(fields=["product", "expires_at"], name="reservation_product_exp_idx"),
+        ]
+
+    def __str__(self):
+        return f"Reservation({self.quantity} x {self.product_id}, cart={self.cart_id})"
+
+
 # -----------------------------------
 # Order model
 # -----------------------------------
@@ -61,6 +100,12 @@ class Order(models.Model):
     total = models.DecimalField(max_digits=10, decimal_places=2, default=0)  # Total price of the order
     created_at = models.DateTimeField(auto_now_add=True)  # When the order was created
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of a user's order history
+            models.Index(fields=["user", "-created_at", "-id"], name="order_user_created_idx"),
+        ]
+
     def __str__(self):
         return f"Order(id={self.id}, user={self.user}, total=${self.total})"
 
@@ -77,6 +122,60 @@ class OrderItem(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     # Quantity ordered
     quantity = models.PositiveIntegerField(default=1)
+    # Copied from product.seller and order.created_at at checkout, so the
+    # seller's line feed is one index range scan (orders.views.OrderViewSet.seller_orders)
+    seller = models.ForeignKey(
+        User, on_delete=models.SET_NULL, related_name="sold_items", null=True, blank=True, editable=False
+    )
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of a seller's order lines
+            models.Index(fields=["seller", "-created_at", "-id"], name="orderitem_seller_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product.title} (${self.price})"
+
+# -----------------------------------
+# Sales rollups
+# -----------------------------------
+# Daily totals per seller and per product, kept up to date by the
+# orders.refresh_sales_rollups task (see orders.rollups) and read by the
+# seller dashboard instead of scanning order history.
+class SellerDailySales(models.Model):
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name="daily_sales")
+    day = models.DateField()
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    units = models.PositiveIntegerField(default=0)
+    orders = models.PositiveIntegerField(default=0)  # distinct orders with a line from this seller
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["seller", "day"], name="sellersales_seller_day_uniq"),
+        ]
+
+    def __str__(self):
+        return f"SellerDailySales(seller={self.seller_id}, {self.day}, ${self.revenue})"
+
+
+class ProductDailySales(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="daily_sales")
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name="product_daily_sales")
+    day = models.DateField()
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    units = models.PositiveIntegerField(default=0)
+    orders = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["product", "day"], name="productsales_product_day_uniq"),
+        ]
+        indexes = [
+            # A seller's per-product breakdown over a date range
+            models.Index(fields=["seller", "day"], name="productsales_seller_day_idx"),
+        ]
 
     def __str__(self):
-        return f"{self.quantity} x {self.product.title} (${self.price})"
\ No newline at end of file
+        return f"ProductDailySales(product={self.product_id}, {self.day}, ${self.revenue})"
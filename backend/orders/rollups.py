@@ -0,0 +1,109 @@
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import OrderItem, ProductDailySales, SellerDailySales
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+def _totals():
+    """
+    Aggregates shared by every rollup row: revenue, units and distinct orders.
+    """
+    return {
+        "revenue": Sum(F("price") * F("quantity"), output_field=MONEY),
+        "units": Sum("quantity"),
+        "orders": Count("order_id", distinct=True),
+    }
+
+
+def day_bounds(day):
+    """
+    [start, end) datetimes of a calendar day in the current time zone.
+    """
+    start = datetime.combine(day, time.min, tzinfo=timezone.get_current_timezone())
+    return start, start + timedelta(days=1)
+
+
+# -------------------------------
+# Incremental refresh
+# -------------------------------
+def refresh_seller_day(seller_id, day):
+    """
+    Recompute one seller's rollup rows for one day from their order lines.
+
+    Reads only that seller's lines for the day (an index range on
+    OrderItem(seller, created_at)), so the cost does not grow with history,
+    and rewrites the rows with upserts. Recomputing instead of adding deltas
+    makes the refresh idempotent: a retried task cannot double count.
+    """
+    start, end = day_bounds(day)
+    lines = OrderItem.objects.filter(seller_id=seller_id, created_at__gte=start, created_at__lt=end)
+    with transaction.atomic():
+        # Serialize refreshes of the same seller so the last write is never stale
+        User.objects.select_for_update().filter(pk=seller_id).exists()
+        per_product = list(lines.values("product_id").annotate(**_totals()).order_by())
+        totals = lines.aggregate(**_totals())
+
+        ProductDailySales.objects.filter(seller_id=seller_id, day=day).exclude(
+            product_id__in=[row["product_id"] for row in per_product]
+        ).delete()
+        ProductDailySales.objects.bulk_create(
+            [ProductDailySales(seller_id=seller_id, day=day, **row) for row in per_product],
+            update_conflicts=True, unique_fields=["product", "day"],
+            update_fields=["seller", "revenue", "units", "orders"],
+        )
+        if totals["units"]:
+            SellerDailySales.objects.bulk_create(
+                [SellerDailySales(seller_id=seller_id, day=day, **totals)],
+                update_conflicts=True, unique_fields=["seller", "day"],
+                update_fields=["revenue", "units", "orders"],
+            )
+        else:
+            SellerDailySales.objects.filter(seller_id=seller_id, day=day).delete()
+
+
+# -------------------------------
+# Full rebuild
+# -------------------------------
+def rebuild_sales_rollups(since=None, seller_ids=None, batch_size=1000):
+    """
+    Rebuild the rollups from order history with two grouped queries.
+
+    `since` (a date) limits the rebuild to that day onwards and `seller_ids`
+    to some sellers; existing rows in scope are replaced in one transaction.
+    Returns (seller_rows, product_rows) written.
+    """
+    lines = OrderItem.objects.filter(seller__isnull=False)
+    seller_rows = SellerDailySales.objects.all()
+    product_rows = ProductDailySales.objects.all()
+    if since is not None:
+        lines = lines.filter(created_at__gte=day_bounds(since)[0])
+        seller_rows = seller_rows.filter(day__gte=since)
+        product_rows = product_rows.filter(day__gte=since)
+    if seller_ids is not None:
+        lines = lines.filter(seller_id__in=seller_ids)
+        seller_rows = seller_rows.filter(seller_id__in=seller_ids)
+        product_rows = product_rows.filter(seller_id__in=seller_ids)
+
+    daily = lines.annotate(day=TruncDate("created_at")).order_by()
+    with transaction.atomic():
+        seller_rows.delete()
+        product_rows.delete()
+        sellers = SellerDailySales.objects.bulk_create(
+            (SellerDailySales(**row) for row in daily.values("seller_id", "day").annotate(**_totals()).iterator()),
+            batch_size=batch_size,
+        )
+        products = ProductDailySales.objects.bulk_create(
+            (
+                ProductDailySales(**row)
+                for row in daily.values("seller_id", "product_id", "day").annotate(**_totals()).iterator()
+            ),
+            batch_size=batch_size,
+        )
+    return len(sellers), len(products)
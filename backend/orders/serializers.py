@@ -1,45 +1,130 @@
+from datetime import timedelta
+from decimal import Decimal
 from rest_framework import serializers
-from .models import Cart, CartItem, Order, OrderItem
+from .models import Cart, CartItem, Order, OrderItem, SellerDailySales
 from catalog.models import Product
 from catalog.serializers import ProductSerializer
-from django.core.validators import MinLengthValidator
-from django.core.mail import send_mail
+from catalog.fieldsets import SparseFieldsetMixin
 from django.conf import settings
-from django.db import transaction
+from django.core.files.storage import default_storage
+from django.core.validators import MinLengthValidator
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils import timezone
+from .carts import add_to_cart
+from .checkout import CheckoutError, place_order
+from .inventory import InsufficientStock
+
+# Cart money totals, rounded to cents whether they come from SQL
+# annotations (which carry arbitrary scale) or from Python
+MONEY = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
+# -----------------------------------
+# Cart product projection
+# -----------------------------------
+# Slim, read-only view of a product inside a cart line: only what the cart
+# renders, all of it available from the cart items query itself
+# (see orders.views.cart_items_queryset). `image` is the first image's URL.
+# Instances must come from that query: nothing here loads relations itself.
+class CartProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    category = serializers.SlugRelatedField(slug_field="slug", read_only=True)
+    brand = serializers.SlugRelatedField(slug_field="slug", read_only=True)
+    final_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True, coerce_to_string=False)
+    image = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = [
+            "id", "title", "price", "discount_percent", "final_price",
+            "stock", "category", "brand", "image"
+        ]
+        read_only_fields = fields
+
+    def get_image(self, obj):
+        # Selected by the cart items query (CartItemSerializer hands it over)
+        path = getattr(obj, "primary_image", None)
+        if not path:
+            return None
+        url = default_storage.url(path)
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
 
 # -----------------------------------
 # CartItem Serializer
 # -----------------------------------
-class CartItemSerializer(serializers.ModelSerializer):
-    # Nested product representation (read-only)
-    product = ProductSerializer(read_only=True)
+# ?expand=product swaps the slim projection for the full ProductSerializer.
+class CartItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    # Slim product representation (read-only)
+    product = CartProductSerializer(read_only=True)
     # Write-only field to allow creating items by product ID
     product_id = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all(), write_only=True)
-    # Compute the line total (price * quantity, with discount applied if available)
+    # Line total (final price * quantity), computed in SQL when listed
     line_total = serializers.SerializerMethodField()
 
     class Meta:
         model = CartItem
         fields = ["id", "cart", "product", "product_id", "quantity", "line_total"]
         read_only_fields = ["cart"]
+        expandable_fields = {"product": lambda: ProductSerializer(read_only=True)}
 
-    # Override create to use product_id instead of nested product object
+    # Adding a product already in the cart increments its line (one line per product)
     def create(self, validated_data):
         product = validated_data.pop("product_id")
-        return CartItem.objects.create(product=product, **validated_data)
+        return add_to_cart(validated_data["cart"].pk, product.pk, validated_data.get("quantity", 1))
 
-    # Compute total price for this cart item
+    # A line's product is fixed; only the quantity can change
+    def update(self, instance, validated_data):
+        validated_data.pop("product_id", None)
+        return super().update(instance, validated_data)
+
+    def to_representation(self, instance):
+        # Hand the image path selected alongside the row to the product projection
+        if hasattr(instance, "product_image"):
+            instance.product.primary_image = instance.product_image
+        return super().to_representation(instance)
+
+    # Total price for this cart item: annotated by the query, or computed (Decimal)
     def get_line_total(self, obj):
-        price = float(obj.product.price)
-        if hasattr(obj.product, "discount_percent") and obj.product.discount_percent:
-            price = price * (100 - obj.product.discount_percent) / 100
-        return round(price * obj.quantity, 2)
+        if hasattr(obj, "line_total"):
+            return MONEY.to_representation(obj.line_total)
+        return MONEY.to_representation(obj.product.final_price * obj.quantity)
+
+
+# -----------------------------------
+# Cart batch operations
+# -----------------------------------
+# Input for POST /carts/<cart_pk>/items/batch/ (see orders.carts.apply_cart_operations):
+# {"operations": [{"op": "add", "product_id": 3, "quantity": 2},
+#                 {"op": "set", "product_id": 5, "quantity": 1},
+#                 {"op": "remove", "product_id": 7}]}
+class CartOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=["add", "set", "remove"])
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs):
+        if attrs["op"] != "remove" and "quantity" not in attrs:
+            raise serializers.ValidationError({"quantity": "This field is required for add and set."})
+        return attrs
+
+
+class CartBatchSerializer(serializers.Serializer):
+    operations = CartOperationSerializer(many=True, allow_empty=False, max_length=100)
+
+    def validate_operations(self, operations):
+        # Check every referenced product with one query
+        product_ids = {operation["product_id"] for operation in operations}
+        found = set(Product.objects.filter(pk__in=product_ids).values_list("pk", flat=True))
+        missing = sorted(product_ids - found)
+        if missing:
+            raise serializers.ValidationError(f"Unknown product id(s): {', '.join(map(str, missing))}.")
+        return operations
 
 
 # -----------------------------------
 # Cart Serializer
 # -----------------------------------
-class CartSerializer(serializers.ModelSerializer):
+class CartSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     # Nested items
     items = CartItemSerializer(many=True, read_only=True)
     # Compute subtotal for the entire cart
@@ -50,32 +135,37 @@ class CartSerializer(serializers.ModelSerializer):
         fields = ["id", "user", "session_key", "items", "subtotal"]
         read_only_fields = ["user"]
 
+    # Every annotated item row carries its cart's subtotal (window sum)
     def get_subtotal(self, obj):
-        subtotal = 0.0
-        for it in obj.items.all():
-            price = float(it.product.price)
-            if hasattr(it.product, "discount_percent") and it.product.discount_percent:
-                price = price * (100 - it.product.discount_percent) / 100
-            subtotal += price * it.quantity
-        return round(subtotal, 2)
+        items = obj.items.all()
+        if not items:
+            return MONEY.to_representation(Decimal("0.00"))
+        if hasattr(items[0], "cart_subtotal"):
+            return MONEY.to_representation(items[0].cart_subtotal)
+        return MONEY.to_representation(sum((it.product.final_price * it.quantity for it in items), Decimal("0.00")))
 
 
 # -----------------------------------
 # OrderItem Serializer
 # -----------------------------------
-class OrderItemSerializer(serializers.ModelSerializer):
+# ?expand=items.product replaces the product id with the full product.
+class OrderItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    # Product id; checkout resolves all ids of an order in one locked query
+    product = serializers.IntegerField(source="product_id")
     # Display product title (read-only) for convenience
     product_title = serializers.ReadOnlyField(source="product.title")
 
     class Meta:
         model = OrderItem
         fields = ["id", "product", "product_title", "price", "quantity"]
+        read_only_fields = ["price"]  # always the product's final price at checkout
+        expandable_fields = {"product": lambda: ProductSerializer(read_only=True)}
 
 
 # -----------------------------------
 # Order Serializer
 # -----------------------------------
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True)
     # Validate shipping address length
     shipping_address = serializers.CharField(validators=[MinLengthValidator(10)])
@@ -88,54 +178,86 @@ class OrderSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["user", "status", "total", "created_at"]
 
-    # Override create to handle nested order items and compute totals
+    # Override create to hand the nested items to the checkout engine (orders.checkout)
     def create(self, validated_data):
         items_data = validated_data.pop("items")
-        user = self.context["request"].user if self.context["request"].user.is_authenticated else None
-        session_key = self.context["request"].data.get("session_key", "")
-
-        # Use transaction.atomic() to ensure data integrity
-        with transaction.atomic():
-            # Create the order
-            order = Order.objects.create(user=user, session_key=session_key, **validated_data)
-            total = 0.0
-
-            # Loop through each item and create OrderItem
-            for item in items_data:
-                product = item["product"]
-                price = float(product.price)
-                if getattr(product, "discount_percent", 0):
-                    price = price * (100 - product.discount_percent) / 100
-                OrderItem.objects.create(
-                    order=order,
-                    product=product,
-                    price=round(price, 2),
-                    quantity=item["quantity"]
-                )
-                total += price * item["quantity"]
-
-            # Save total on the order
-            order.total = round(total, 2)
-            order.save()
-
-            # Clear user's cart after order creation
-            if user:
-                CartItem.objects.filter(cart__user=user).delete()
-            elif session_key:
-                CartItem.objects.filter(cart__session_key=session_key).delete()
-
-            # Send confirmation email
-            try:
-                email_to = user.email if user else self.context["request"].data.get("email")
-                if email_to:
-                    send_mail(
-                        subject=f"Order Confirmation #{order.id}",
-                        message=f"Thank you for your order! Total: ${order.total}\nShipping to: {order.shipping_address}\nPayment Method: {order.payment_method}",
-                        from_email=settings.DEFAULT_FROM_EMAIL,
-                        recipient_list=[email_to],
-                        fail_silently=True
-                    )
-            except Exception as e:
-                print("Email send failed:", e)
-
-        return order
\ No newline at end of file
+        request = self.context["request"]
+        user = request.user if request.user.is_authenticated else None
+        try:
+            order = place_order(
+                user=user,
+                session_key=request.data.get("session_key", ""),
+                lines=[(item["product_id"], item["quantity"]) for item in items_data],
+                email=request.data.get("email"),
+                **validated_data,
+            )
+        except (CheckoutError, InsufficientStock) as exc:
+            raise serializers.ValidationError({"items": [str(exc)]})
+
+        # Render the response's lines with one query
+        prefetch_related_objects([order], Prefetch("items", queryset=OrderItem.objects.select_related("product").order_by("id")))
+        return order
+
+
+# -----------------------------------
+# Seller order line Serializer
+# -----------------------------------
+# One line of GET /orders/seller/: a seller sees only their own lines,
+# with the order's id, status and date alongside.
+class SellerOrderItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    order = serializers.IntegerField(source="order_id", read_only=True)
+    status = serializers.ReadOnlyField(source="order.status")
+    product = serializers.IntegerField(source="product_id", read_only=True)
+    product_title = serializers.ReadOnlyField(source="product.title")
+    line_total = serializers.SerializerMethodField()
+
+    class Meta:
+        model = OrderItem
+        fields = ["id", "order", "status", "created_at", "product", "product_title", "price", "quantity", "line_total"]
+        read_only_fields = fields
+
+    # Price paid x quantity, in cents like the cart totals
+    def get_line_total(self, obj):
+        return MONEY.to_representation(obj.price * obj.quantity)
+
+
+# -----------------------------------
+# Sales rollup Serializers
+# -----------------------------------
+# Query params of the /sales/ endpoints: an inclusive day range, by default
+# the last SALES_DEFAULT_DAYS days, at most SALES_MAX_DAYS long.
+class SalesRangeSerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        end = attrs.get("end") or timezone.localdate()
+        start = attrs.get("start") or end - timedelta(days=getattr(settings, "SALES_DEFAULT_DAYS", 30) - 1)
+        if start > end:
+            raise serializers.ValidationError({"start": "Must not be after end."})
+        if (end - start).days >= getattr(settings, "SALES_MAX_DAYS", 366):
+            raise serializers.ValidationError({"start": "Date range is too long."})
+        return {"start": start, "end": end}
+
+
+class SalesSummarySerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    units = serializers.IntegerField()
+    orders = serializers.IntegerField()
+
+
+class SellerDailySalesSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SellerDailySales
+        fields = ["day", "revenue", "units", "orders"]
+
+
+# Totals of one product over a range (rows of a grouped ProductDailySales query)
+class ProductSalesSerializer(serializers.Serializer):
+    product = serializers.IntegerField(source="product_id")
+    product_title = serializers.CharField(source="product__title")
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    units = serializers.IntegerField()
+    orders = serializers.IntegerField()
@@ -0,0 +1,41 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+
+from tasks.queue import task
+from users.email_utils import send_messages
+from .models import Order
+from .rollups import refresh_seller_day
+
+
+# -----------------------------------
+# Checkout side effects
+# -----------------------------------
+# Queued by orders.checkout.place_order inside the checkout transaction and
+# run by `manage.py run_tasks` once it has committed.
+@task("orders.send_order_confirmation")
+def send_order_confirmation(order_id, email):
+    """
+    Email the order summary. Errors propagate so the queue retries with backoff.
+    """
+    order = Order.objects.filter(pk=order_id).first()
+    if order is None:
+        return  # order deleted since checkout
+    message = EmailMessage(
+        subject=f"Order Confirmation #{order.id}",
+        body=f"Thank you for your order! Total: ${order.total}\nShipping to: {order.shipping_address}\nPayment Method: {order.payment_method}",
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email],
+    )
+    # A retry after a successful send (e.g. the worker died before acking) is dropped
+    send_messages([message], dedupe_key=f"order-confirmation:{order_id}")
+
+
+@task("orders.refresh_sales_rollups")
+def refresh_sales_rollups(seller_ids, day):
+    """
+    Recompute the day's sales rollups of the sellers in a new order.
+    """
+    for seller_id in seller_ids:
+        refresh_seller_day(seller_id, date.fromisoformat(day))
@@ -0,0 +1,658 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from catalog.models import Product, ProductImage
+from catalog.tests import TEST_CACHES
+from tasks.queue import claim, run
+from .carts import add_to_cart, merge_guest_cart, sweep_guest_carts
+from .checkout import CheckoutError, place_order
+from .inventory import InsufficientStock, decrement_stock
+from .models import Cart, CartItem, Order, OrderItem, ProductDailySales, SellerDailySales, StockReservation
+from .rollups import refresh_seller_day
+from .tasks import send_order_confirmation
+
+
+@override_settings(CACHES=TEST_CACHES)
+class OrdersTestCase(TestCase):
+    """
+    A seller with a discounted sofa and a lamp, and a buyer with an empty cart.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user("seller", "seller@example.com", "pw")
+        cls.buyer = User.objects.create_user("buyer", "buyer@example.com", "pw")
+        cls.other = User.objects.create_user("other", "other@example.com", "pw")
+        cls.sofa = Product.objects.create(
+            seller=cls.seller, title="Sofa", description="", price=Decimal("100.00"), discount_percent=10, stock=5,
+        )
+        cls.lamp = Product.objects.create(seller=cls.seller, title="Lamp", description="", price=Decimal("20.00"), stock=2)
+        cls.cart = Cart.objects.create(user=cls.buyer)
+
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+        self.client = APIClient()
+
+    def stock(self, product):
+        return Product.objects.values_list("stock", flat=True).get(pk=product.pk)
+
+    def hold(self, user, product, quantity):
+        cart = Cart.objects.create(user=user)
+        StockReservation.objects.create(
+            cart=cart, product=product, quantity=quantity, expires_at=timezone.now() + timedelta(minutes=15),
+        )
+        return cart
+
+    def items_url(self, cart, pk=None):
+        url = f"/api/orders/carts/{cart.pk}/items/"
+        return f"{url}{pk}/" if pk else url
+
+
+# -------------------------------
+# Cart pricing
+# -------------------------------
+class CartPricingTests(OrdersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.buyer)
+
+    def test_lines_and_subtotal_are_strings_in_cents(self):
+        CartItem.objects.create(cart=self.cart, product=self.sofa, quantity=3)
+        CartItem.objects.create(cart=self.cart, product=self.lamp, quantity=1)
+        data = self.client.get("/api/orders/carts/my/").data
+        self.assertEqual([item["line_total"] for item in data["items"]], ["270.00", "20.00"])
+        self.assertEqual(data["subtotal"], "290.00")
+        self.assertEqual(self.client.get("/api/orders/carts/my/", {"fields": "subtotal"}).data, {"subtotal": "290.00"})
+
+    def test_listing_items_does_not_query_per_line(self):
+        for i in range(2):
+            CartItem.objects.create(cart=self.cart, product=self.sofa if i else self.lamp)
+        with self.assertNumQueries(2):  # count + priced rows
+            self.client.get(self.items_url(self.cart))
+        for i in range(5):
+            product = Product.objects.create(seller=self.seller, title=f"Stool {i}", description="", price=Decimal("5.00"))
+            ProductImage.objects.create(product=product, image=f"products/stool{i}.jpg")
+            CartItem.objects.create(cart=self.cart, product=product)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.items_url(self.cart))
+        self.assertTrue(response.data["results"][-1]["product"]["image"].endswith("/media/products/stool4.jpg"))
+
+    def test_slim_product_projection(self):
+        ProductImage.objects.create(product=self.lamp, image="products/lamp.jpg")
+        ProductImage.objects.create(product=self.lamp, image="products/lamp-side.jpg")
+        CartItem.objects.create(cart=self.cart, product=self.lamp)
+        product = self.client.get(self.items_url(self.cart)).data["results"][0]["product"]
+        self.assertNotIn("description", product)
+        self.assertTrue(product["image"].endswith("/media/products/lamp.jpg"))
+        expanded = self.client.get(self.items_url(self.cart), {"expand": "product"}).data["results"][0]["product"]
+        self.assertEqual(len(expanded["images"]), 2)
+
+    def test_write_responses_render_like_the_list(self):
+        ProductImage.objects.create(product=self.sofa, image="products/sofa.jpg")
+        response = self.client.post(self.items_url(self.cart), {"product_id": self.sofa.pk, "quantity": 2})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["line_total"], "180.00")
+        self.assertTrue(response.data["product"]["image"].endswith("/media/products/sofa.jpg"))
+
+        item_url = self.items_url(self.cart, response.data["id"])
+        response = self.client.patch(f"{item_url}update_quantity/", {"action": "increase"})
+        self.assertEqual((response.data["quantity"], response.data["line_total"]), (3, "270.00"))
+        response = self.client.patch(item_url, {"quantity": 1})
+        self.assertEqual(response.data["line_total"], "90.00")
+        self.assertTrue(response.data["product"]["image"].endswith("/media/products/sofa.jpg"))
+
+
+# -------------------------------
+# Checkout
+# -------------------------------
+class PlaceOrderTests(OrdersTestCase):
+    def order(self, user, lines, **fields):
+        return place_order(user=user, session_key="", lines=lines, shipping_address="1 Long Street, Town", **fields)
+
+    def test_order_is_priced_from_final_prices(self):
+        order = self.order(self.buyer, [(self.sofa.pk, 1), (self.lamp.pk, 1), (self.sofa.pk, 1)])
+        self.assertEqual(order.total, Decimal("200.00"))  # 2 x 90.00 + 20.00, repeated sofa merged
+        lines = {item.product_id: (item.price, item.quantity) for item in OrderItem.objects.filter(order=order)}
+        self.assertEqual(lines, {self.sofa.pk: (Decimal("90.00"), 2), self.lamp.pk: (Decimal("20.00"), 1)})
+
+    def test_unknown_products_place_nothing(self):
+        with self.assertRaises(CheckoutError):
+            self.order(self.buyer, [(self.sofa.pk, 1), (999999, 1)])
+        with self.assertRaises(CheckoutError):
+            self.order(self.buyer, [])
+        self.assertFalse(Order.objects.exists())
+
+    def test_checkout_empties_the_cart_in_the_transaction(self):
+        CartItem.objects.create(cart=self.cart, product=self.sofa)
+        guest = Cart.objects.create(session_key="guest-1")
+        CartItem.objects.create(cart=guest, product=self.lamp)
+        self.order(self.buyer, [(self.sofa.pk, 1)])
+        place_order(user=None, session_key="guest-1", lines=[(self.lamp.pk, 1)], shipping_address="2 Long Street, Town")
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_confirmation_is_emailed_by_the_task_worker(self):
+        order = self.order(None, [(self.lamp.pk, 2)], email="guest@example.com")
+        self.assertEqual(mail.outbox, [])
+        for job in claim(10):
+            self.assertTrue(run(job))
+        self.assertEqual(mail.outbox[0].to, ["guest@example.com"])
+        self.assertIn(f"#{order.pk}", mail.outbox[0].subject)
+
+    def test_a_retried_confirmation_is_not_sent_twice(self):
+        order = self.order(None, [(self.lamp.pk, 1)], email="guest@example.com")
+        send_order_confirmation(order.pk, "guest@example.com")
+        send_order_confirmation(order.pk, "guest@example.com")
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_api_checkout(self):
+        self.client.force_authenticate(self.buyer)
+        response = self.client.post("/api/orders/orders/", {
+            "shipping_address": "1 Long Street, Town",
+            "items": [{"product": self.sofa.pk, "quantity": 2, "price": "0.01"}],  # price is ignored
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["total"], "180.00")
+        self.assertEqual(response.data["items"][0]["price"], "90.00")
+        response = self.client.post("/api/orders/orders/", {
+            "shipping_address": "1 Long Street, Town", "items": [{"product": 999999, "quantity": 1}],
+        }, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+# -------------------------------
+# Stock
+# -------------------------------
+class DecrementStockTests(OrdersTestCase):
+    def test_takes_units_out_of_stock(self):
+        decrement_stock({self.sofa.pk: 2, self.lamp.pk: 2})
+        self.assertEqual(self.stock(self.sofa), 3)
+        self.assertEqual(self.stock(self.lamp), 0)
+
+    def test_short_product_changes_nothing(self):
+        with self.assertRaises(InsufficientStock) as raised:
+            decrement_stock({self.sofa.pk: 2, self.lamp.pk: 3})
+        self.assertEqual(raised.exception.product_ids, [self.lamp.pk])
+        self.assertEqual(self.stock(self.sofa), 5)
+        self.assertEqual(self.stock(self.lamp), 2)
+
+    def test_never_sells_units_held_by_other_carts(self):
+        with self.assertRaises(InsufficientStock):
+            decrement_stock({self.sofa.pk: 3}, held={self.sofa.pk: 3})
+        decrement_stock({self.sofa.pk: 2}, held={self.sofa.pk: 3})
+        self.assertEqual(self.stock(self.sofa), 3)
+
+    def test_repeated_purchases_stop_at_zero(self):
+        for _ in range(2):
+            decrement_stock({self.lamp.pk: 1})
+        with self.assertRaises(InsufficientStock):
+            decrement_stock({self.lamp.pk: 1})
+        self.assertEqual(self.stock(self.lamp), 0)
+
+
+class OversellTests(OrdersTestCase):
+    def order(self, user, lines):
+        return place_order(user=user, session_key="", lines=lines, shipping_address="1 Long Street, Town")
+
+    def test_insufficient_stock_places_nothing(self):
+        with self.assertRaises(InsufficientStock):
+            self.order(self.buyer, [(self.sofa.pk, 1), (self.lamp.pk, 3)])
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(self.stock(self.sofa), 5)
+        self.assertEqual(self.stock(self.lamp), 2)
+
+    def test_other_carts_reservations_are_not_oversold(self):
+        self.hold(self.other, self.lamp, 2)
+        with self.assertRaises(InsufficientStock):
+            self.order(self.buyer, [(self.lamp.pk, 1)])
+        self.assertEqual(self.stock(self.lamp), 2)
+
+    def test_buyers_own_reservation_counts_for_them(self):
+        CartItem.objects.create(cart=self.cart, product=self.lamp, quantity=2)
+        StockReservation.objects.create(
+            cart=self.cart, product=self.lamp, quantity=2, expires_at=timezone.now() + timedelta(minutes=15),
+        )
+        self.order(self.buyer, [(self.lamp.pk, 2)])
+        self.assertEqual(self.stock(self.lamp), 0)
+        self.assertFalse(StockReservation.objects.filter(cart=self.cart).exists())
+
+    def test_expired_holds_do_not_block_sales(self):
+        cart = self.hold(self.other, self.lamp, 2)
+        StockReservation.objects.filter(cart=cart).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.order(self.buyer, [(self.lamp.pk, 2)])
+        self.assertEqual(self.stock(self.lamp), 0)
+
+    def test_cart_lines_reserve_stock(self):
+        self.client.force_authenticate(self.buyer)
+        response = self.client.post(self.items_url(self.cart), {"product_id": self.lamp.pk, "quantity": 2})
+        self.assertEqual(response.status_code, 201)
+        other_cart = Cart.objects.create(user=self.other)
+        self.client.force_authenticate(self.other)
+        response = self.client.post(self.items_url(other_cart), {"product_id": self.lamp.pk, "quantity": 1})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(CartItem.objects.filter(cart=other_cart).exists())
+
+        self.client.force_authenticate(self.buyer)
+        item = CartItem.objects.get(cart=self.cart)
+        self.client.delete(self.items_url(self.cart, item.pk))
+        self.assertFalse(StockReservation.objects.exists())
+
+
+class StockCacheTests(OrdersTestCase):
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def sell(self, product, quantity=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            place_order(user=self.buyer, session_key="", lines=[(product.pk, quantity)], shipping_address="1 Long Street, Town")
+
+    def test_sales_drop_only_cached_responses_showing_the_product(self):
+        sofa_url = f"/api/catalog/products/{self.sofa.pk}/"
+        lamp_url = f"/api/catalog/products/{self.lamp.pk}/"
+        for url in (sofa_url, lamp_url, "/api/catalog/products/", "/api/catalog/categories/"):
+            self.get(url)
+
+        self.sell(self.sofa, 2)
+        response = self.get(sofa_url)
+        self.assertEqual((response["X-Catalog-Cache"], response.data["stock"]), ("miss", 3))
+        self.assertEqual(self.get("/api/catalog/products/")["X-Catalog-Cache"], "miss")
+        self.assertEqual(self.get(lamp_url)["X-Catalog-Cache"], "hit")
+        self.assertEqual(self.get("/api/catalog/categories/")["X-Catalog-Cache"], "hit")
+
+    def test_sales_drop_featured_pages_showing_the_product(self):
+        Product.objects.filter(pk=self.lamp.pk).update(featured=True)
+        self.assertEqual(self.get("/api/catalog/products/featured/").json()["results"][0]["stock"], 2)
+        self.sell(self.sofa)  # not featured
+        self.assertEqual(self.get("/api/catalog/products/featured/")["X-Catalog-Cache"], "hit")
+        self.sell(self.lamp)
+        response = self.get("/api/catalog/products/featured/")
+        self.assertEqual((response["X-Catalog-Cache"], response.json()["results"][0]["stock"]), ("miss", 1))
+
+
+# -------------------------------
+# Guest carts
+# -------------------------------
+class GuestCartTests(OrdersTestCase):
+    def guest_cart(self, session_key, *lines):
+        cart = Cart.objects.create(session_key=session_key)
+        for product, quantity in lines:
+            CartItem.objects.create(cart=cart, product=product, quantity=quantity)
+            StockReservation.objects.create(
+                cart=cart, product=product, quantity=quantity, expires_at=timezone.now() + timedelta(minutes=15),
+            )
+        return cart
+
+    def lines(self, cart):
+        return sorted(CartItem.objects.filter(cart=cart).values_list("product__title", "quantity"))
+
+    def test_login_merge_moves_every_guest_cart(self):
+        self.guest_cart("guest-1", (self.sofa, 1))
+        self.guest_cart("guest-1", (self.lamp, 2))
+        self.guest_cart("guest-2", (self.lamp, 1))
+        cart = merge_guest_cart(self.buyer, "guest-1")
+        self.assertEqual(cart, self.cart)
+        self.assertEqual(self.lines(cart), [("Lamp", 2), ("Sofa", 1)])
+        self.assertEqual(StockReservation.objects.filter(cart=cart).count(), 2)
+        self.assertEqual(list(Cart.objects.filter(user__isnull=True).values_list("session_key", flat=True)), ["guest-2"])
+
+    def test_my_cart_merges_a_passed_session_key(self):
+        self.guest_cart("guest-1", (self.sofa, 1))
+        self.client.force_authenticate(self.buyer)
+        data = self.client.get("/api/orders/carts/my/", {"session_key": "guest-1"}).data
+        self.assertEqual((data["id"], len(data["items"])), (self.cart.pk, 1))
+
+    def test_sweep_deletes_idle_guest_carts_only(self):
+        idle = self.guest_cart("guest-1", (self.sofa, 1))
+        active = self.guest_cart("guest-2", (self.lamp, 1))
+        long_ago = timezone.now() - timedelta(days=40)
+        Cart.objects.filter(pk__in=[idle.pk, self.cart.pk]).update(updated_at=long_ago)
+        StockReservation.objects.filter(cart=active).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(sweep_guest_carts(ttl=timedelta(days=30), chunk_size=1), (1, 1))
+        self.assertEqual(set(Cart.objects.values_list("pk", flat=True)), {self.cart.pk, active.pk})
+        self.assertEqual(self.lines(active), [("Lamp", 1)])
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_line_changes_keep_the_cart_alive(self):
+        Cart.objects.filter(pk=self.cart.pk).update(updated_at=timezone.now() - timedelta(days=40))
+        self.client.force_authenticate(self.buyer)
+        self.client.post(self.items_url(self.cart), {"product_id": self.lamp.pk, "quantity": 1})
+        self.cart.refresh_from_db()
+        self.assertGreater(self.cart.updated_at, timezone.now() - timedelta(minutes=1))
+
+
+# -------------------------------
+# Batch edits
+# -------------------------------
+class CartBatchTests(OrdersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.buyer)
+
+    def batch(self, *operations):
+        return self.client.post(f"{self.items_url(self.cart)}batch/", {"operations": list(operations)}, format="json")
+
+    def test_operations_fold_in_order(self):
+        CartItem.objects.create(cart=self.cart, product=self.lamp, quantity=2)
+        response = self.batch(
+            {"op": "add", "product_id": self.sofa.pk, "quantity": 2},
+            {"op": "add", "product_id": self.sofa.pk, "quantity": 1},
+            {"op": "set", "product_id": self.lamp.pk, "quantity": 1},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["subtotal"], "290.00")  # 3 x 90.00 + 20.00
+        lines = sorted(CartItem.objects.filter(cart=self.cart).values_list("product_id", "quantity"))
+        self.assertEqual(lines, [(self.sofa.pk, 3), (self.lamp.pk, 1)])
+        holds = dict(StockReservation.objects.filter(cart=self.cart).values_list("product_id", "quantity"))
+        self.assertEqual(holds, {self.sofa.pk: 3, self.lamp.pk: 1})
+
+        self.batch({"op": "remove", "product_id": self.lamp.pk})
+        self.assertEqual(list(CartItem.objects.filter(cart=self.cart).values_list("product_id", flat=True)), [self.sofa.pk])
+        self.assertFalse(StockReservation.objects.filter(product=self.lamp).exists())
+
+    def test_short_stock_changes_nothing(self):
+        response = self.batch(
+            {"op": "add", "product_id": self.sofa.pk, "quantity": 1},
+            {"op": "set", "product_id": self.lamp.pk, "quantity": 3},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(CartItem.objects.exists())
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_invalid_operations_are_rejected(self):
+        self.assertEqual(self.batch({"op": "add", "product_id": 999999, "quantity": 1}).status_code, 400)
+        self.assertEqual(self.batch({"op": "set", "product_id": self.sofa.pk}).status_code, 400)
+        self.assertEqual(self.batch().status_code, 400)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        products = [
+            Product.objects.create(seller=self.seller, title=f"Stool {i}", description="", price=Decimal("5.00"), stock=9)
+            for i in range(6)
+        ]
+        for p in products[:3]:
+            CartItem.objects.create(cart=self.cart, product=p)
+        small = [products[0], products[3]]  # one line updated, one created
+        large = products  # three updated, three created
+        with CaptureQueriesContext(connection) as few:
+            self.batch(*[{"op": "set", "product_id": p.pk, "quantity": 2} for p in small])
+        with CaptureQueriesContext(connection) as many:
+            self.batch(*[{"op": "set", "product_id": p.pk, "quantity": 3} for p in large])
+        self.assertEqual(len(many), len(few))
+
+
+# -------------------------------
+# One line per product
+# -------------------------------
+class CartLineUpsertTests(OrdersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.buyer)
+
+    def test_re_adding_a_product_increments_its_line(self):
+        first = self.client.post(self.items_url(self.cart), {"product_id": self.sofa.pk, "quantity": 1}).data
+        second = self.client.post(self.items_url(self.cart), {"product_id": self.sofa.pk, "quantity": 2}).data
+        self.assertEqual((second["id"], second["quantity"]), (first["id"], 3))
+        self.assertEqual(CartItem.objects.filter(cart=self.cart).count(), 1)
+        self.assertEqual(StockReservation.objects.get(cart=self.cart).quantity, 3)
+
+    def test_lines_are_unique_per_product(self):
+        CartItem.objects.create(cart=self.cart, product=self.sofa)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            CartItem.objects.create(cart=self.cart, product=self.sofa)
+
+    def test_a_lost_insert_race_increments_the_winner(self):
+        winner = CartItem.objects.create(cart=self.cart, product=self.sofa, quantity=2)
+        real_update = QuerySet.update
+        calls = []
+
+        def update(queryset, **kwargs):
+            calls.append(kwargs)
+            return 0 if len(calls) == 1 else real_update(queryset, **kwargs)  # first UPDATE "misses" the line
+
+        with mock.patch.object(QuerySet, "update", update):
+            line = add_to_cart(self.cart.pk, self.sofa.pk, 1)
+        self.assertEqual((line.pk, line.quantity), (winner.pk, 3))
+
+    def test_patch_cannot_change_the_product(self):
+        item = CartItem.objects.create(cart=self.cart, product=self.sofa)
+        self.client.patch(self.items_url(self.cart, item.pk), {"product_id": self.lamp.pk, "quantity": 1})
+        item.refresh_from_db()
+        self.assertEqual(item.product_id, self.sofa.pk)
+
+    def test_login_merge_sums_overlapping_lines(self):
+        CartItem.objects.create(cart=self.cart, product=self.sofa, quantity=1)
+        for quantity in (1, 2):
+            guest = Cart.objects.create(session_key="guest-1")
+            CartItem.objects.create(cart=guest, product=self.sofa, quantity=quantity)
+            CartItem.objects.create(cart=guest, product=self.lamp, quantity=quantity)
+        merge_guest_cart(self.buyer, "guest-1")
+        lines = dict(CartItem.objects.filter(cart=self.cart).values_list("product_id", "quantity"))
+        self.assertEqual(lines, {self.sofa.pk: 4, self.lamp.pk: 3})
+        self.assertFalse(Cart.objects.filter(session_key="guest-1").exists())
+
+
+# -------------------------------
+# Seller order feed
+# -------------------------------
+class SellerFeedTests(OrdersTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.rival = User.objects.create_user("rival", "rival@example.com", "pw")
+        cls.vase = Product.objects.create(seller=cls.rival, title="Vase", description="", price=Decimal("7.50"), stock=9)
+        address = "1 Long Street, Town"
+        cls.first = place_order(user=cls.buyer, session_key="", lines=[(cls.sofa.pk, 1), (cls.vase.pk, 1)], shipping_address=address)
+        cls.second = place_order(user=cls.other, session_key="", lines=[(cls.lamp.pk, 2)], shipping_address=address)
+        Order.objects.filter(pk=cls.second.pk).update(status="SHIPPED")
+
+    def feed(self, **params):
+        self.client.force_authenticate(self.seller)
+        response = self.client.get("/api/orders/orders/seller/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_lists_only_the_sellers_own_lines_newest_first(self):
+        rows = self.feed()["results"]
+        self.assertEqual([row["product_title"] for row in rows], ["Lamp", "Sofa"])
+        self.assertEqual(rows[0]["order"], self.second.pk)
+        self.assertEqual((rows[0]["status"], rows[0]["price"], rows[0]["line_total"]), ("SHIPPED", "20.00", "40.00"))
+
+    def test_filters_by_status_and_date(self):
+        self.assertEqual([row["product_title"] for row in self.feed(status="PENDING")["results"]], ["Sofa"])
+        today = timezone.localdate()
+        self.assertEqual(len(self.feed(created_after=today.isoformat())["results"]), 2)
+        self.assertEqual(self.feed(created_before=(today - timedelta(days=1)).isoformat())["results"], [])
+
+    def test_pages_through_a_cursor_with_fixed_queries(self):
+        page = self.feed(page_size=1)
+        self.assertEqual(len(page["results"]), 1)
+        self.client.force_authenticate(self.seller)
+        with self.assertNumQueries(1):  # lines joined with order and product
+            response = self.client.get(page["next"])
+        self.assertEqual([row["product_title"] for row in response.data["results"]], ["Sofa"])
+
+
+# -------------------------------
+# Sales rollups
+# -------------------------------
+class SalesRollupTests(OrdersTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.rival = User.objects.create_user("rival", "rival@example.com", "pw")
+        cls.vase = Product.objects.create(seller=cls.rival, title="Vase", description="", price=Decimal("7.50"), stock=9)
+        address = "1 Long Street, Town"
+        place_order(user=cls.buyer, session_key="", lines=[(cls.sofa.pk, 2), (cls.lamp.pk, 1), (cls.vase.pk, 1)], shipping_address=address)
+        place_order(user=cls.other, session_key="", lines=[(cls.lamp.pk, 1)], shipping_address=address)
+
+    def setUp(self):
+        super().setUp()
+        for job in claim(10):
+            if job.name == "orders.refresh_sales_rollups":
+                run(job)
+        self.today = timezone.localdate()
+
+    def rows(self):
+        return (
+            list(SellerDailySales.objects.order_by("seller_id").values_list("seller_id", "day", "revenue", "units", "orders")),
+            list(ProductDailySales.objects.order_by("product_id").values_list("product_id", "revenue", "units", "orders")),
+        )
+
+    def sales(self, path, user=None, **params):
+        self.client.force_authenticate(user or self.seller)
+        return self.client.get(f"/api/orders/sales/{path}/", params)
+
+    def test_checkout_queues_a_refresh_per_order(self):
+        self.assertEqual(self.rows()[0], [
+            (self.seller.pk, self.today, Decimal("220.00"), 4, 2),
+            (self.rival.pk, self.today, Decimal("7.50"), 1, 1),
+        ])
+        self.assertEqual(self.rows()[1], [
+            (self.sofa.pk, Decimal("180.00"), 2, 1),
+            (self.lamp.pk, Decimal("40.00"), 2, 2),
+            (self.vase.pk, Decimal("7.50"), 1, 1),
+        ])
+
+    def test_refresh_is_idempotent(self):
+        before = self.rows()
+        refresh_seller_day(self.seller.pk, self.today)
+        refresh_seller_day(self.seller.pk, self.today)
+        self.assertEqual(self.rows(), before)
+
+    def test_rebuild_matches_the_incremental_rows(self):
+        before = self.rows()
+        SellerDailySales.objects.all().delete()
+        ProductDailySales.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_sales_rollups", stdout=out)
+        self.assertIn("Wrote 2 seller-day and 3 product-day", out.getvalue())
+        self.assertEqual(self.rows(), before)
+
+        call_command("rebuild_sales_rollups", "--seller", str(self.rival.pk), stdout=out)
+        self.assertEqual(self.rows(), before)
+
+    def test_endpoints_read_the_sellers_own_rollups(self):
+        self.assertEqual(self.sales("summary").data, {
+            "start": (self.today - timedelta(days=29)).isoformat(), "end": self.today.isoformat(),
+            "revenue": "220.00", "units": 4, "orders": 2,
+        })
+        self.assertEqual(self.sales("daily").data, [
+            {"day": self.today.isoformat(), "revenue": "220.00", "units": 4, "orders": 2},
+        ])
+        products = self.sales("products", limit=1).data
+        self.assertEqual([(row["product_title"], row["revenue"]) for row in products], [("Sofa", "180.00")])
+        self.assertEqual(self.sales("summary", user=self.rival).data["revenue"], "7.50")
+        self.assertEqual(self.sales("summary", user=self.buyer).data["units"], 0)
+
+    def test_ranges_are_validated(self):
+        yesterday = (self.today - timedelta(days=1)).isoformat()
+        self.assertEqual(self.sales("daily", end=yesterday).data, [])
+        self.assertEqual(self.sales("summary", start=self.today.isoformat(), end=yesterday).status_code, 400)
+        self.assertEqual(self.sales("daily", start="2000-01-01").status_code, 400)
+        self.assertEqual(self.sales("products", limit="many").status_code, 400)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get("/api/orders/sales/summary/").status_code, 401)
+
+
+# -------------------------------
+# Orders admin
+# -------------------------------
+class OrderAdminTests(OrdersTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        for total, status in [("10.00", "PENDING"), ("25.50", "PENDING"), ("40.00", "SHIPPED")]:
+            Order.objects.create(user=cls.buyer, total=Decimal(total), status=status, shipping_address="1 Long Street, Town")
+
+    def changelist(self, **params):
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/admin/orders/order/", params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_totals_follow_the_filters(self):
+        response, _ = self.changelist()
+        self.assertEqual((response.context["total_sales"], response.context["order_count"]), (Decimal("75.50"), 3))
+        response, _ = self.changelist(status__exact="PENDING")
+        self.assertEqual((response.context["total_sales"], response.context["order_count"]), (Decimal("35.50"), 2))
+        self.assertContains(response, "<strong>$35.50</strong>")
+
+    def test_query_count_does_not_grow_with_the_rows(self):
+        _, before = self.changelist()
+        other = User.objects.create_user("more", "more@example.com", "pw")
+        for _ in range(5):
+            Order.objects.create(user=other, total=Decimal("1.00"), shipping_address="1 Long Street, Town")
+        _, after = self.changelist()
+        self.assertEqual(after, before)
+
+
+# -------------------------------
+# Order exports
+# -------------------------------
+class OrderExportTests(OrdersTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        address = "1 Long Street, Town"
+        cls.first = place_order(user=cls.buyer, session_key="", lines=[(cls.sofa.pk, 2)], shipping_address=address)
+        cls.second = place_order(user=cls.other, session_key="", lines=[(cls.lamp.pk, 1)], shipping_address=address)
+
+    def export(self, user, **params):
+        self.client.force_authenticate(user)
+        return self.client.get("/api/orders/orders/export/", params)
+
+    def test_csv_streams_the_buyers_own_lines(self):
+        response = self.export(self.buyer)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(rows[0].split(",")[:2], ["order_id", "created_at"])
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(rows[1].startswith(f"{self.first.pk},"))
+        self.assertTrue(rows[1].endswith(",Sofa,%d,2,90.00,180.00" % self.seller.pk))
+
+    def test_ndjson_seller_scope_applies_the_feed_filters(self):
+        response = self.export(self.seller, type="ndjson", scope="seller")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(row) for row in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([row["product_title"] for row in rows], ["Sofa", "Lamp"])
+        self.assertEqual(rows[1]["line_total"], "20.00")
+
+        Order.objects.filter(pk=self.second.pk).update(status="SHIPPED")
+        response = self.export(self.seller, type="ndjson", scope="seller", status="SHIPPED")
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 1)
+
+    def test_scopes_and_types_are_checked(self):
+        self.assertEqual(self.export(self.buyer, scope="all").status_code, 403)
+        self.assertEqual(self.export(self.buyer, scope="everyone").status_code, 400)
+        self.assertEqual(self.export(self.buyer, type="xml").status_code, 400)
+        staff = User.objects.create_user("staff", "staff@example.com", "pw", is_staff=True)
+        response = self.export(staff, scope="all")
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 3)
+
+    def test_command_writes_a_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "orders.ndjson")
+            call_command("export_orders", "--format", "ndjson", "--user", str(self.other.pk), "--output", path, stderr=StringIO())
+            with open(path, encoding="utf-8") as f:
+                rows = [json.loads(row) for row in f]
+        self.assertEqual([(row["order_id"], row["quantity"]) for row in rows], [(self.second.pk, 1)])
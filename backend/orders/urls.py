@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_nested.routers import NestedDefaultRouter
-from .views import CartViewSet, CartItemViewSet, OrderViewSet
+from .views import CartViewSet, CartItemViewSet, OrderViewSet, SalesViewSet
 
 # -----------------------------------
 # Main router for top-level resources
@@ -11,6 +11,8 @@ router = DefaultRouter()
 router.register("carts", CartViewSet, basename="cart")
 # Order endpoints: /orders/
 router.register("orders", OrderViewSet, basename="order")
+# Seller sales rollups: /sales/summary/, /sales/daily/, /sales/products/
+router.register("sales", SalesViewSet, basename="sales")
 
 # -----------------------------------
 # Nested router for cart items
@@ -1,9 +1,85 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from contextlib import contextmanager
+from decimal import Decimal
+from django_filters import rest_framework as django_filters
+from django.db import transaction
+from django.db.models.functions import Greatest
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from .models import Cart, CartItem, Order, OrderItem
-from .serializers import CartSerializer, CartItemSerializer, OrderSerializer
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Prefetch, Subquery, Sum, Window, prefetch_related_objects
+from .models import Cart, CartItem, Order, OrderItem, ProductDailySales, SellerDailySales
+from .serializers import (
+    CartBatchSerializer, CartSerializer, CartItemSerializer, OrderSerializer, ProductSalesSerializer,
+    SalesRangeSerializer, SalesSummarySerializer, SellerDailySalesSerializer, SellerOrderItemSerializer,
+)
+from .inventory import InsufficientStock, release, reserve
+from .carts import apply_cart_operations, merge_guest_cart, touch_cart
+from .exports import CONTENT_TYPES, ENCODERS, export_lines
+from catalog.pagination import KeysetPagination
+from catalog.fieldsets import expanded_fields, selected_fields
+from catalog.models import ProductImage
+from catalog.queries import PRODUCT_RELATIONS, with_product_relations
+
+
+# -----------------------------------
+# Prefetch helpers
+# -----------------------------------
+# Each helper loads only what the (possibly ?fields=-trimmed) response renders.
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+def cart_items_queryset(request, path=()):
+    """
+    CartItem rows priced in SQL, in a single query.
+
+    Each row carries `line_total` (quantity x stored final price) and
+    `cart_subtotal` (a window sum over the row's cart), plus everything the
+    slim product projection renders: product, category and brand are joined
+    and the first image path comes from a correlated subquery. The full
+    product relations are only loaded for ?expand=product.
+    """
+    line_total = ExpressionWrapper(F("quantity") * F("product__final_price"), output_field=MONEY)
+    queryset = CartItem.objects.annotate(
+        line_total=line_total,
+        cart_subtotal=Window(Sum(line_total), partition_by=[F("cart_id")]),
+    ).order_by("id")
+    if "product" in expanded_fields(request, path):
+        relations = selected_fields(request, path + ("product",), PRODUCT_RELATIONS)
+        return with_product_relations(queryset.select_related("product"), fields=relations, prefix="product__")
+    first_image = ProductImage.objects.filter(product=OuterRef("product")).order_by("id").values("image")[:1]
+    return queryset.select_related("product__category", "product__brand").annotate(
+        product_image=Subquery(first_image)
+    )
+
+
+def cart_prefetch(request):
+    return Prefetch("items", queryset=cart_items_queryset(request, ("items",)))
+
+
+def order_items_prefetch(request):
+    """
+    Order lines, joined with their product only when a product field is rendered.
+    """
+    queryset = OrderItem.objects.order_by("id")
+    if "product" in expanded_fields(request, ("items",)):
+        relations = selected_fields(request, ("items", "product"), PRODUCT_RELATIONS)
+        queryset = with_product_relations(queryset.select_related("product"), fields=relations, prefix="product__")
+    elif selected_fields(request, ("items",), ["product_title"]):
+        queryset = queryset.select_related("product")
+    return Prefetch("items", queryset=queryset)
+
+@contextmanager
+def stock_errors():
+    """
+    Turn InsufficientStock into a 400 response on the quantity field.
+    """
+    try:
+        yield
+    except InsufficientStock:
+        raise ValidationError({"quantity": ["Not enough stock available for this product."]})
 
 # -----------------------------------
 # Cart ViewSet
@@ -22,10 +98,10 @@ class CartViewSet(viewsets.ModelViewSet):
         """
         user = self.request.user if self.request.user.is_authenticated else None
         if user:
-            return Cart.objects.filter(user=user)
+            return Cart.objects.filter(user=user).prefetch_related(cart_prefetch(self.request))
         session_key = self.request.query_params.get("session_key", "")
         if session_key:
-            return Cart.objects.filter(session_key=session_key)
+            return Cart.objects.filter(session_key=session_key).prefetch_related(cart_prefetch(self.request))
         return Cart.objects.none()
 
     def perform_create(self, serializer):
@@ -45,9 +121,12 @@ class CartViewSet(viewsets.ModelViewSet):
         session_key = request.query_params.get("session_key", "")
         cart = None
         if user:
-            cart, _ = Cart.objects.get_or_create(user=user)
+            # A session_key from before login pulls that guest cart into the user's
+            cart = merge_guest_cart(user, session_key)
         elif session_key:
             cart, _ = Cart.objects.get_or_create(session_key=session_key)
+        if cart is not None:
+            prefetch_related_objects([cart], cart_prefetch(request))
         serializer = self.get_serializer(cart)
         return Response(serializer.data)
 
@@ -58,7 +137,7 @@ class CartViewSet(viewsets.ModelViewSet):
 class CartItemViewSet(viewsets.ModelViewSet):
     """
     Handles CRUD operations for items inside a cart.
-    Supports updating quantity via custom action.
+    Supports updating quantity via custom action, and batched edits via /batch/.
     """
     serializer_class = CartItemSerializer
     permission_classes = [permissions.AllowAny]
@@ -68,40 +147,105 @@ class CartItemViewSet(viewsets.ModelViewSet):
         Returns items for the specified cart.
         """
         cart_id = self.kwargs["cart_pk"]
-        return CartItem.objects.filter(cart_id=cart_id).order_by("id")
+        return cart_items_queryset(self.request).filter(cart_id=cart_id)
 
     def perform_create(self, serializer):
         """
         Create a new cart item and associate it with the correct cart.
+        The line's stock is reserved in the same transaction, and the response
+        renders the row as listed (priced, with its image).
         """
         cart_id = self.kwargs["cart_pk"]
         cart = get_object_or_404(Cart, pk=cart_id)
-        serializer.save(cart=cart)
+        with transaction.atomic(), stock_errors():
+            item = serializer.save(cart=cart)
+            reserve(cart.pk, item.product_id, item.quantity)
+            touch_cart(cart.pk)
+        serializer.instance = self.get_queryset().get(pk=item.pk)
+
+    def perform_update(self, serializer):
+        """
+        Save the new quantity and resize the line's reservation to match.
+        """
+        with transaction.atomic(), stock_errors():
+            item = serializer.save()
+            reserve(item.cart_id, item.product_id, item.quantity)
+            touch_cart(item.cart_id)
+        serializer.instance = self.get_queryset().get(pk=item.pk)
+
+    def perform_destroy(self, instance):
+        """
+        Remove the line and release its reserved stock.
+        """
+        with transaction.atomic():
+            release([instance.cart_id], [instance.product_id])
+            instance.delete()
+            touch_cart(instance.cart_id)
 
     @action(detail=True, methods=["patch"])
     def update_quantity(self, request, cart_pk=None, pk=None):
         """
         Custom action to increase or decrease the quantity of a cart item.
         Expects 'action' ('increase' or 'decrease') and optional 'quantity' in request data.
+        The change is applied in SQL (F() expressions), so concurrent clicks never
+        overwrite each other, and the reservation follows the new quantity.
         """
-        item = get_object_or_404(CartItem, pk=pk, cart_id=cart_pk)
         action_type = request.data.get("action")
         quantity = int(request.data.get("quantity", 1))
 
         if action_type == "increase":
-            item.quantity += quantity
+            new_quantity = F("quantity") + quantity
         elif action_type == "decrease":
-            item.quantity = max(1, item.quantity - quantity)  # Prevent quantity from going below 1
+            new_quantity = Greatest(F("quantity") - quantity, 1)  # Prevent quantity from going below 1
         else:
             return Response(
                 {"error": "Invalid action, use 'increase' or 'decrease'"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        item.save()
+        with transaction.atomic(), stock_errors():
+            if not CartItem.objects.filter(pk=pk, cart_id=cart_pk).update(quantity=new_quantity):
+                raise Http404
+            item = self.get_queryset().get(pk=pk)
+            reserve(item.cart_id, item.product_id, item.quantity)
+            touch_cart(item.cart_id)
         serializer = self.get_serializer(item)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=["post"])
+    def batch(self, request, cart_pk=None):
+        """
+        Apply several add / set / remove operations to the cart at once, in
+        one transaction, and return the updated cart (CartSerializer).
+        Useful for quick successive edits and restoring a saved cart.
+        """
+        cart = get_object_or_404(Cart, pk=cart_pk)
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            apply_cart_operations(cart.pk, serializer.validated_data["operations"])
+        except InsufficientStock as exc:
+            raise ValidationError({"operations": [str(exc)]})
+
+        prefetch_related_objects([cart], cart_prefetch(request))
+        return Response(CartSerializer(cart, context=self.get_serializer_context()).data)
+
+
+# -----------------------------------
+# Order line filtering
+# -----------------------------------
+class OrderItemFilter(django_filters.FilterSet):
+    """
+    Filter order lines (seller feed, exports) by order status and by order
+    date (`created_after` / `created_before`, whole days, index-friendly ranges).
+    """
+    status = django_filters.ChoiceFilter(field_name="order__status", choices=Order.STATUS_CHOICES)
+    created = django_filters.DateFromToRangeFilter(field_name="created_at")
+
+    class Meta:
+        model = OrderItem
+        fields = ["status", "created"]
+
 
 # -----------------------------------
 # Order ViewSet
@@ -113,20 +257,125 @@ class OrderViewSet(viewsets.ModelViewSet):
     """
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         """
         Returns all orders for the authenticated user, ordered by most recent.
         """
-        return Order.objects.filter(user=self.request.user).order_by("-created_at")
+        return (
+            Order.objects.filter(user=self.request.user)
+            .prefetch_related(order_items_prefetch(self.request))
+            .order_by("-created_at", "-id")
+        )
 
     @action(detail=False, methods=["get"], url_path="seller")
     def seller_orders(self, request):
         """
-        Custom action to retrieve all orders that include products sold by the current user.
-        This is useful for sellers to view orders containing their products.
+        The current seller's order lines, newest first.
+
+        Only lines for the seller's own products are returned, read through
+        the (seller, created_at, id) index and cursor-paginated like the
+        order history. Filters: ?status=, ?created_after= and
+        ?created_before= (dates, inclusive).
         """
-        user = request.user
-        queryset = Order.objects.filter(items__product__seller=user).distinct()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        queryset = (
+            OrderItem.objects.filter(seller=request.user)
+            .select_related("order", "product")
+            .order_by("-created_at", "-id")
+        )
+        filterset = OrderItemFilter(request.query_params, queryset=queryset, request=request)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        page = self.paginate_queryset(filterset.qs)
+        serializer = SellerOrderItemSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Stream order lines as CSV (default) or NDJSON (?type=ndjson).
+
+        ?scope= picks the lines: `mine` (the user's orders, default), `seller`
+        (lines of the user's products) or `all` (staff only). The filters of
+        the seller feed apply. Rows are written while they are read, so the
+        download starts at once and memory stays flat (orders.exports).
+        """
+        kind = request.query_params.get("type", "csv")
+        if kind not in ENCODERS:
+            raise ValidationError({"type": f"Must be one of: {', '.join(ENCODERS)}."})
+        scope = request.query_params.get("scope", "mine")
+        if scope == "mine":
+            lines = OrderItem.objects.filter(order__user=request.user)
+        elif scope == "seller":
+            lines = OrderItem.objects.filter(seller=request.user)
+        elif scope == "all":
+            if not request.user.is_staff:
+                raise PermissionDenied("Only staff can export all orders.")
+            lines = OrderItem.objects.all()
+        else:
+            raise ValidationError({"scope": "Must be one of: mine, seller, all."})
+        filterset = OrderItemFilter(request.query_params, queryset=lines, request=request)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+
+        response = StreamingHttpResponse(ENCODERS[kind](export_lines(filterset.qs)), content_type=CONTENT_TYPES[kind])
+        response["Content-Disposition"] = f'attachment; filename="orders.{kind}"'
+        return response
+
+
+# -----------------------------------
+# Sales ViewSet
+# -----------------------------------
+class SalesViewSet(viewsets.GenericViewSet):
+    """
+    Read-only sales figures for the current seller's dashboard.
+
+    Every endpoint reads the daily rollup tables (orders.rollups), never the
+    order history, and takes ?start= / ?end= dates (default: the last 30 days):
+        GET /sales/summary/   -> totals over the range
+        GET /sales/daily/     -> one row per day with sales
+        GET /sales/products/  -> per-product totals, best sellers first (?limit=, default 20)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_range(self):
+        serializer = SalesRangeSerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data["start"], serializer.validated_data["end"]
+
+    def daily_rows(self):
+        start, end = self.get_range()
+        return SellerDailySales.objects.filter(seller=self.request.user, day__gte=start, day__lte=end)
+
+    @action(detail=False, methods=["get"])
+    def summary(self, request):
+        start, end = self.get_range()
+        totals = self.daily_rows().aggregate(revenue=Sum("revenue"), units=Sum("units"), orders=Sum("orders"))
+        return Response(SalesSummarySerializer({
+            "start": start,
+            "end": end,
+            "revenue": totals["revenue"] or Decimal("0.00"),
+            "units": totals["units"] or 0,
+            "orders": totals["orders"] or 0,
+        }).data)
+
+    @action(detail=False, methods=["get"])
+    def daily(self, request):
+        rows = self.daily_rows().order_by("day")
+        return Response(SellerDailySalesSerializer(rows, many=True).data)
+
+    @action(detail=False, methods=["get"])
+    def products(self, request):
+        start, end = self.get_range()
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", 20)), 100))
+        except ValueError:
+            raise ValidationError({"limit": "Must be an integer."})
+        rows = (
+            ProductDailySales.objects.filter(seller=request.user, day__gte=start, day__lte=end)
+            .values("product_id", "product__title")
+            .annotate(revenue=Sum("revenue"), units=Sum("units"), orders=Sum("orders"))
+            .order_by("-revenue", "product_id")[:limit]
+        )
+        return Response(ProductSalesSerializer(rows, many=True).data)
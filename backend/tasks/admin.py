@@ -0,0 +1,20 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Task
+
+# -----------------------------------
+# Admin configuration for Task
+# -----------------------------------
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    # Fields to display in the admin list view
+    list_display = ("id", "name", "status", "attempts", "max_attempts", "run_at", "created_at")
+    # Filters for easier navigation
+    list_filter = ("status", "name")
+    readonly_fields = ("locked_by", "locked_at", "last_error", "created_at")
+    actions = ["retry_tasks"]
+
+    # Action to re-queue failed (or stuck) tasks immediately
+    def retry_tasks(self, request, queryset):
+        queryset.update(status=Task.PENDING, attempts=0, run_at=timezone.now(), locked_by="", locked_at=None)
+    retry_tasks.short_description = "Retry selected tasks now"
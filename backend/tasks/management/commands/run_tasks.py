@@ -0,0 +1,78 @@
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from tasks.queue import claim, release_stale, run
+
+
+class Command(BaseCommand):
+    """
+    Worker for the database task queue.
+
+    Each of --workers threads repeatedly claims a batch of due tasks and runs
+    them; several worker processes (even on different hosts) can share the
+    queue. Tasks held longer than --lock-timeout are assumed abandoned and
+    re-queued.
+
+    Usage:
+        python manage.py run_tasks --workers 4 --batch-size 20
+        python manage.py run_tasks --once          # drain the queue and exit
+    """
+    help = "Run queued background tasks (emails, image variants, aggregates)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2, help="Worker threads in this process.")
+        parser.add_argument("--batch-size", type=int, default=10, help="Tasks claimed per round trip.")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--lock-timeout", type=int, default=300, help="Seconds before a running task is re-queued.")
+        parser.add_argument("--once", action="store_true", help="Exit once no task is due.")
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        self.counts = {"done": 0, "failed": 0}
+        self.lock = threading.Lock()
+        release_stale(timedelta(seconds=options["lock_timeout"]))
+
+        threads = [
+            threading.Thread(target=self.work, args=(options,), name=f"{socket.gethostname()}-worker-{n}", daemon=True)
+            for n in range(options["workers"])
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping after the current batch...")
+            self.stop.set()
+            for thread in threads:
+                thread.join()
+        self.stdout.write(self.style.SUCCESS(
+            f"Tasks done: {self.counts['done']}, failed attempts: {self.counts['failed']}."
+        ))
+
+    def work(self, options):
+        lock_timeout = timedelta(seconds=options["lock_timeout"])
+        last_sweep = time.monotonic()
+        try:
+            while not self.stop.is_set():
+                if time.monotonic() - last_sweep > lock_timeout.total_seconds():
+                    release_stale(lock_timeout)
+                    last_sweep = time.monotonic()
+                jobs = claim(options["batch_size"])
+                if not jobs:
+                    if options["once"]:
+                        return
+                    self.stop.wait(options["poll_interval"])
+                    continue
+                for job in jobs:
+                    succeeded = run(job)
+                    with self.lock:
+                        self.counts["done" if succeeded else "failed"] += 1
+        finally:
+            connection.close()  # each thread has its own connection
@@ -0,0 +1,39 @@
+from django.db import models
+from django.utils import timezone
+
+
+# -----------------------------------
+# Task model
+# -----------------------------------
+# One row per queued job (see tasks.queue). Rows are written inside the
+# caller's transaction, so a job only becomes visible to workers once the
+# data it refers to has been committed.
+class Task(models.Model):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    FAILED = "FAILED"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (FAILED, "Failed"),
+    ]
+
+    name = models.CharField(max_length=100)                 # Registered handler name
+    payload = models.JSONField(default=dict, blank=True)    # Keyword arguments for the handler
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)       # Runs started so far
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)     # Not claimed before this moment
+    locked_by = models.CharField(max_length=64, blank=True, default="")  # Claim token of the running worker
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim the oldest due pending tasks
+            models.Index(fields=["status", "run_at"], name="task_status_run_at_idx"),
+        ]
+
+    def __str__(self):
+        return f"Task({self.name}, {self.status}, attempts={self.attempts})"
@@ -0,0 +1,131 @@
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+# name -> handler, filled by @task in each app's tasks.py (see TasksConfig.ready)
+REGISTRY = {}
+
+
+def task(name, max_attempts=5):
+    """
+    Register a function as a task handler under `name`.
+
+    Handlers receive the payload as keyword arguments and should be
+    idempotent: a job may run again if its worker dies before finishing.
+
+        @task("orders.send_order_confirmation")
+        def send_order_confirmation(order_id, email):
+            ...
+    """
+    def register(func):
+        REGISTRY[name] = func
+        func.task_name = name
+        func.max_attempts = max_attempts
+        return func
+    return register
+
+
+# -------------------------------
+# Enqueueing
+# -------------------------------
+def enqueue(name, delay=None, **payload):
+    """
+    Queue `name` to run with `payload` (JSON-serializable keyword arguments).
+
+    The row is inserted in the current transaction, so it commits or rolls
+    back together with the caller's writes. With TASKS_EAGER the handler
+    instead runs in-process right after commit (development without a worker).
+    """
+    handler = REGISTRY[name]
+    if getattr(settings, "TASKS_EAGER", False):
+        transaction.on_commit(lambda: handler(**payload))
+        return None
+    return Task.objects.create(
+        name=name,
+        payload=payload,
+        max_attempts=handler.max_attempts,
+        run_at=timezone.now() + (delay or timedelta()),
+    )
+
+
+# -------------------------------
+# Claiming and running
+# -------------------------------
+def backoff(attempts):
+    """
+    Delay before retry number `attempts`: exponential, capped.
+    """
+    base = getattr(settings, "TASKS_RETRY_BASE_SECONDS", 10)
+    cap = getattr(settings, "TASKS_RETRY_MAX_SECONDS", 3600)
+    return timedelta(seconds=min(cap, base * 2 ** (attempts - 1)))
+
+
+def release_stale(lock_timeout):
+    """
+    Return tasks held longer than `lock_timeout` (a crashed worker) to the queue.
+    """
+    cutoff = timezone.now() - lock_timeout
+    return Task.objects.filter(status=Task.RUNNING, locked_at__lt=cutoff).update(
+        status=Task.PENDING, locked_by="", locked_at=None
+    )
+
+
+def claim(batch_size):
+    """
+    Atomically claim up to `batch_size` due tasks for this caller.
+
+    Candidates are selected with SKIP LOCKED where the database supports it;
+    the claim itself is a conditional UPDATE (still PENDING), tagged with a
+    fresh token, so concurrent workers never run the same task twice even
+    without row locks (SQLite).
+    """
+    token = uuid.uuid4().hex
+    now = timezone.now()
+    with transaction.atomic():
+        due = Task.objects.filter(status=Task.PENDING, run_at__lte=now).order_by("run_at", "id")
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return []
+        Task.objects.filter(pk__in=ids, status=Task.PENDING).update(
+            status=Task.RUNNING, locked_by=token, locked_at=now, attempts=F("attempts") + 1
+        )
+    return list(Task.objects.filter(locked_by=token, status=Task.RUNNING).order_by("run_at", "id"))
+
+
+def run(job):
+    """
+    Run one claimed task. Success deletes the row; failure schedules a retry
+    with backoff, or marks it FAILED after max_attempts.
+    Returns True on success.
+    """
+    handler = REGISTRY.get(job.name)
+    try:
+        if handler is None:
+            raise LookupError(f"No task registered as {job.name!r}")
+        handler(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            logger.error("Task %s (%s) failed permanently:\n%s", job.pk, job.name, error)
+            Task.objects.filter(pk=job.pk).update(status=Task.FAILED, locked_by="", locked_at=None, last_error=error)
+        else:
+            logger.warning("Task %s (%s) failed, attempt %s; retrying", job.pk, job.name, job.attempts)
+            Task.objects.filter(pk=job.pk).update(
+                status=Task.PENDING, locked_by="", locked_at=None, last_error=error,
+                run_at=timezone.now() + backoff(job.attempts),
+            )
+        return False
+    Task.objects.filter(pk=job.pk).delete()
+    return True
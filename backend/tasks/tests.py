@@ -0,0 +1,119 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .models import Task
+from .queue import REGISTRY, backoff, claim, enqueue, release_stale, run, task
+
+calls = []
+
+
+@task("tests.record", max_attempts=2)
+def record(value):
+    calls.append(value)
+
+
+@task("tests.explode", max_attempts=2)
+def explode():
+    raise RuntimeError("boom")
+
+
+class TaskQueueTestCase(TestCase):
+    def setUp(self):
+        calls.clear()
+
+
+# -------------------------------
+# Enqueueing
+# -------------------------------
+class EnqueueTests(TaskQueueTestCase):
+    def test_jobs_roll_back_with_the_caller(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            enqueue("tests.record", value=1)
+            raise RuntimeError
+        self.assertFalse(Task.objects.exists())
+
+    def test_unknown_names_are_rejected(self):
+        with self.assertRaises(KeyError):
+            enqueue("tests.missing")
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode_runs_after_commit_without_a_row(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue("tests.record", value=7)
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, [7])
+        self.assertFalse(Task.objects.exists())
+
+
+# -------------------------------
+# Claiming and running
+# -------------------------------
+class RunTests(TaskQueueTestCase):
+    def test_claims_due_jobs_once(self):
+        first = enqueue("tests.record", value=1)
+        enqueue("tests.record", value=2, delay=timedelta(hours=1))
+        jobs = claim(10)
+        self.assertEqual([job.pk for job in jobs], [first.pk])
+        self.assertEqual((jobs[0].status, jobs[0].attempts), (Task.RUNNING, 1))
+        self.assertEqual(claim(10), [])
+
+    def test_success_deletes_the_row(self):
+        enqueue("tests.record", value=3)
+        self.assertTrue(run(claim(1)[0]))
+        self.assertEqual(calls, [3])
+        self.assertFalse(Task.objects.exists())
+
+    def test_failures_retry_with_backoff_then_stay_failed(self):
+        job = enqueue("tests.explode")
+        self.assertFalse(run(claim(1)[0]))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Task.PENDING, 1))
+        self.assertGreater(job.run_at, timezone.now() + backoff(1) - timedelta(seconds=5))
+        self.assertIn("RuntimeError: boom", job.last_error)
+
+        Task.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self.assertFalse(run(claim(1)[0]))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Task.FAILED, 2))
+        self.assertEqual(claim(1), [])
+
+    @override_settings(TASKS_RETRY_BASE_SECONDS=10, TASKS_RETRY_MAX_SECONDS=60)
+    def test_backoff_is_exponential_and_capped(self):
+        self.assertEqual([backoff(n).total_seconds() for n in (1, 2, 3, 4, 5)], [10, 20, 40, 60, 60])
+
+    def test_stale_claims_return_to_the_queue(self):
+        enqueue("tests.record", value=4)
+        job = claim(1)[0]
+        self.assertEqual(release_stale(timedelta(minutes=5)), 0)
+        Task.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(minutes=10))
+        self.assertEqual(release_stale(timedelta(minutes=5)), 1)
+        self.assertEqual([j.pk for j in claim(1)], [job.pk])
+
+    def test_unregistered_handlers_fail(self):
+        job = Task.objects.create(name="tests.gone", max_attempts=1)
+        self.assertNotIn("tests.gone", REGISTRY)
+        self.assertFalse(run(claim(1)[0]))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Task.FAILED)
+
+
+class RunTasksCommandTests(TransactionTestCase):
+    """
+    Worker threads use their own connections, so the jobs must be committed.
+    """
+
+    def setUp(self):
+        calls.clear()
+
+    def test_once_drains_the_queue(self):
+        for value in range(3):
+            enqueue("tests.record", value=value)
+        out = StringIO()
+        call_command("run_tasks", "--once", "--workers", "2", stdout=out)
+        self.assertEqual(sorted(calls), [0, 1, 2])
+        self.assertIn("Tasks done: 3", out.getvalue())
@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Profile
+
+# User fields carried in every token, in addition to the user id
+CLAIM_FIELDS = ("username", "is_staff", "is_active")
+
+
+# -------------------------------
+# Claims
+# -------------------------------
+def is_seller(user):
+    """
+    Whether `user` has a seller profile: the token claim when the user was
+    authenticated from claims, otherwise the (cached) profile row.
+    """
+    if not user.is_authenticated:
+        return False
+    claim = getattr(user, "is_seller", None)
+    if claim is not None:
+        return claim
+    profile = getattr(cached_user(user.pk), "profile", None)
+    return bool(profile and profile.is_seller)
+
+
+def add_user_claims(token, user):
+    """
+    Sign the user's identity flags into `token` (copied to its access tokens).
+    """
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    try:
+        token["is_seller"] = user.profile.is_seller
+    except Profile.DoesNotExist:
+        token["is_seller"] = False
+    return token
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """
+    Refresh token whose access tokens carry the user claims.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        return add_user_claims(super().for_user(user), user)
+
+
+def tokens_for_user(user):
+    """
+    {"refresh": ..., "access": ...} for `user`, as issued by every login path.
+    """
+    refresh = ClaimsRefreshToken.for_user(user)
+    return {"refresh": str(refresh), "access": str(refresh.access_token)}
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Issue a new access token with claims re-read from the database, so
+    changes (deactivation, becoming a seller) apply from the next refresh.
+    """
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        user = User.objects.select_related("profile").filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+        return {"access": str(add_user_claims(refresh.access_token, user))}
+
+
+# -------------------------------
+# Authentication
+# -------------------------------
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the signed claims instead of loading the
+    user row on every request.
+
+    request.user is a real User instance holding only the claimed fields
+    (id, username, is_staff, is_active; `is_seller` as an attribute). It
+    works for ownership checks, ORM filters and foreign keys; any other field
+    is loaded on first access, and saving it only writes the loaded fields.
+    Views needing the full row use cached_user(). Tokens issued without
+    claims fall back to the database lookup.
+
+    Claims are as fresh as the access token: deactivating a user takes
+    effect within ACCESS_TOKEN_LIFETIME.
+    """
+
+    def get_user(self, validated_token):
+        if "is_seller" not in validated_token:
+            return super().get_user(validated_token)
+        try:
+            values = [User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])]
+            values += [validated_token[field] for field in CLAIM_FIELDS]
+        except KeyError:
+            raise AuthenticationFailed(_("Token contained no recognizable user identification"), code="invalid_token")
+        user = User.from_db(router.db_for_read(User), ["id", *CLAIM_FIELDS], values)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        user.is_seller = validated_token["is_seller"]
+        return user
+
+
+# -------------------------------
+# Per-process user cache
+# -------------------------------
+# Full User rows (with profile) for the endpoints that render or check more
+# than the claims. Entries live AUTH_USER_CACHE_SECONDS and are dropped when
+# the user or profile is saved in this process (see users.signals).
+_users = OrderedDict()
+_users_lock = threading.Lock()
+
+
+def cached_user(user_id):
+    """
+    The User row for `user_id` with its profile joined, from the
+    per-process TTL cache. Returns None if the user does not exist.
+    """
+    user_id = User._meta.pk.to_python(user_id)
+    now = time.monotonic()
+    with _users_lock:
+        entry = _users.get(user_id)
+        if entry is not None and entry[0] > now:
+            _users.move_to_end(user_id)
+            return entry[1]
+
+    user = User.objects.select_related("profile").filter(pk=user_id).first()
+    if user is None:
+        return None
+    ttl = getattr(settings, "AUTH_USER_CACHE_SECONDS", 60)
+    with _users_lock:
+        _users[user_id] = (now + ttl, user)
+        _users.move_to_end(user_id)
+        while len(_users) > getattr(settings, "AUTH_USER_CACHE_SIZE", 1024):
+            _users.popitem(last=False)
+    return user
+
+
+def forget_user(user_id):
+    """
+    Drop a user from this process's cache.
+    """
+    with _users_lock:
+        _users.pop(user_id, None)
@@ -3,16 +3,38 @@ from djoser.conf import settings as djoser_settings
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 from django.conf import settings
-from django.contrib.auth.models import User
 from djoser.email import PasswordResetEmail as BasePasswordResetEmail
-from .email_utils import send_email
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
+from .email_utils import build_email, send_messages
+
+# ------------------------------
+# Dispatch through users.email_utils
+# ------------------------------
+class DispatchedEmailMixin:
+    """
+    Send a Djoser email through the shared dispatch layer (deduplicated,
+    sharing the connection of any surrounding batch) instead of a
+    connection of its own.
+
+    build_message(to) renders the email without sending it, so callers can batch
+    many into one send_messages() call.
+    """
+
+    def build_message(self, to):
+        self.render()  # subject and bodies from the template's blocks
+        self.to = to
+        self.from_email = settings.DEFAULT_FROM_EMAIL
+        self.request = None
+        return self
+
+    # Djoser calls send(to); `to` is a list of addresses
+    def send(self, to, fail_silently=False, **kwargs):
+        return send_messages([self.build_message(to)], fail_silently=fail_silently)
+
 
 # ------------------------------
 # Activation Email
 # ------------------------------
-class ActivationEmail(email.ActivationEmail):
+class ActivationEmail(DispatchedEmailMixin, email.ActivationEmail):
     """
     Custom activation email for user account verification.
     Overrides Djoser's default to include a full activation URL using the frontend domain.
@@ -38,13 +60,14 @@ class ActivationEmail(email.ActivationEmail):
 # ------------------------------
 # Password Reset Email
 # ------------------------------
-class PasswordResetEmail(BasePasswordResetEmail):
+class PasswordResetEmail(DispatchedEmailMixin, BasePasswordResetEmail):
     """
-    Custom password reset email that sends a full reset URL and triggers the email utility.
+    Custom password reset email that sends a full reset URL.
     """
+
     def get_context_data(self):
         """
-        Adds custom reset_url and sends the email using the send_email helper.
+        Adds custom reset_url to the context for the email template.
         """
         context = super().get_context_data()
         user = context["user"]
@@ -56,11 +79,18 @@ class PasswordResetEmail(BasePasswordResetEmail):
         # Format reset path and prepend frontend domain
         reset_path = djoser_settings.PASSWORD_RESET_CONFIRM_URL.format(uid=uidb64, token=token)
         context["reset_url"] = f"http://{settings.DOMAIN}/{reset_path}"
-
-        # Send email using reusable email utility
-        send_email("email/password_reset_email", user, context, subject="Password Reset Request")
         return context
 
+    def build_message(self, to):
+        """
+        Render our own reset template (a single email; it used to be sent in
+        addition to Djoser's).
+        """
+        return build_email(
+            "email/password_reset_email.html", to, self.get_context_data(), subject="Password Reset Request",
+            text=f"Hello {self.context['user'].username}, please check your email.",
+        )
+
 # ------------------------------
 # Welcome Email
 # ------------------------------
@@ -69,17 +99,10 @@ def send_welcome_email(user_email):
     Sends a welcome email to a new user after registration.
     Uses both plain-text and HTML email content.
     """
-    subject = "Welcome to Our Site!"
-    from_email = "youremail@example.com"
-    to = [user_email]
-
-    # Plain-text fallback
-    text_content = "Welcome to our site! We're glad to have you."
-
-    # HTML content using template
-    html_content = render_to_string("emails/welcome.html", {"username": user_email})
-
-    # Create and send email with both HTML and plain-text alternatives
-    msg = EmailMultiAlternatives(subject, text_content, from_email, to)
-    msg.attach_alternative(html_content, "text/html")
-    msg.send()
\ No newline at end of file
+    msg = build_email(
+        "users/welcome_email.html", [user_email],
+        {"username": user_email, "domain": settings.DOMAIN, "site_name": getattr(settings, "SITE_NAME", "")},
+        subject="Welcome to Our Site!",
+        text="Welcome to our site! We're glad to have you.",
+    )
+    return send_messages([msg], dedupe_key="welcome")
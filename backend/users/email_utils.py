@@ -1,5 +1,176 @@
+import logging
+import smtplib
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.core import mail
+from django.core.cache import caches
 from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
+from django.template.loader import get_template
+from django.utils.html import strip_tags
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------
+# Rendering
+# -------------------------------
+@lru_cache(maxsize=64)
+def _template(template_name):
+    """
+    Compiled template, loaded and parsed once per process.
+    """
+    return get_template(template_name)
+
+
+def build_email(template_name, to, context=None, subject="Notification", text=None, from_email=None):
+    """
+    Build (but do not send) an email with an HTML body and a plain-text alternative.
+
+    Parameters:
+    - template_name (str): Path of the HTML template, e.g. "email/activation.html".
+    - to (list): Recipient addresses.
+    - context (dict, optional): Template context.
+    - subject (str, optional): Subject line (default: "Notification").
+    - text (str, optional): Plain-text body; defaults to the HTML with tags stripped.
+    - from_email (str, optional): Sender; defaults to DEFAULT_FROM_EMAIL.
+
+    Send the result with send_messages(), usually together with others.
+    """
+    html_content = _template(template_name).render(context or {})
+    if text is None:
+        text = strip_tags(html_content).strip()
+    msg = EmailMultiAlternatives(subject, text, from_email or settings.DEFAULT_FROM_EMAIL, to)
+    msg.attach_alternative(html_content, "text/html")
+    return msg
+
+
+# -------------------------------
+# Connections
+# -------------------------------
+# One backend connection per thread, opened by the outermost
+# email_connection() block and shared by every send inside it, so a bulk
+# send is one SMTP session. It is closed when the block ends (each
+# send_messages() call, or a caller's wider block), so no idle session is
+# left open between requests or tasks.
+_local = threading.local()
+
+
+@contextmanager
+def email_connection():
+    """
+    Open this thread's backend connection for the duration of the block
+    (reusing it if an outer block already opened it) and yield it.
+    """
+    if getattr(_local, "connection", None) is not None:
+        yield _local.connection
+        return
+    _local.connection = mail.get_connection()
+    try:
+        _local.connection.open()
+        yield _local.connection
+    finally:
+        close_connection()
+
+
+def reopen_connection():
+    """
+    Replace this thread's connection after the server dropped it.
+    """
+    connection = _local.connection
+    try:
+        connection.close()
+    except Exception:  # the server already dropped it
+        logger.debug("Error closing email connection", exc_info=True)
+    connection.open()
+    return connection
+
+
+def close_connection():
+    """
+    Close this thread's connection, if any.
+    """
+    connection = getattr(_local, "connection", None)
+    _local.connection = None
+    if connection is not None:
+        try:
+            connection.close()
+        except Exception:  # the server may already have dropped it
+            logger.debug("Error closing email connection", exc_info=True)
+
+
+# -------------------------------
+# Sending
+# -------------------------------
+def _dedupe_cache():
+    """
+    Cache holding the dedupe keys (EMAIL_DEDUPE_CACHE_ALIAS). It must be
+    shared by every process that sends, or a task retried in another
+    worker would send again.
+    """
+    return caches[getattr(settings, "EMAIL_DEDUPE_CACHE_ALIAS", "default")]
+
+
+def _recipients_key(message):
+    return ",".join(sorted(address.lower() for address in message.recipients()))
+
+
+def _deduplicate(messages, dedupe_key):
+    """
+    Drop messages repeated for the same recipients (same subject and body),
+    and with `dedupe_key` any recipient already sent that key in the last
+    EMAIL_DEDUPE_SECONDS.
+    Returns (message, claimed cache key or None) pairs to send.
+    """
+    timeout = getattr(settings, "EMAIL_DEDUPE_SECONDS", 3600)
+    seen = set()
+    unique = []
+    for message in messages:
+        recipients = _recipients_key(message)
+        signature = (recipients, message.subject, message.body)
+        if not recipients or signature in seen:
+            continue
+        seen.add(signature)
+        key = None
+        if dedupe_key is not None:
+            key = f"email-sent:{dedupe_key}:{recipients}"
+            if not _dedupe_cache().add(key, True, timeout):
+                continue
+        unique.append((message, key))
+    return unique
+
+
+def send_messages(messages, fail_silently=False, dedupe_key=None):
+    """
+    Send email messages together over one connection (see email_connection).
+
+    Duplicates are dropped first (see _deduplicate; pass `dedupe_key`, e.g.
+    "order-confirmation:42", to also suppress repeats across calls such as
+    task retries). Messages go out one by one on the open connection, so a
+    failure knows which were delivered: only the dedupe keys of the unsent
+    ones are released for a retry. A connection the server dropped is
+    reopened once. Returns the number of messages sent.
+    """
+    pending = _deduplicate(messages, dedupe_key)
+    sent = 0
+    try:
+        with email_connection() as connection:
+            for message, _ in pending:
+                try:
+                    connection.send_messages([message])
+                except smtplib.SMTPServerDisconnected:
+                    reopen_connection().send_messages([message])
+                sent += 1
+    except Exception:
+        # Release the keys of the messages not sent so a retry can send them
+        _dedupe_cache().delete_many([key for _, key in pending[sent:] if key])
+        if not fail_silently:
+            raise
+        logger.exception("Sending %s email(s) failed", len(pending) - sent)
+    return sent
+
 
 def send_email(template_name, user, context=None, subject="Notification"):
     """
@@ -10,25 +181,9 @@ def send_email(template_name, user, context=None, subject="Notification"):
     - user (User): Django User object to send the email to.
     - context (dict, optional): Additional context variables for rendering the template.
     - subject (str, optional): Subject line of the email (default: "Notification").
-
-    Functionality:
-    1. Renders the HTML template with provided context and the user object.
-    2. Provides a fallback plain-text message.
-    3. Sends the email using Django's EmailMultiAlternatives, allowing both HTML and plain-text versions.
     """
-    from_email = "youremail@example.com"  # Sender email address
-    to = [user.email]  # Recipient list
-
-    # Render HTML template
-    html_content = render_to_string(
-        f"{template_name}.html",
-        {**(context or {}), "user": user}  # Merge context with user
+    msg = build_email(
+        f"{template_name}.html", [user.email], {**(context or {}), "user": user}, subject=subject,
+        text=f"Hello {user.username}, please check your email.",
     )
-
-    # Fallback plain-text content
-    text_content = f"Hello {user.username}, please check your email."
-
-    # Create email object with both plain-text and HTML alternatives
-    msg = EmailMultiAlternatives(subject, text_content, from_email, to)
-    msg.attach_alternative(html_content, "text/html")
-    msg.send()  # Send the email
\ No newline at end of file
+    return send_messages([msg])
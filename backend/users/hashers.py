@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, ScryptPasswordHasher
+
+
+def _cost(name, default):
+    return getattr(settings, "PASSWORD_HASHING", {}).get(name, default)
+
+
+# -------------------------------
+# Tuned hashers
+# -------------------------------
+# Django's hashers with their cost read from settings.PASSWORD_HASHING.
+# Each keeps Django's algorithm name, so existing hashes still verify, and
+# must_update() compares a hash's parameters with the configured ones: after
+# a cost change (or a switch of PASSWORD_HASHER), each user's hash is
+# upgraded the next time they log in (Django's check_password setter).
+# Measure candidate costs with `manage.py benchmark_hashers`.
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256; cost: PBKDF2_ITERATIONS.
+    """
+
+    @property
+    def iterations(self):
+        return _cost("PBKDF2_ITERATIONS", PBKDF2PasswordHasher.iterations)
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """
+    scrypt (standard library, no extra dependency); cost: SCRYPT_WORK_FACTOR
+    (N, a power of two), SCRYPT_BLOCK_SIZE (r) and SCRYPT_PARALLELISM (p).
+    Each hash needs 128 * N * r bytes of memory.
+    """
+
+    @property
+    def work_factor(self):
+        return _cost("SCRYPT_WORK_FACTOR", ScryptPasswordHasher.work_factor)
+
+    @property
+    def block_size(self):
+        return _cost("SCRYPT_BLOCK_SIZE", ScryptPasswordHasher.block_size)
+
+    @property
+    def parallelism(self):
+        return _cost("SCRYPT_PARALLELISM", ScryptPasswordHasher.parallelism)
+
+    @property
+    def maxmem(self):
+        # OpenSSL refuses more than 32 MiB by default (N above 2**14 at r=8).
+        # This is only a ceiling: leave room for the configured cost and for
+        # verifying older hashes made with a larger one.
+        return max(256 * 2 ** 20, 2 * 128 * self.work_factor * self.block_size * self.parallelism)
+
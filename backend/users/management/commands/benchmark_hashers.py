@@ -0,0 +1,75 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _hash_for(hasher, seconds):
+    """
+    Hash passwords with `hasher` for `seconds`; return the number of hashes.
+    Runs in a worker process, so each worker keeps one core busy.
+    """
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        hasher.encode("correct horse battery staple", hasher.salt())
+        count += 1
+    return count
+
+
+def _memory_per_hash(hasher):
+    """
+    Bytes of memory one hash needs, for the memory-hard scrypt hasher.
+    """
+    if hasher.algorithm == "scrypt":
+        return 128 * hasher.work_factor * hasher.block_size
+    return None
+
+
+class Command(BaseCommand):
+    """
+    Measure how many password hashes per second the configured hashers do.
+
+    For each hasher in PASSWORD_HASHERS (with its PASSWORD_HASHING cost),
+    runs one process for --duration seconds, then --processes processes in
+    parallel, and reports hashes/s per core and in total, the time of one
+    hash and its memory. With --target (logins per second at peak) it also
+    reports how many cores logins alone would keep busy.
+
+    Usage:
+        python manage.py benchmark_hashers --duration 5 --target 50
+    """
+    help = "Throughput benchmark for the configured password hashers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--duration", type=float, default=5.0, help="Seconds per measurement.")
+        parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="Parallel workers.")
+        parser.add_argument("--target", type=float, help="Peak logins per second to size for.")
+
+    def handle(self, *args, **options):
+        duration, processes, target = options["duration"], options["processes"], options["target"]
+        if duration <= 0 or processes < 1:
+            raise CommandError("--duration and --processes must be positive.")
+
+        preferred = True
+        for hasher in get_hashers():
+            label = f"{hasher.algorithm} ({type(hasher).__name__})"
+            hasher.encode("warm-up", hasher.salt())
+            single = _hash_for(hasher, duration) / duration
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                total = sum(pool.map(_hash_for, [hasher] * processes, [duration] * processes)) / duration
+
+            line = (
+                f"{label}{' [preferred]' if preferred else ''}: "
+                f"{1000 / single:.1f} ms/hash, {single:.1f} hashes/s on one core, "
+                f"{total:.1f} hashes/s on {processes} processes"
+            )
+            memory = _memory_per_hash(hasher)
+            if memory:
+                line += f", {memory / 2 ** 20:.0f} MiB per hash"
+            self.stdout.write(line)
+            if target:
+                self.stdout.write(f"  {target:g} logins/s needs {target / single:.1f} cores")
+            preferred = False
@@ -1,3 +1,4 @@
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
 from users.models import Profile
 from faker import Faker
@@ -13,27 +14,33 @@ def generate_fake_sellers(n=10):
         n (int): Number of fake sellers to generate. Default is 10.
 
     Workflow:
-        1. Creates a new User instance with realistic first_name, last_name, username, and email.
-        2. Sets a default password ("test1234") for all generated users.
-        3. Creates a related Profile with mobile number and sets 'is_seller' to True.
-    
+        1. Builds User instances with realistic first_name, last_name, username, and email.
+        2. Gives each the default password ("test1234"), hashed separately (own salt).
+        3. Creates a related Profile for each with a mobile number and 'is_seller' set to True.
+
     Notes:
-        - Users are created using 'create_user' to ensure password is hashed correctly.
+        - Password hashing is deliberately slow; lower PASSWORD_HASHING costs
+          (e.g. SCRYPT_WORK_FACTOR) when seeding many users locally.
+        - Users and profiles are inserted with bulk_create (two queries in total).
         - Generated data is suitable for testing or seeding a development database.
     """
-    for _ in range(n):
-        # Create a User with fake credentials
-        user = User.objects.create_user(
-            username=fake.user_name(),
+    users = User.objects.bulk_create([
+        User(
+            username=fake.unique.user_name(),
             email=fake.email(),
-            password="test1234",
+            password=make_password("test1234"),
             first_name=fake.first_name(),
             last_name=fake.last_name()
         )
-        
-        # Create the associated Profile
-        Profile.objects.create(
+        for _ in range(n)
+    ])
+
+    # Create the associated Profiles
+    Profile.objects.bulk_create([
+        Profile(
             user=user,
             mobile=fake.phone_number(),
             is_seller=True
-        )
\ No newline at end of file
+        )
+        for user in users
+    ])
\ No newline at end of file
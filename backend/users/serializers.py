@@ -83,7 +83,8 @@ class RegisterSerializer(serializers.ModelSerializer):
         
         # Extract and set password securely
         password = validated_data.pop("password")
-        user = User.objects.create(**validated_data, is_active=False)
+        # Hash before the first save: one INSERT instead of INSERT + UPDATE
+        user = User(**validated_data, is_active=False)
         user.set_password(password)
         user.save()
 
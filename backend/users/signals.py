@@ -0,0 +1,27 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import forget_user
+from .models import Profile
+
+
+# -------------------------------
+# User cache invalidation
+# -------------------------------
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_saved_user(sender, instance, **kwargs):
+    """
+    Drop a changed user from the per-process cache (users.authentication.cached_user).
+    """
+    forget_user(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def forget_profile_user(sender, instance, **kwargs):
+    """
+    The cached user carries its profile, so profile changes drop it too.
+    """
+    forget_user(instance.user_id)
@@ -0,0 +1,277 @@
+import smtplib
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import caches
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from catalog.models import Product
+from catalog.tests import TEST_CACHES
+from orders.models import Cart, CartItem
+from .authentication import ClaimsJWTAuthentication, cached_user, forget_user, tokens_for_user
+from .email_utils import _local, email_connection, send_messages
+from .throttling import TokenBucketThrottle
+from .models import Profile
+from .seed_data import generate_fake_sellers
+
+
+# -----------------------------------
+# JWT login
+# -----------------------------------
+@override_settings(CACHES=TEST_CACHES)
+class LoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("buyer", "buyer@example.com", "s3cret-pass")
+        seller = User.objects.create_user("seller", "seller@example.com", "pw")
+        cls.sofa = Product.objects.create(seller=seller, title="Sofa", description="", price=Decimal("100.00"), stock=5)
+
+    def setUp(self):
+        caches["throttle"].clear()
+
+    def login(self, **data):
+        return APIClient().post("/api/auth/login/", {"username": "buyer", "password": "s3cret-pass", **data})
+
+    def test_returns_tokens(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), {"access", "refresh"})
+        self.assertEqual(APIClient().post("/api/auth/login/", {"username": "buyer", "password": "x"}).status_code, 401)
+
+    def test_merges_the_guest_cart(self):
+        guest = Cart.objects.create(session_key="guest-1")
+        CartItem.objects.create(cart=guest, product=self.sofa, quantity=2)
+        self.assertEqual(self.login(session_key="guest-1").status_code, 200)
+        cart = Cart.objects.get(user=self.user)
+        self.assertEqual(list(cart.items.values_list("product_id", "quantity")), [(self.sofa.pk, 2)])
+        self.assertFalse(Cart.objects.filter(pk=guest.pk).exists())
+
+
+# -----------------------------------
+# Claims authentication
+# -----------------------------------
+@override_settings(CACHES=TEST_CACHES)
+class ClaimsAuthTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("seller", "seller@example.com", "pw", is_staff=True)
+        Profile.objects.create(user=cls.user, is_seller=True)
+
+    def setUp(self):
+        caches["throttle"].clear()
+        forget_user(self.user.pk)
+
+    def authenticate(self, access):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        return ClaimsJWTAuthentication().authenticate(request)[0]
+
+    def test_login_tokens_carry_the_claims(self):
+        response = APIClient().post("/api/auth/login/", {"username": "seller", "password": "pw"})
+        user = self.authenticate(response.data["access"])
+        self.assertEqual((user.pk, user.username, user.is_staff, user.is_seller), (self.user.pk, "seller", True, True))
+
+    def test_claims_authenticate_without_a_query(self):
+        access = tokens_for_user(self.user)["access"]
+        with self.assertNumQueries(0):
+            user = self.authenticate(access)
+            self.assertTrue(user.is_authenticated and user.is_active)
+        with self.assertNumQueries(1):  # deferred fields load on access
+            self.assertEqual(user.email, "seller@example.com")
+
+    def test_tokens_without_claims_fall_back_to_the_database(self):
+        access = str(RefreshToken.for_user(self.user).access_token)
+        with self.assertNumQueries(1):
+            user = self.authenticate(access)
+        self.assertFalse(hasattr(user, "is_seller"))
+
+    def test_inactive_claims_are_rejected(self):
+        access = tokens_for_user(self.user)["access"]
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.user.is_active = False
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(tokens_for_user(self.user)["access"])
+        self.assertEqual(self.authenticate(access).pk, self.user.pk)  # until it expires
+
+    def test_refresh_rereads_the_claims(self):
+        refresh = tokens_for_user(self.user)["refresh"]
+        Profile.objects.filter(user=self.user).update(is_seller=False)
+        response = APIClient().post("/api/auth/token/refresh/", {"refresh": refresh})
+        self.assertFalse(self.authenticate(response.data["access"]).is_seller)
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(APIClient().post("/api/auth/token/refresh/", {"refresh": refresh}).status_code, 401)
+
+    def test_seller_endpoint_uses_the_claim(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.user)['access']}")
+        with self.assertNumQueries(1):  # the (empty) product page; no user or profile lookups
+            self.assertEqual(client.get("/api/catalog/products/seller/").status_code, 200)
+
+    def test_cached_user_is_dropped_on_save(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(cached_user(self.user.pk).profile.is_seller, True)
+            cached_user(self.user.pk)
+        self.user.profile.is_seller = False
+        self.user.profile.save()
+        self.assertFalse(cached_user(self.user.pk).profile.is_seller)
+
+
+# -----------------------------------
+# Email dispatch
+# -----------------------------------
+@override_settings(CACHES=TEST_CACHES)
+class EmailDispatchTests(TestCase):
+    def setUp(self):
+        caches["email"].clear()
+
+    def message(self, to, body="Hi"):
+        return EmailMessage("Hello", body, "shop@example.com", [to])
+
+    def failing_on(self, address):
+        send = EmailBackend.send_messages
+
+        def send_messages(backend, messages):
+            if messages[0].to == [address]:
+                raise smtplib.SMTPRecipientsRefused({address: (550, b"no")})
+            return send(backend, messages)
+        return mock.patch.object(EmailBackend, "send_messages", send_messages)
+
+    def test_a_batch_shares_one_connection_that_is_closed_after(self):
+        with mock.patch("django.core.mail.get_connection", wraps=mail.get_connection) as get_connection:
+            self.assertEqual(send_messages([self.message(f"user{i}@example.com") for i in range(3)]), 3)
+            with email_connection():
+                send_messages([self.message("a@example.com")])
+                send_messages([self.message("b@example.com")])
+        self.assertEqual(get_connection.call_count, 2)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertIsNone(_local.connection)
+
+    def test_duplicates_are_dropped(self):
+        self.assertEqual(send_messages([self.message("a@example.com"), self.message("A@example.com")]), 1)
+        self.assertEqual(send_messages([self.message("a@example.com")], dedupe_key="order:1"), 1)
+        self.assertEqual(send_messages([self.message("a@example.com", "Again")], dedupe_key="order:1"), 0)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_a_failure_releases_only_the_unsent_keys(self):
+        batch = [self.message(f"{name}@example.com") for name in "abc"]
+        with self.failing_on("b@example.com"), self.assertRaises(smtplib.SMTPRecipientsRefused):
+            send_messages(batch, dedupe_key="notice")
+        self.assertIsNone(_local.connection)
+        self.assertEqual(send_messages(batch, dedupe_key="notice"), 2)
+        self.assertEqual([message.to for message in mail.outbox], [["a@example.com"], ["b@example.com"], ["c@example.com"]])
+
+    def test_fail_silently_logs_and_returns_the_count(self):
+        with self.failing_on("b@example.com"), self.assertLogs("users.email_utils", "ERROR"):
+            sent = send_messages([self.message("a@example.com"), self.message("b@example.com")], fail_silently=True)
+        self.assertEqual(sent, 1)
+
+    def test_resend_activation_sends_each_account_once(self):
+        for name in ("first", "second"):
+            User.objects.create_user(name, "same@example.com", "pw", is_active=False)
+        with mock.patch("django.core.mail.get_connection", wraps=mail.get_connection) as get_connection:
+            response = APIClient().post("/api/auth/resend-activation/", {"email": "same@example.com"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_password_reset_sends_a_single_email(self):
+        User.objects.create_user("buyer", "buyer@example.com", "pw")
+        response = APIClient().post("/api/auth/users/reset_password/", {"email": "buyer@example.com"})
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, "Password Reset Request")
+
+
+# -----------------------------------
+# Auth rate limits
+# -----------------------------------
+@override_settings(CACHES=TEST_CACHES)
+class AuthThrottleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user("buyer", "buyer@example.com", "s3cret-pass")
+
+    def setUp(self):
+        caches["throttle"].clear()
+        self.client = APIClient()
+        # Freeze the clock so no tokens refill while the requests hash passwords
+        patcher = mock.patch.object(TokenBucketThrottle, "timer", lambda throttle: 1000.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def login(self, username="buyer", **headers):
+        return self.client.post("/api/auth/login/", {"username": username, "password": "wrong"}, **headers)
+
+    def test_account_bucket_rejects_before_hashing(self):
+        for _ in range(5):
+            self.assertEqual(self.login().status_code, 401)
+        with mock.patch("rest_framework_simplejwt.serializers.authenticate") as authenticate:
+            response = self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        authenticate.assert_not_called()
+        self.assertEqual(self.login(username="someone").status_code, 401)
+
+    def test_forwarded_for_is_ignored_without_trusted_proxies(self):
+        statuses = [
+            self.login(username=f"user{i}", HTTP_X_FORWARDED_FOR=f"10.0.0.{i}").status_code for i in range(21)
+        ]
+        self.assertEqual(statuses, [401] * 20 + [429])
+
+    def test_trusted_proxies_identify_clients_by_forwarded_for(self):
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "NUM_PROXIES": 1}):
+            for i in range(20):
+                self.login(username=f"user{i}", HTTP_X_FORWARDED_FOR="6.6.6.6, 10.0.0.1")
+            self.assertEqual(self.login(username="late", HTTP_X_FORWARDED_FOR="10.0.0.1").status_code, 429)
+            self.assertEqual(self.login(username="late", HTTP_X_FORWARDED_FOR="10.0.0.1, 10.0.0.2").status_code, 401)
+
+    def test_activation_resend_is_limited_per_address(self):
+        User.objects.create_user("idle", "idle@example.com", "pw", is_active=False)
+        statuses = [
+            self.client.post("/api/auth/resend-activation/", {"email": "IDLE@example.com "}).status_code for _ in range(4)
+        ]
+        self.assertEqual(statuses[-1], 429)
+
+
+# -----------------------------------
+# Password hashing
+# -----------------------------------
+@override_settings(CACHES=TEST_CACHES)
+class PasswordHashingTests(TestCase):
+    def setUp(self):
+        caches["throttle"].clear()
+
+    def login(self, user):
+        response = APIClient().post("/api/auth/login/", {"username": user.username, "password": "s3cret-pass"})
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        return user.password
+
+    def test_new_passwords_use_the_tuned_scrypt(self):
+        user = User.objects.create_user("buyer", "buyer@example.com", "s3cret-pass")
+        self.assertTrue(user.password.startswith(f"scrypt${settings.PASSWORD_HASHING['SCRYPT_WORK_FACTOR']}$"))
+
+    def test_older_algorithms_are_rehashed_on_login(self):
+        user = User.objects.create(username="old", password=make_password("s3cret-pass", hasher="pbkdf2_sha1"))
+        self.assertTrue(self.login(user).startswith("scrypt$"))
+
+    def test_cost_changes_are_applied_on_login(self):
+        user = User.objects.create_user("buyer", "buyer@example.com", "s3cret-pass")
+        with override_settings(PASSWORD_HASHING={**settings.PASSWORD_HASHING, "SCRYPT_WORK_FACTOR": 2 ** 12}):
+            self.assertTrue(self.login(user).startswith("scrypt$4096$"))
+            current = user.password
+            self.assertEqual(self.login(user), current)  # already at the configured cost
+
+    def test_seeded_sellers_get_their_own_salts(self):
+        generate_fake_sellers(2)
+        hashes = list(User.objects.filter(profile__is_seller=True).values_list("password", flat=True))
+        self.assertEqual(len(set(hashes)), 2)
@@ -0,0 +1,146 @@
+import hashlib
+import math
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+
+# -------------------------------
+# Token bucket
+# -------------------------------
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token bucket rate limit in a cache shared by all workers.
+
+    A rate of "N/period" is a bucket of N tokens refilled evenly over the
+    period: bursts of up to N requests pass, then one request per
+    period/N. The bucket is stored as a single timestamp (when it will be
+    full again, GCRA), so each check is one cache read and, if allowed, one
+    write. Rejection happens in DRF's initial(), before the view parses
+    credentials or hashes anything.
+
+    The cache is THROTTLE_CACHE_ALIAS; it must be shared between processes
+    (file, Redis, Memcached) for limits to hold across gunicorn workers.
+    Concurrent requests racing on one bucket can slip a token or two past
+    the limit; the bound still holds.
+    """
+    cache_format = "throttle:%(scope)s:%(ident)s"
+
+    def __init__(self):
+        # The scope (and so the rate) may depend on the view; see allow_request
+        self.cache = caches[getattr(settings, "THROTTLE_CACHE_ALIAS", "default")]
+        self.wait_seconds = None
+
+    def get_scope(self, view):
+        return self.scope
+
+    def allow_request(self, request, view):
+        self.scope = self.get_scope(view)
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        interval = self.duration / self.num_requests
+        full_at = max(self.cache.get(self.key, now), now) + interval
+        if full_at - now > self.duration:
+            self.wait_seconds = full_at - now - self.duration
+            return False
+        self.cache.set(self.key, full_at, math.ceil(full_at - now))
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+# -------------------------------
+# Scopes
+# -------------------------------
+# Views set `throttle_scope` ("login", "register", ...); the rate for each
+# throttle comes from DEFAULT_THROTTLE_RATES["<scope>_ip"] / ["<scope>_account"].
+class ScopedIPThrottle(TokenBucketThrottle):
+    """
+    One bucket per client IP and view scope. The IP is REMOTE_ADDR unless
+    NUM_PROXIES trusted proxies are configured (then it is read from their
+    X-Forwarded-For), so clients cannot pick their own bucket with a forged header.
+    """
+
+    def get_scope(self, view):
+        return f"{view.throttle_scope}_ip"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
+
+
+class ScopedAccountThrottle(TokenBucketThrottle):
+    """
+    One bucket per targeted account (the request's `throttle_account_field`
+    value, e.g. the username), whatever IP the requests come from.
+    """
+
+    def get_scope(self, view):
+        return f"{view.throttle_scope}_account"
+
+    def get_cache_key(self, request, view):
+        field = getattr(view, "throttle_account_field", None) or "username"
+        try:
+            account = request.data.get(field)
+        except AttributeError:  # a body that is not a mapping
+            return None
+        if not account or not isinstance(account, str):
+            return None  # nothing to hash; the view rejects it cheaply
+        ident = hashlib.sha256(account.strip().lower().encode()).hexdigest()[:32]
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class AuthGlobalThrottle(TokenBucketThrottle):
+    """
+    One bucket shared by every client of the hashing endpoints, capping the
+    CPU they may take so a distributed login storm cannot starve other traffic.
+    """
+    scope = "auth_global"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": self.scope, "ident": "all"}
+
+
+class PasswordCheckThrottle(ScopedIPThrottle):
+    """
+    Per-IP limit for the password strength check (a function view, which
+    cannot carry a throttle_scope).
+    """
+
+    def get_scope(self, view):
+        return "validate_password_ip"
+
+
+# -------------------------------
+# Views
+# -------------------------------
+class AuthThrottleMixin:
+    """
+    Throttles for views that hash passwords or send email: per IP, per
+    account (when `throttle_account_field` is set) and the shared global
+    bucket, checked in that order.
+
+    Checking stops at the first bucket that is empty, so a client over its
+    own limit does not also drain the account or global buckets for everyone else.
+    """
+    throttle_account_field = None
+
+    def get_throttles(self):
+        classes = [ScopedIPThrottle]
+        if self.throttle_account_field:
+            classes.append(ScopedAccountThrottle)
+        classes.append(AuthGlobalThrottle)
+        return [throttle() for throttle in classes]
+
+    def check_throttles(self, request):
+        for throttle in self.get_throttles():
+            if not throttle.allow_request(request, self):
+                self.throttled(request, throttle.wait())
@@ -1,7 +1,8 @@
 from django.urls import path, include
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     RegisterView, 
+    LoginView,
     MeView, 
     ProfileMeView, 
     ResendActivationEmail, 
@@ -22,7 +23,7 @@ urlpatterns = [
     # ----------------------------
     # JWT Authentication Endpoints
     # ----------------------------
-    path("login/", TokenObtainPairView.as_view(), name="token_obtain_pair"),  # Obtain JWT tokens (access + refresh)
+    path("login/", LoginView.as_view(), name="token_obtain_pair"),  # Obtain JWT tokens (access + refresh); merges a guest cart
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),  # Refresh access token using refresh token
 
     # ----------------------------
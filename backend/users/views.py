@@ -9,7 +9,11 @@ from django.utils.http import urlsafe_base64_decode
 from django.utils.encoding import force_str
 from django.contrib.auth.tokens import default_token_generator
 from users.email import ActivationEmail, send_welcome_email
-from rest_framework_simplejwt.tokens import RefreshToken
+from users.authentication import cached_user, tokens_for_user
+from users.throttling import AuthThrottleMixin, PasswordCheckThrottle
+from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from orders.carts import merge_guest_cart
 from django.http import JsonResponse, HttpResponse
 from django.shortcuts import redirect
 from social_core.exceptions import AuthCanceled
@@ -17,10 +21,35 @@ from django.utils.deprecation import MiddlewareMixin
 import re
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
-from django.core.mail import send_mail
-from rest_framework.decorators import api_view
+from django.core.mail import EmailMessage
+from users.email_utils import send_messages
+from rest_framework.decorators import api_view, throttle_classes
 from django.conf import settings
 
+# -----------------------------------
+# JWT login
+# -----------------------------------
+class LoginView(AuthThrottleMixin, TokenObtainPairView):
+    """
+    Obtain JWT tokens (access + refresh).
+    An optional `session_key` merges that guest cart into the user's cart.
+    Rate limited per IP and per username before the password is hashed.
+    """
+    throttle_scope = "login"
+    throttle_account_field = "username"
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+
+        session_key = request.data.get("session_key")
+        if session_key:
+            merge_guest_cart(serializer.user, session_key)
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
+
 # -----------------------------------
 # Simple API for sending arbitrary email
 # -----------------------------------
@@ -34,13 +63,7 @@ def send_email(request):
     message = request.data.get('message', 'No Content')
     recipient = request.data.get('recipient', 'yourmail@example.com')
 
-    send_mail(
-        subject,
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-        [recipient],
-        fail_silently=False,
-    )
+    send_messages([EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [recipient])])
     return Response({"status": "Email sent successfully!"})
 
 # -----------------------------------
@@ -71,12 +94,12 @@ class SocialAuthExceptionMiddleware(MiddlewareMixin):
 def social_login_jwt(request):
     user = request.user
     if user.is_authenticated:
-        refresh = RefreshToken.for_user(user)
+        tokens = tokens_for_user(user)
         profile = getattr(user, "profile", None)
 
         return JsonResponse({
-            'access': str(refresh.access_token),
-            'refresh': str(refresh),
+            'access': tokens['access'],
+            'refresh': tokens['refresh'],
             'username': user.username,
             'email': user.email,
             'is_seller': profile.is_seller if profile else False,
@@ -92,11 +115,7 @@ class SocialLoginJWT(APIView):
     def post(self, request):
         user = request.user
         if user.is_authenticated:
-            refresh = RefreshToken.for_user(user)
-            return Response({
-                "access": str(refresh.access_token),
-                "refresh": str(refresh)
-            })
+            return Response(tokens_for_user(user))
         return Response({"detail": "User not authenticated"}, status=401)
 
 # -----------------------------------
@@ -117,11 +136,9 @@ class ActivateAccount(APIView):
         if user and default_token_generator.check_token(user, token):
             user.is_active = True
             user.save()
-            refresh = RefreshToken.for_user(user)
             return Response({
                 "detail": "Account activated successfully.",
-                "access": str(refresh.access_token),
-                "refresh": str(refresh)
+                **tokens_for_user(user),
             }, status=200)
         else:
             return Response({"detail": "Invalid activation link."}, status=400)
@@ -129,7 +146,11 @@ class ActivateAccount(APIView):
 # -----------------------------------
 # Resend activation email for inactive accounts
 # -----------------------------------
-class ResendActivationEmail(APIView):
+class ResendActivationEmail(AuthThrottleMixin, APIView):
+    # Rate limited per IP and per address (SMTP work)
+    throttle_scope = "activation"
+    throttle_account_field = "email"
+
     def post(self, request):
         email = request.data.get('email')
         if not email:
@@ -139,22 +160,20 @@ class ResendActivationEmail(APIView):
         if not users.exists():
             return Response({"detail": "No inactive account found with this email."}, status=404)
         
-        errors = []
-        for user in users:
-            try:
-                email_obj = ActivationEmail(context={'user': user})
-                email_obj.send(to=[user.email])
-            except Exception as e:
-                errors.append(str(e))
-        
-        if errors:
-            return Response({"detail": f"Some emails failed to send: {errors}"}, status=500)
+        # Render every account's email, then send them together over one connection
+        messages = [ActivationEmail(context={'user': user}).build_message([user.email]) for user in users]
+        try:
+            send_messages(messages)
+        except Exception as e:
+            return Response({"detail": f"Some emails failed to send: {e}"}, status=500)
         return Response({"detail": "Activation email resent."}, status=200)
 
 # -----------------------------------
 # Register a new user
 # -----------------------------------
-class RegisterView(generics.CreateAPIView):
+class RegisterView(AuthThrottleMixin, generics.CreateAPIView):
+    # Rate limited per IP (password validation and hashing)
+    throttle_scope = "register"
     queryset = User.objects.all()
     serializer_class = RegisterSerializer
     permission_classes = [permissions.AllowAny]
@@ -168,7 +187,10 @@ class MeView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        # Reads come from the per-process user cache; updates load a fresh row
+        if self.request.method in permissions.SAFE_METHODS:
+            return cached_user(self.request.user.pk)
+        return User.objects.get(pk=self.request.user.pk)
 
 # -----------------------------------
 # Retrieve or update the authenticated user's profile
@@ -186,6 +208,7 @@ class ProfileMeView(generics.RetrieveUpdateAPIView):
 # Validate user password with custom rules
 # -----------------------------------
 @api_view(["POST"])
+@throttle_classes([PasswordCheckThrottle])
 def validate_user_password(request):
     """
     Validates password strength using Django validators + custom rules.
@@ -24,6 +24,8 @@ export const carts = {
   updateItem: (cartId, itemId, data) =>
     API.put(`/carts/${cartId}/items/${itemId}/`, data),
   deleteItem: (cartId, itemId) => API.delete(`/carts/${cartId}/items/${itemId}/`),
+  // operations: [{ op: "add" | "set" | "remove", product_id, quantity }]; returns the whole cart
+  batchItems: (cartId, operations) => API.post(`/orders/carts/${cartId}/items/batch/`, { operations }),
 };
 
 export const orders = {
@@ -88,6 +88,7 @@ const LoginSignUp = () => {
       const response = await API.post("/auth/login/", {
         username: loginData.username,
         password: loginData.password,
+        session_key: localStorage.getItem("guest_cart_key") || undefined, // merge a guest cart, if any
       });
 
       const data = response.data;
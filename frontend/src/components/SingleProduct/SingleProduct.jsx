@@ -16,6 +16,7 @@ const SingleProduct = () => {
 
   // State variables
   const [product, setProduct] = useState(null);
+  const [reviews, setReviews] = useState([]);
   const [relatedProducts, setRelatedProducts] = useState([]);
   const [loading, setLoading] = useState(true);
   const [added, setAdded] = useState(false);
@@ -44,6 +45,22 @@ const SingleProduct = () => {
     fetchProduct();
   }, [id]);
 
+  /**
+   * Fetch the latest page of reviews (products only carry a rating summary)
+   */
+  useEffect(() => {
+    const fetchReviews = async () => {
+      try {
+        const res = await fetch(`${API_BASE}/catalog/products/${id}/reviews/`);
+        const data = await res.json();
+        setReviews(data.results || []);
+      } catch (err) {
+        console.error('Failed to fetch reviews:', err);
+      }
+    };
+    fetchReviews();
+  }, [id]);
+
   /**
    * Fetch related products whenever main product changes
    * Excludes the current product itself
@@ -115,7 +132,7 @@ const SingleProduct = () => {
       });
       if (!res.ok) throw new Error('Failed to submit review');
       const newReview = await res.json();
-      setProduct(prev => ({ ...prev, reviews: [newReview, ...(prev.reviews || [])] }));
+      setReviews(prev => [newReview, ...prev]);
       setComment("");
       setRating(5);
     } catch (err) {
@@ -135,10 +152,8 @@ const SingleProduct = () => {
   if (error) return <p className="text-center mt-5">{error}</p>;
   if (!product) return <p className="text-center mt-5">❌ Product not found.</p>;
 
-  // Calculate average rating
-  const avgRating = product.reviews && product.reviews.length > 0 
-    ? (product.reviews.reduce((sum, r) => sum + r.rating, 0) / product.reviews.length).toFixed(1)
-    : null;
+  // Average rating is precomputed by the API
+  const avgRating = product.review_count > 0 ? product.rating_avg.toFixed(1) : null;
 
   return (
     <>
@@ -233,8 +248,8 @@ const SingleProduct = () => {
         <Row className="mt-5">
           <Col md={12}>
             <h3 className="fw-bold mb-4">Customer Reviews</h3>
-            {product.reviews && product.reviews.length > 0 ? (
-              product.reviews.map((review, i) => {
+            {reviews.length > 0 ? (
+              reviews.map((review, i) => {
                 const username = review.user?.username || "User";
                 const avatarUrl = review.user?.avatar ? review.user.avatar : `https://ui-avatars.com/api/?name=${username}&background=random&size=64`;
 
@@ -78,8 +78,7 @@ export const CartProvider = ({ children }) => {
         const mergedItems = itemsList.map(item => ({
           ...item,
           title: item.product?.title || '',
-          description: item.product?.description || '',
-          images: item.product?.images || [],
+          images: item.product?.image ? [{ image: item.product.image }] : [],
           price: Number(item.product?.price) || 0,
           quantity: Number(item.quantity) || 1,
           category: item.product?.category || {},
@@ -142,7 +141,6 @@ export const CartProvider = ({ children }) => {
           ...newItem,
           product,
           title: product.title || '',
-          description: product.description || '',
           images: product.images || [],
           price: Number(product.price) || 0,
           quantity: Number(newItem.quantity) || 1,
@@ -104,7 +104,6 @@ const Cart = () => {
                     <Col xs={layout === 'grid' ? 12 : 9}>
                       <Card.Body>
                         <Card.Title>{item.title || 'No title'}</Card.Title>
-                        <Card.Text className="text-muted">{item.description || 'No description'}</Card.Text>
                         <p className="price">Price: ${price.toFixed(2)}</p>
 
                         {/* Quantity controls */}